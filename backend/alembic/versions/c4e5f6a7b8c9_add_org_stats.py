@@ -0,0 +1,52 @@
+"""add org stats
+
+Revision ID: c4e5f6a7b8c9
+Revises: b3c1d2e4f5a6
+Create Date: 2026-10-18 14:03:27.904115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e5f6a7b8c9'
+down_revision: Union[str, None] = 'b3c1d2e4f5a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('org_stats',
+    sa.Column('org_id', sa.UUID(), nullable=False),
+    sa.Column('members', sa.Integer(), nullable=False),
+    sa.Column('roles', sa.Integer(), nullable=False),
+    sa.Column('permissions', sa.Integer(), nullable=False),
+    sa.Column('policies', sa.Integer(), nullable=False),
+    sa.Column('active_policies', sa.Integer(), nullable=False),
+    sa.Column('pending_requests', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id')
+    )
+    # Backfill existing orgs; from here on the services keep the counters current
+    op.execute("""
+        INSERT INTO org_stats (org_id, members, roles, permissions, policies,
+                               active_policies, pending_requests, updated_at)
+        SELECT o.id,
+               (SELECT count(*) FROM org_memberships m WHERE m.org_id = o.id),
+               (SELECT count(*) FROM roles r WHERE r.org_id = o.id),
+               (SELECT count(*) FROM permissions p WHERE p.org_id = o.id),
+               (SELECT count(*) FROM policies p WHERE p.org_id = o.id),
+               (SELECT count(*) FROM policies p WHERE p.org_id = o.id AND p.is_active),
+               (SELECT count(*) FROM access_requests a
+                 WHERE a.org_id = o.id AND a.status = 'PENDING'),
+               now()
+        FROM organizations o
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('org_stats')
@@ -0,0 +1,42 @@
+"""add audit rollups
+
+Revision ID: d5f6a7b8c9d0
+Revises: c4e5f6a7b8c9
+Create Date: 2026-10-18 16:41:09.117634
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f6a7b8c9d0'
+down_revision: Union[str, None] = 'c4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('audit_rollups_hourly',
+    sa.Column('org_id', sa.UUID(), nullable=False),
+    sa.Column('hour', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('action', sa.String(length=100), nullable=False),
+    sa.Column('resource_type', sa.String(length=50), nullable=False),
+    sa.Column('events', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['org_id'], ['organizations.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('org_id', 'hour', 'action', 'resource_type')
+    )
+    # Backfill from the raw log; the audit writer keeps the rollups current from here on
+    op.execute("""
+        INSERT INTO audit_rollups_hourly (org_id, hour, action, resource_type, events)
+        SELECT org_id, date_trunc('hour', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+               action, resource_type, count(*)
+        FROM audit_logs
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('audit_rollups_hourly')
@@ -0,0 +1,124 @@
+"""partition audit logs by month
+
+Revision ID: e6a7b8c9d0e1
+Revises: d5f6a7b8c9d0
+Create Date: 2026-10-18 18:12:44.630251
+
+Rebuilds audit_logs as a table range-partitioned by month on created_at,
+with a partition for every month that has rows, the next few months, and a
+default partition for anything outside them. Rows are copied over inside
+the migration, so budget for the table being locked while it runs. The
+primary key becomes (id, created_at) because a partitioned table's unique
+constraints must include the partition key, and the single-column org_id
+index is dropped: the (org_id, action) and (org_id, created_at) indexes
+already cover it.
+
+From here on the audit maintenance job creates partitions ahead of time and
+drops the ones past retention.
+"""
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a7b8c9d0e1'
+down_revision: Union[str, None] = 'd5f6a7b8c9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+COLUMNS = (
+    "id, org_id, actor_id, actor_email, action, resource_type, resource_id, "
+    "details, ip_address, user_agent, created_at"
+)
+
+COLUMN_DDL = """
+    id uuid NOT NULL,
+    org_id uuid NOT NULL REFERENCES organizations (id) ON DELETE CASCADE,
+    actor_id uuid REFERENCES users (id) ON DELETE SET NULL,
+    actor_email varchar(255),
+    action varchar(100) NOT NULL,
+    resource_type varchar(50) NOT NULL,
+    resource_id varchar(255),
+    details jsonb,
+    ip_address varchar(45),
+    user_agent varchar(500),
+    created_at timestamptz NOT NULL
+"""
+
+INDEXES = {
+    "ix_audit_logs_action": "action",
+    "ix_audit_logs_actor_id": "actor_id",
+    "ix_audit_logs_created_at": "created_at",
+    "ix_audit_logs_resource_type": "resource_type",
+    "ix_audit_org_action": "org_id, action",
+    "ix_audit_org_created": "org_id, created_at",
+}
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def upgrade() -> None:
+    op.add_column('organizations', sa.Column('audit_retention_days', sa.Integer(), nullable=True))
+
+    # Index and primary key names are reused by the new table
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_unpartitioned")
+    op.execute("ALTER TABLE audit_logs_unpartitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_unpartitioned_pkey")
+    for name in (*INDEXES, "ix_audit_logs_org_id"):
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute(f"""
+        CREATE TABLE audit_logs ({COLUMN_DDL},
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    now = datetime.now(timezone.utc)
+    first = op.get_bind().execute(
+        sa.text("SELECT min(created_at) FROM audit_logs_unpartitioned")
+    ).scalar() or now
+    month = first.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    last = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        end = _next_month(month)
+        op.execute(
+            f"CREATE TABLE audit_logs_{month:%Y_%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+        )
+        month = end
+
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_unpartitioned")
+    op.execute("DROP TABLE audit_logs_unpartitioned")
+
+    # Created on the parent, these cascade to every partition, present and future
+    for name, columns in INDEXES.items():
+        op.execute(f"CREATE INDEX {name} ON audit_logs ({columns})")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER TABLE audit_logs_partitioned RENAME CONSTRAINT audit_logs_pkey TO audit_logs_partitioned_pkey")
+    for name in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+    op.execute(f"""
+        CREATE TABLE audit_logs ({COLUMN_DDL},
+            CONSTRAINT audit_logs_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+
+    for name, columns in {**INDEXES, "ix_audit_logs_org_id": "org_id"}.items():
+        op.execute(f"CREATE INDEX {name} ON audit_logs ({columns})")
+
+    op.drop_column('organizations', 'audit_retention_days')
@@ -0,0 +1,187 @@
+"""
+End-to-end authorization benchmarks against a synthetic organization.
+
+Generates an org (see benchmarks.synthetic) in an in-memory SQLite database,
+the same setup as tests/conftest.py, or in a local Postgres given with
+--database-url, then measures PolicyService.evaluate, evaluate_bulk,
+RBACService.check_permission and POST /api/authorize. Results are printed
+and stored as JSON under benchmarks/results/ for comparison between commits.
+
+Usage (from backend/):
+    python -m benchmarks.bench_authz [--users 1000] [--policies 5000] [--wildcard-density 0.3]
+        [--condition-complexity 2] [--database-url postgresql+asyncpg://...]
+        [--compare benchmarks/results/<earlier run>.json]
+
+Against Postgres, point --database-url at a scratch database: missing tables
+are created and the synthetic org is left in place.
+"""
+import argparse
+import asyncio
+import os
+from dataclasses import asdict
+from pathlib import Path
+from uuid import UUID
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from benchmarks.harness import load_baseline, measure, print_table, save_results  # noqa: E402
+from benchmarks.synthetic import OrgSpec, SyntheticOrg, generate_org  # noqa: E402
+from src.core.security import create_access_token  # noqa: E402
+from src.db.models.base import Base  # noqa: E402
+from src.services.decision_cache import decision_cache  # noqa: E402
+from src.services.permission_cache import permission_cache  # noqa: E402
+from src.services.policy_service import PolicyService  # noqa: E402
+from src.services.rbac_service import RBACService  # noqa: E402
+
+SQLITE_MEMORY_URL = "sqlite+aiosqlite:///:memory:"
+
+
+def create_engine(url: str):
+    if url.startswith("sqlite") and ":memory:" in url:
+        # One shared connection so every session sees the generated org
+        return create_async_engine(
+            url, connect_args={"check_same_thread": False}, poolclass=StaticPool
+        )
+    return create_async_engine(url)
+
+
+def create_client(session_factory, rate_limit: bool) -> AsyncClient:
+    """An HTTP client bound to the app, using the benchmark database."""
+    from src.api.middleware import UserRateLimitMiddleware
+    from src.api.rate_limit import route_limits
+    from src.db.database import get_db
+    from src.main import app
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    if not rate_limit:
+        # Drop the per-user limiter before the stack is built and stop charging route budgets
+        app.user_middleware = [m for m in app.user_middleware if m.cls is not UserRateLimitMiddleware]
+        route_limits.enabled = False
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://bench")
+
+
+async def run(args) -> tuple[list[dict], OrgSpec]:
+    spec = OrgSpec(
+        users=args.users,
+        roles=args.roles,
+        permissions=args.permissions,
+        policies=args.policies,
+        wildcard_density=args.wildcard_density,
+        condition_complexity=args.condition_complexity,
+        seed=args.seed,
+    )
+    engine = create_engine(args.database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with session_factory() as db:
+        org: SyntheticOrg = await generate_org(db, spec)
+    print(
+        f"org: {spec.users} users, {spec.roles} roles, {spec.permissions} permissions, "
+        f"{spec.policies} policies, wildcard density {spec.wildcard_density}, "
+        f"{spec.condition_complexity} condition keys"
+    )
+
+    n = args.iterations
+    queries = org.queries(n)
+    bulk = [org.queries(args.bulk_size) for _ in range(max(1, n // args.bulk_size))]
+    checks = [org.permission_check() for _ in range(n)]
+    decision_ttl = decision_cache.ttl_seconds
+    results = []
+
+    async def evaluate(i: int):
+        q = queries[i % n]
+        async with session_factory() as db:
+            await PolicyService(db).evaluate(
+                org.org_id, UUID(q["principal_id"]), q["action"], q["resource"], q["context"]
+            )
+
+    async def evaluate_bulk(i: int):
+        async with session_factory() as db:
+            await PolicyService(db).evaluate_bulk(org.org_id, bulk[i % len(bulk)])
+
+    async def check_permission(i: int):
+        user_id, permission = checks[i % n]
+        async with session_factory() as db:
+            await RBACService(db).check_permission(org.org_id, user_id, permission)
+
+    async def check_permission_cold(i: int):
+        permission_cache.evict(org.org_id)
+        await check_permission(i)
+
+    # Raw evaluation cost, without the decision cache in front
+    decision_cache.ttl_seconds = 0
+    results.append(await measure("evaluate", evaluate, n))
+    results.append(
+        await measure(
+            f"evaluate_bulk[{args.bulk_size}]", evaluate_bulk, len(bulk), ops_per_call=args.bulk_size
+        )
+    )
+    decision_cache.ttl_seconds = decision_ttl or 5.0
+    decision_cache.clear()
+    # Half the queries repeat, as with callers that re-check the same tuple
+    repeats = queries[: n // 2] * 2
+    queries[:] = repeats + queries[len(repeats):]
+    results.append(await measure("evaluate (decision cache)", evaluate, n, warmup=0))
+    decision_cache.ttl_seconds = 0
+
+    results.append(await measure("check_permission (cold)", check_permission_cold, n))
+    results.append(await measure("check_permission", check_permission, n))
+
+    headers = {"Authorization": f"Bearer {create_access_token(str(org.admin_id))}"}
+    async with create_client(session_factory, args.rate_limit) as client:
+        async def authorize(i: int):
+            response = await client.post(
+                "/api/authorize", json={"org_id": str(org.org_id), **queries[i % n]}, headers=headers
+            )
+            response.raise_for_status()
+
+        results.append(await measure("POST /api/authorize", authorize, n))
+
+    decision_cache.ttl_seconds = decision_ttl
+    await engine.dispose()
+    return results, spec
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--roles", type=int, default=20)
+    parser.add_argument("--permissions", type=int, default=200)
+    parser.add_argument("--policies", type=int, default=2000)
+    parser.add_argument("--wildcard-density", type=float, default=0.3)
+    parser.add_argument("--condition-complexity", type=int, default=1)
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--bulk-size", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--database-url", default=SQLITE_MEMORY_URL)
+    parser.add_argument("--rate-limit", action="store_true", help="keep the rate limiter on /api/authorize")
+    parser.add_argument("--output", type=Path, help="JSON results path (default: benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    results, spec = asyncio.run(run(args))
+    print_table(results, load_baseline(args.compare) if args.compare else None)
+
+    config = {
+        **asdict(spec),
+        "iterations": args.iterations,
+        "bulk_size": args.bulk_size,
+        "database": args.database_url.split(":", 1)[0],
+    }
+    print(f"results written to {save_results(results, config, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
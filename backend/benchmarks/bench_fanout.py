@@ -0,0 +1,152 @@
+"""
+WebSocket notification fan-out throughput.
+
+Broadcasts events to one org with thousands of simulated connections and
+reports events/sec. Each connection is a real Starlette WebSocket whose ASGI
+`send` only counts messages, so the numbers are the cost of the app side of
+fan-out: encoding, queueing and the writer tasks. An event counts as done
+once every connection's writer has handed it to the server.
+
+Three variants per connection count:
+- send_json per socket: the loop the manager used to run, encoding per recipient
+- encoded once: ConnectionManager fan-out of one pre-encoded Frame
+- encoded once, deflate: the same with every connection on the deflate subprotocol
+
+Usage (from backend/):
+    python -m benchmarks.bench_fanout [--connections 1000,5000] [--events 200]
+        [--compare benchmarks/results/<earlier run>.json]
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from pathlib import Path
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from starlette.websockets import WebSocket  # noqa: E402
+
+from benchmarks.harness import load_baseline, print_table, save_results, summarize  # noqa: E402
+from src.services.notification_service import ConnectionManager, Frame  # noqa: E402
+
+ORG_ID = "bench-org"
+
+
+class CountingSink:
+    """ASGI send that counts delivered messages and signals when a target is reached."""
+
+    def __init__(self):
+        self.delivered = 0
+        self.target = 0
+        self.done = asyncio.Event()
+
+    async def send(self, message: dict):
+        if message["type"] == "websocket.send":
+            self.delivered += 1
+            if self.delivered >= self.target:
+                self.done.set()
+
+    def expect(self, count: int):
+        self.target = self.delivered + count
+        self.done.clear()
+
+
+async def _receive() -> dict:
+    return {"type": "websocket.connect"}
+
+
+def simulated_websocket(sink: CountingSink) -> WebSocket:
+    scope = {
+        "type": "websocket",
+        "path": "/ws/notifications",
+        "headers": [],
+        "query_string": b"",
+        "subprotocols": [],
+    }
+    return WebSocket(scope, _receive, sink.send)
+
+
+def event(seq: int) -> dict:
+    return {
+        "type": "request.new",
+        "data": {
+            "request_id": str(uuid.UUID(int=seq)),
+            "requester_name": f"User {seq}",
+            "message": f"New access request from User {seq} for documents:read on project-{seq % 50}",
+        },
+    }
+
+
+async def bench_per_socket_json(connections: int, events: int) -> dict:
+    sink = CountingSink()
+    sockets = [simulated_websocket(sink) for _ in range(connections)]
+    for websocket in sockets:
+        await websocket.accept()
+
+    latencies = []
+    for seq in range(events):
+        message = event(seq)
+        start = time.perf_counter()
+        for websocket in sockets:
+            await websocket.send_json(message)
+        latencies.append(time.perf_counter() - start)
+    return summarize(f"send_json per socket x{connections}", latencies)
+
+
+async def bench_encoded_once(connections: int, events: int, deflate: bool) -> dict:
+    sink = CountingSink()
+    manager = ConnectionManager(max_queue=events + 1)
+    for i in range(connections):
+        await manager.connect(simulated_websocket(sink), ORG_ID, f"user-{i}", deflate=deflate)
+
+    latencies = []
+    for seq in range(events):
+        message = event(seq)
+        start = time.perf_counter()
+        sink.expect(connections)
+        await manager.broadcast_to_org(ORG_ID, Frame(message))
+        await sink.done.wait()
+        latencies.append(time.perf_counter() - start)
+
+    for users in list(manager.active_connections.values()):
+        for user_connections in list(users.values()):
+            for connection in list(user_connections):
+                connection.close()
+    await asyncio.sleep(0)
+
+    label = "encoded once, deflate" if deflate else "encoded once"
+    return summarize(f"{label} x{connections}", latencies)
+
+
+async def run(args) -> list[dict]:
+    results = []
+    for connections in args.connections:
+        results.append(await bench_per_socket_json(connections, args.events))
+        results.append(await bench_encoded_once(connections, args.events, deflate=False))
+        results.append(await bench_encoded_once(connections, args.events, deflate=True))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--connections",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[1000, 5000],
+        help="comma-separated simulated connection counts",
+    )
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--output", type=Path, help="JSON results path (default: benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_table(results, load_baseline(args.compare) if args.compare else None)
+    config = {"benchmark": "fanout", "connections": args.connections, "events": args.events}
+    print(f"results written to {save_results(results, config, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Rate limit middleware overhead: pure ASGI against BaseHTTPMiddleware.
+
+Runs GET /health and POST /api/authorize through the app with three
+middleware stacks: no rate limiting, the rate limiter as the
+BaseHTTPMiddleware it used to be (kept here for comparison), and the pure
+ASGI UserRateLimitMiddleware the app now uses. Limits are raised so no
+request is rejected; the difference is the cost of the middleware itself.
+The stacks are timed in alternating rounds so that slow drift over the run
+(caches filling, GC) does not favour whichever stack runs first.
+
+Usage (from backend/):
+    python -m benchmarks.bench_middleware [--iterations 3000] [--rounds 10]
+        [--compare benchmarks/results/<earlier run>.json]
+"""
+import argparse
+import asyncio
+import dataclasses
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+
+from fastapi import Request  # noqa: E402
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.ext.asyncio import AsyncSession  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from starlette.middleware import Middleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+
+from benchmarks.bench_authz import SQLITE_MEMORY_URL, create_engine  # noqa: E402
+from benchmarks.harness import load_baseline, print_table, save_results, summarize  # noqa: E402
+from benchmarks.synthetic import OrgSpec, generate_org  # noqa: E402
+from src.api.middleware import SKIP_PATHS, UserRateLimitMiddleware  # noqa: E402
+from src.api.rate_limit import RouteRateLimits, SlidingWindowLimiter, route_limits  # noqa: E402
+from src.core.security import create_access_token  # noqa: E402
+from src.db.database import get_db  # noqa: E402
+from src.db.models.base import Base  # noqa: E402
+from src.main import app  # noqa: E402
+from src.services.decision_cache import decision_cache  # noqa: E402
+
+UNLIMITED = 10**9
+
+
+class BaseHTTPRateLimitMiddleware(BaseHTTPMiddleware):
+    """The user rate limiter as a BaseHTTPMiddleware, as before the ASGI rewrite."""
+
+    def __init__(self, app, limiter: SlidingWindowLimiter, route_limits: RouteRateLimits):
+        super().__init__(app)
+        self.limiter = limiter
+        self.route_limits = route_limits
+        self.identify = UserRateLimitMiddleware(None)._get_identifier
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if request.url.path in SKIP_PATHS:
+            return await call_next(request)
+
+        identifier = self.identify(request.scope)
+        policy = self.route_limits.policy_for(request.url.path)
+        if policy is None:
+            result = self.limiter.hit(identifier)
+        else:
+            result = self.limiter.hit(f"{identifier}:{policy.name}", limit=policy.caller_limit)
+        if not result.allowed:
+            return Response(status_code=429)
+        response = await call_next(request)
+        result = getattr(request.state, "rate_limit", None) or result
+        if not result.allowed:
+            return response
+        response.headers["X-RateLimit-Limit"] = str(result.limit)
+        response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+        return response
+
+
+def use_rate_limiter(middleware_cls: type | None, limiter: SlidingWindowLimiter):
+    """Swap the app's rate limit middleware; the stack is rebuilt on the next request."""
+    stack = [
+        m for m in app.user_middleware
+        if m.cls not in (UserRateLimitMiddleware, BaseHTTPRateLimitMiddleware)
+    ]
+    if middleware_cls is not None:
+        stack.insert(0, Middleware(middleware_cls, limiter=limiter, route_limits=route_limits))
+    app.user_middleware = stack
+    app.middleware_stack = None
+
+
+async def run(args) -> list[dict]:
+    engine = create_engine(SQLITE_MEMORY_URL)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        org = await generate_org(db, OrgSpec(users=50, roles=5, permissions=20, policies=100))
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    route_limits.org_limits[str(org.org_id)] = {"authorize": UNLIMITED}
+    route_limits.policies["authorize"] = dataclasses.replace(
+        route_limits.policies["authorize"], caller_limit=UNLIMITED
+    )
+    # Every stack sees the same queries; keep later stacks from hitting cached decisions
+    decision_ttl, decision_cache.ttl_seconds = decision_cache.ttl_seconds, 0
+    limiter = SlidingWindowLimiter(UNLIMITED, 60)
+    headers = {"Authorization": f"Bearer {create_access_token(str(org.admin_id))}"}
+    queries = org.queries(args.iterations)
+    original_stack = list(app.user_middleware)
+
+    stacks = [
+        ("none", None),
+        ("BaseHTTP", BaseHTTPRateLimitMiddleware),
+        ("ASGI", UserRateLimitMiddleware),
+    ]
+    latencies: dict[str, list[float]] = {}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        async def health(i: int):
+            response = await client.get("/health")
+            response.raise_for_status()
+
+        async def authorize(i: int):
+            response = await client.post(
+                "/api/authorize",
+                json={"org_id": str(org.org_id), **queries[i % len(queries)]},
+                headers=headers,
+            )
+            response.raise_for_status()
+
+        endpoints = [("GET /health", health), ("POST /api/authorize", authorize)]
+        for _, operation in endpoints:
+            for i in range(50):
+                await operation(i)
+
+        # Stacks take turns in short rounds so drift over the run hits them equally
+        per_round = max(1, args.iterations // args.rounds)
+        for round_number in range(args.rounds):
+            for label, middleware_cls in stacks:
+                use_rate_limiter(middleware_cls, limiter)
+                for endpoint, operation in endpoints:
+                    samples = latencies.setdefault(f"{endpoint} ({label})", [])
+                    for i in range(round_number * per_round, (round_number + 1) * per_round):
+                        start = time.perf_counter()
+                        await operation(i)
+                        samples.append(time.perf_counter() - start)
+
+    app.user_middleware = original_stack
+    app.middleware_stack = None
+    app.dependency_overrides.clear()
+    decision_cache.ttl_seconds = decision_ttl
+    await engine.dispose()
+    return [summarize(name, samples) for name, samples in latencies.items()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=3000)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--output", type=Path, help="JSON results path (default: benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_table(results, load_baseline(args.compare) if args.compare else None)
+    config = {"benchmark": "middleware", "iterations": args.iterations, "rounds": args.rounds}
+    print(f"results written to {save_results(results, config, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
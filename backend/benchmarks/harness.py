@@ -0,0 +1,114 @@
+"""
+Timing, reporting and result storage shared by the benchmarks.
+
+Each measurement runs an async operation a fixed number of times after a
+warmup and reports throughput plus latency percentiles. Results are written
+as JSON tagged with the current git commit so runs can be compared.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(name: str, latencies: list[float], ops_per_call: int = 1) -> dict:
+    """Throughput and latency summary; latencies are in seconds per call."""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    return {
+        "name": name,
+        "calls": len(ordered),
+        "ops_per_call": ops_per_call,
+        "throughput_ops_s": len(ordered) * ops_per_call / total if total else 0.0,
+        "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+        "p50_ms": percentile(ordered, 50) * 1000,
+        "p90_ms": percentile(ordered, 90) * 1000,
+        "p99_ms": percentile(ordered, 99) * 1000,
+        "max_ms": ordered[-1] * 1000 if ordered else 0.0,
+    }
+
+
+async def measure(
+    name: str,
+    operation: Callable[[int], Awaitable[object]],
+    iterations: int,
+    warmup: int = 10,
+    ops_per_call: int = 1,
+) -> dict:
+    """Time `operation(i)` for each iteration after `warmup` untimed calls."""
+    for i in range(warmup):
+        await operation(i)
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        await operation(i)
+        latencies.append(time.perf_counter() - start)
+    return summarize(name, latencies, ops_per_call)
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_table(results: list[dict], baseline: dict | None = None):
+    print(f"{'benchmark':<32} {'ops/s':>10} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for r in results:
+        line = (
+            f"{r['name']:<32} {r['throughput_ops_s']:>10.0f} {r['p50_ms']:>9.3f} "
+            f"{r['p90_ms']:>9.3f} {r['p99_ms']:>9.3f} {r['max_ms']:>9.3f}"
+        )
+        before = (baseline or {}).get(r["name"])
+        if before and before["throughput_ops_s"]:
+            change = r["throughput_ops_s"] / before["throughput_ops_s"] - 1
+            line += f"  ({change:+.0%} vs {baseline['_commit'] or 'baseline'})"
+        print(line)
+
+
+def save_results(results: list[dict], config: dict, output: Path | None = None) -> Path:
+    commit = git_commit()
+    if output is None:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}-{commit or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "commit": commit,
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "config": config,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    return output
+
+
+def load_baseline(path: Path) -> dict:
+    """Results of an earlier run keyed by benchmark name."""
+    data = json.loads(path.read_text())
+    baseline = {r["name"]: r for r in data["results"]}
+    baseline["_commit"] = data.get("commit")
+    return baseline
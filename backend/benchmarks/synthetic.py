@@ -0,0 +1,191 @@
+"""
+Synthetic organization generator for benchmarks.
+
+Builds one organization with a configurable number of users, roles,
+permissions and policies directly through the ORM, plus a reproducible
+stream of authorization queries against it. Wildcard density controls the
+share of policy patterns that are globs instead of literals; condition
+complexity is the number of condition keys attached to each policy.
+"""
+import random
+import uuid
+from dataclasses import dataclass, field
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.security import hash_password
+from src.db.models import (
+    Organization,
+    OrgMembership,
+    OrgMemberRole,
+    Permission,
+    Policy,
+    Role,
+    RolePermission,
+    User,
+    UserRole,
+)
+
+RESOURCE_TYPES = ["documents", "folders", "reports", "projects", "invoices", "tickets"]
+VERBS = ["read", "write", "delete", "share", "approve", "export"]
+CONDITION_KEYS = ["region", "tier", "hour", "department", "mfa", "device"]
+REGIONS = ["eu", "us", "apac"]
+TIERS = ["free", "pro", "enterprise"]
+
+# Rows per flush when inserting large orgs
+BATCH_SIZE = 1000
+
+
+@dataclass
+class OrgSpec:
+    users: int = 100
+    roles: int = 10
+    permissions: int = 50
+    policies: int = 200
+    roles_per_user: int = 2
+    permissions_per_role: int = 10
+    wildcard_density: float = 0.3
+    condition_complexity: int = 1
+    resources_per_type: int = 1000
+    seed: int = 7
+
+
+@dataclass
+class SyntheticOrg:
+    org_id: uuid.UUID
+    admin_id: uuid.UUID
+    user_ids: list[uuid.UUID]
+    permission_names: list[str]
+    spec: OrgSpec
+    rng: random.Random = field(repr=False)
+
+    def query(self) -> dict:
+        """One random authorization request against this org."""
+        rng = self.rng
+        rtype = rng.choice(RESOURCE_TYPES)
+        return {
+            "principal_id": str(rng.choice(self.user_ids)),
+            "action": f"{rtype}:{rng.choice(VERBS)}",
+            "resource": f"{rtype}:{rng.randrange(self.spec.resources_per_type)}",
+            "context": random_context(rng),
+        }
+
+    def queries(self, count: int) -> list[dict]:
+        return [self.query() for _ in range(count)]
+
+    def permission_check(self) -> tuple[uuid.UUID, str]:
+        return self.rng.choice(self.user_ids), self.rng.choice(self.permission_names)
+
+
+def random_context(rng: random.Random) -> dict:
+    return {
+        "region": rng.choice(REGIONS),
+        "tier": rng.choice(TIERS),
+        "hour": rng.randrange(24),
+        "department": f"dept-{rng.randrange(5)}",
+        "mfa": rng.random() < 0.7,
+        "device": rng.choice(["managed", "unmanaged"]),
+    }
+
+
+def _pattern(rtype: str, suffix: str, wildcard: bool, rng: random.Random) -> str:
+    if not wildcard:
+        return f"{rtype}:{suffix}"
+    return rng.choice(
+        [f"{rtype}:*", f"*:{suffix}", f"{rtype}:{suffix[:1]}*", f"{rtype}:?{suffix[-1:]}", "*"]
+    )
+
+
+def _conditions(complexity: int, rng: random.Random) -> dict | None:
+    if complexity <= 0:
+        return None
+    conditions = {}
+    for key in rng.sample(CONDITION_KEYS, min(complexity, len(CONDITION_KEYS))):
+        if key == "region":
+            conditions[key] = {"in": rng.sample(REGIONS, 2)}
+        elif key == "tier":
+            conditions[key] = {"neq": "free"}
+        elif key == "hour":
+            conditions[key] = {"gte": 6, "lt": 22}
+        elif key == "department":
+            conditions[key] = {"not_in": ["dept-0"]}
+        elif key == "mfa":
+            conditions[key] = True
+        else:
+            conditions[key] = "managed"
+    return conditions
+
+
+async def generate_org(db: AsyncSession, spec: OrgSpec) -> SyntheticOrg:
+    """Insert a synthetic org described by `spec` and commit it."""
+    rng = random.Random(spec.seed)
+    tag = uuid.uuid4().hex[:8]
+    # One bcrypt hash shared by every synthetic user keeps generation fast
+    password_hash = hash_password("benchmark")
+
+    org = Organization(name=f"Bench Org {tag}", slug=f"bench-{tag}")
+    admin = User(email=f"admin-{tag}@bench.local", name="Bench Admin", password_hash=password_hash)
+    db.add_all([org, admin])
+    await db.flush()
+    db.add(OrgMembership(user_id=admin.id, org_id=org.id, role=OrgMemberRole.OWNER))
+
+    roles = [Role(org_id=org.id, name=f"role-{i}") for i in range(spec.roles)]
+    permissions = [
+        Permission(org_id=org.id, name=f"{rng.choice(RESOURCE_TYPES)}:{rng.choice(VERBS)}-{i}")
+        for i in range(spec.permissions)
+    ]
+    db.add_all(roles + permissions)
+    await db.flush()
+
+    for role in roles:
+        for permission in rng.sample(permissions, min(spec.permissions_per_role, len(permissions))):
+            db.add(RolePermission(role_id=role.id, permission_id=permission.id))
+
+    user_ids = []
+    for start in range(0, spec.users, BATCH_SIZE):
+        users = [
+            User(email=f"user-{i}-{tag}@bench.local", name=f"User {i}", password_hash=password_hash)
+            for i in range(start, min(start + BATCH_SIZE, spec.users))
+        ]
+        db.add_all(users)
+        await db.flush()
+        for user in users:
+            user_ids.append(user.id)
+            db.add(OrgMembership(user_id=user.id, org_id=org.id, role=OrgMemberRole.MEMBER))
+            for role in rng.sample(roles, min(spec.roles_per_user, len(roles))):
+                db.add(UserRole(user_id=user.id, role_id=role.id, org_id=org.id))
+        await db.flush()
+
+    for i in range(spec.policies):
+        rtype = rng.choice(RESOURCE_TYPES)
+        verb = rng.choice(VERBS)
+        resource_id = str(rng.randrange(spec.resources_per_type))
+        if rng.random() < 0.8 and roles:
+            principals = {"roles": [r.name for r in rng.sample(roles, min(2, len(roles)))]}
+        else:
+            principals = {"users": [str(rng.choice(user_ids))]} if user_ids else {}
+        db.add(
+            Policy(
+                org_id=org.id,
+                name=f"policy-{i}",
+                effect="deny" if rng.random() < 0.1 else "allow",
+                principals=principals,
+                actions=[_pattern(rtype, verb, rng.random() < spec.wildcard_density, rng)],
+                resources=[_pattern(rtype, resource_id, rng.random() < spec.wildcard_density, rng)],
+                conditions=_conditions(spec.condition_complexity, rng),
+                priority=rng.randrange(100),
+            )
+        )
+        if i % BATCH_SIZE == BATCH_SIZE - 1:
+            await db.flush()
+
+    synthetic = SyntheticOrg(
+        org_id=org.id,
+        admin_id=admin.id,
+        user_ids=user_ids,
+        permission_names=[p.name for p in permissions],
+        spec=spec,
+        rng=rng,
+    )
+    await db.commit()
+    return synthetic
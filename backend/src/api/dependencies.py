@@ -1,39 +1,52 @@
+from collections.abc import Collection
+from dataclasses import dataclass
 from uuid import UUID
 from fastapi import Depends, Header, Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.database import get_db
-from src.db.models.user import User
 from src.db.models.organization import OrgMemberRole, OrgMembership
 from src.core.exceptions import Unauthorized, Forbidden, NotFound
+from src.core.identity_cache import UserIdentity, identity_cache
 from src.core.security import decode_token
 from src.services.auth_service import AuthService
 from src.services.org_service import OrgService
 
 
-async def get_current_user(
-    authorization: str | None = Header(default=None),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    """Get the current authenticated user from JWT token."""
+def _bearer_token(authorization: str | None) -> str:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise Unauthorized("Missing bearer token")
-
-    token = authorization.split(" ", 1)[1].strip()
-    try:
-        payload = decode_token(token)
-    except Exception:
-        raise Unauthorized("Invalid token")
-
-    if payload.get("type") != "access":
-        raise Unauthorized("Invalid token type")
-
-    user_id = payload.get("sub")
-    if not user_id:
-        raise Unauthorized("Invalid token")
-
-    user = await AuthService(db).get_user(user_id)
-    if not user:
-        raise Unauthorized("User not found")
+    return authorization.split(" ", 1)[1].strip()
+
+
+def _token_user_id(token: str) -> UUID:
+    """Verify an access token and return its subject, using the identity cache."""
+    user_id = identity_cache.get_claims(token)
+    if user_id is None:
+        try:
+            payload = decode_token(token)
+        except Exception:
+            raise Unauthorized("Invalid token")
+
+        if payload.get("type") != "access":
+            raise Unauthorized("Invalid token type")
+
+        try:
+            user_id = UUID(payload.get("sub"))
+        except (TypeError, ValueError):
+            raise Unauthorized("Invalid token")
+        identity_cache.put_claims(token, user_id, payload["exp"])
+    return user_id
+
+
+async def _authenticate(token: str, db: AsyncSession) -> UserIdentity:
+    """Resolve an access token to its user, using the identity cache."""
+    user_id = _token_user_id(token)
+    user = identity_cache.get_user(user_id)
+    if user is None:
+        row = await AuthService(db).get_user(user_id)
+        if not row:
+            raise Unauthorized("User not found")
+        user = identity_cache.put_user(row)
 
     if not user.is_active:
         raise Unauthorized("User account is disabled")
@@ -41,53 +54,99 @@ async def get_current_user(
     return user
 
 
+async def get_current_user(
+    authorization: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> UserIdentity:
+    """Get the current authenticated user from JWT token."""
+    return await _authenticate(_bearer_token(authorization), db)
+
+
 async def get_current_user_optional(
     authorization: str | None = Header(default=None),
     db: AsyncSession = Depends(get_db),
-) -> User | None:
+) -> UserIdentity | None:
     """Get the current user if authenticated, otherwise None."""
     if not authorization or not authorization.lower().startswith("bearer "):
         return None
 
     token = authorization.split(" ", 1)[1].strip()
     try:
-        payload = decode_token(token)
-    except Exception:
+        return await _authenticate(token, db)
+    except Unauthorized:
         return None
 
-    if payload.get("type") != "access":
-        return None
 
-    user_id = payload.get("sub")
-    if not user_id:
-        return None
+ADMIN_ROLES = (OrgMemberRole.OWNER, OrgMemberRole.ADMIN)
 
-    return await AuthService(db).get_user(user_id)
 
+@dataclass
+class AuthContext:
+    """The current user and their membership in the org named by the path."""
 
-class OrgMembershipChecker:
-    """Dependency to check organization membership."""
+    user: UserIdentity
+    org_id: UUID
+    membership: OrgMembership | None
 
-    def __init__(self, required_roles: list[OrgMemberRole] | None = None):
-        self.required_roles = required_roles
+    @property
+    def role(self) -> OrgMemberRole | None:
+        return self.membership.role if self.membership else None
 
-    async def __call__(
-        self,
-        org_id: UUID = Path(...),
-        db: AsyncSession = Depends(get_db),
-        current_user: User = Depends(get_current_user),
-    ) -> OrgMembership:
-        membership = await OrgService(db).get_membership(org_id, current_user.id)
-        if not membership:
+    @property
+    def is_admin(self) -> bool:
+        return self.role in ADMIN_ROLES
+
+    def require(self, roles: Collection[OrgMemberRole] | None = None, message: str = "Insufficient permissions"):
+        """Raise Forbidden unless the user is a member holding one of `roles`."""
+        if self.membership is None:
             raise Forbidden("Not a member of this organization")
+        if roles and self.membership.role not in roles:
+            raise Forbidden(message)
+
 
-        if self.required_roles and membership.role not in self.required_roles:
-            raise Forbidden("Insufficient permissions")
+async def get_auth_context(
+    org_id: UUID = Path(...),
+    authorization: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+) -> AuthContext:
+    """
+    Authenticate the caller and load their membership in `org_id`.
+
+    With a cached user status this is one membership lookup; otherwise the user
+    and membership come from a single joined query. FastAPI caches dependency
+    results per request, so every checker below shares one load.
+    """
+    user_id = _token_user_id(_bearer_token(authorization))
+    service = OrgService(db)
+
+    user = identity_cache.get_user(user_id)
+    if user is None:
+        row, membership = await service.get_user_with_membership(org_id, user_id)
+        if not row:
+            raise Unauthorized("User not found")
+        user = identity_cache.put_user(row)
+    else:
+        membership = await service.get_membership(org_id, user_id)
+
+    if not user.is_active:
+        raise Unauthorized("User account is disabled")
+
+    return AuthContext(user=user, org_id=org_id, membership=membership)
+
+
+class OrgMembershipChecker:
+    """Dependency to check organization membership."""
+
+    def __init__(self, required_roles: list[OrgMemberRole] | None = None, message: str = "Insufficient permissions"):
+        self.required_roles = required_roles
+        self.message = message
 
-        return membership
+    async def __call__(self, auth: AuthContext = Depends(get_auth_context)) -> AuthContext:
+        auth.require(self.required_roles, self.message)
+        return auth
 
 
 # Commonly used dependency instances
 require_org_member = OrgMembershipChecker()
-require_org_admin = OrgMembershipChecker([OrgMemberRole.OWNER, OrgMemberRole.ADMIN])
-require_org_owner = OrgMembershipChecker([OrgMemberRole.OWNER])
+require_org_admin = OrgMembershipChecker(list(ADMIN_ROLES), "Admin access required")
+require_org_owner = OrgMembershipChecker([OrgMemberRole.OWNER], "Owner access required")
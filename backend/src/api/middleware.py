@@ -0,0 +1,129 @@
+"""
+Pure ASGI middleware.
+
+These wrap the app directly instead of going through BaseHTTPMiddleware,
+which runs every request in an extra task and re-wraps the response body in
+a stream. Headers are added by wrapping `send` and rewriting the
+`http.response.start` message, so streamed responses pass through untouched.
+"""
+import hashlib
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.api.rate_limit import RateLimitResult, RouteRateLimits, SlidingWindowLimiter
+
+# Health checks, metrics scrapes and websocket upgrades are never limited
+SKIP_PATHS = frozenset({"/health", "/metrics", "/ws/notifications"})
+
+_RATE_LIMITED_BODY = b'{"detail": "Rate limit exceeded. Try again later."}'
+
+
+def _header(scope: Scope, name: bytes) -> bytes | None:
+    """First value of a request header; `name` must be lowercase."""
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+class RateLimitMiddleware:
+    """
+    Sliding-window rate limiting per client IP.
+
+    Counts live in the limiter's store: process-local, shared memory or
+    Redis (see src.core.rate_limit_store), so workers can share one budget.
+    Paths with a route policy take one unit per request from a separate
+    per-client bucket sized for that route; the endpoint then charges the
+    org's cost-weighted budget, and its result is the one reported in the
+    X-RateLimit-* headers.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        requests_per_minute: int = 100,
+        window_seconds: int = 60,
+        limiter: SlidingWindowLimiter | None = None,
+        route_limits: RouteRateLimits | None = None,
+    ):
+        self.app = app
+        self.limiter = limiter or SlidingWindowLimiter(requests_per_minute, window_seconds)
+        self.route_limits = route_limits
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"] in SKIP_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        # Endpoints read and write request.state through this dict
+        state = scope.setdefault("state", {})
+        identifier = self._get_identifier(scope)
+        policy = self.route_limits.policy_for(scope["path"]) if self.route_limits else None
+        if policy is None:
+            result = self.limiter.hit(identifier)
+        else:
+            # One unit per request against the caller, before authentication;
+            # the endpoint charges the org's cost-weighted budget once the
+            # caller is known to be a member
+            result = self.limiter.hit(f"{identifier}:{policy.name}", limit=policy.caller_limit)
+        if not result.allowed:
+            await self._reject(result, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                # The org budget charged by the endpoint, if any, is the one to report
+                current = state.get("rate_limit") or result
+                # Rejections raised by an endpoint already carry their headers
+                if current is not None and current.allowed:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-RateLimit-Limit"] = str(current.limit)
+                    headers["X-RateLimit-Remaining"] = str(current.remaining)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _reject(self, result: RateLimitResult, send: Send):
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(_RATE_LIMITED_BODY)).encode()),
+                (b"retry-after", str(result.retry_after).encode()),
+                (b"x-ratelimit-limit", str(result.limit).encode()),
+                (b"x-ratelimit-remaining", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": _RATE_LIMITED_BODY})
+
+    def _get_identifier(self, scope: Scope) -> str:
+        return self._get_client_ip(scope)
+
+    def _get_client_ip(self, scope: Scope) -> str:
+        """Get client IP, considering X-Forwarded-For header."""
+        forwarded_for = _header(scope, b"x-forwarded-for")
+        if forwarded_for:
+            # Take the first IP in the chain
+            return forwarded_for.split(b",")[0].strip().decode("latin-1")
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+
+class UserRateLimitMiddleware(RateLimitMiddleware):
+    """
+    Rate limiter based on authenticated user ID.
+    Falls back to IP-based limiting for unauthenticated requests.
+    """
+
+    def _get_identifier(self, scope: Scope) -> str:
+        """Get user ID from JWT or fall back to IP."""
+        auth_header = _header(scope, b"authorization")
+        if auth_header and auth_header.startswith(b"Bearer "):
+            # Use a digest of the whole token as identifier (unique per user session).
+            # A token prefix is the shared JWT header and would put every user in one bucket.
+            return f"token:{hashlib.sha256(auth_header[7:]).hexdigest()[:32]}"
+
+        # Fall back to IP
+        return f"ip:{self._get_client_ip(scope)}"
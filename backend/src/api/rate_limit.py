@@ -1,161 +1,205 @@
+import json
+import math
 import time
-from collections import defaultdict
-from typing import Callable
-from fastapi import Request, HTTPException
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from dataclasses import dataclass
+from uuid import UUID
+from fastapi import Request
+from starlette.routing import compile_path
 
+from src.config import settings
+from src.core.exceptions import PayloadTooLarge, TooManyRequests
+from src.core.rate_limit_store import RateLimitStore, create_rate_limit_store
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
+
+@dataclass(slots=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int
+
+
+class SlidingWindowLimiter:
     """
-    Simple in-memory rate limiter.
-    Limits requests per IP address.
+    Sliding-window counter rate limiter.
+
+    Each key is counted per fixed window of `window_seconds`. The rate over
+    the last `window_seconds` is estimated as previous window's count * (share
+    of it still inside the sliding window) + current window's count, which is
+    constant work and memory per key. Counts live in a RateLimitStore, which
+    may share them with other workers. Keys idle for two full windows carry
+    no weight and are evicted by a sweep that runs at most once per
+    `sweep_interval`.
     """
 
     def __init__(
         self,
-        app,
-        requests_per_minute: int = 100,
-        window_seconds: int = 60,
+        limit: int,
+        window_seconds: int,
+        sweep_interval: float | None = None,
+        store: RateLimitStore | None = None,
     ):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
+        self.limit = limit
         self.window_seconds = window_seconds
-        # Store: {ip: [(timestamp, count), ...]}
-        self.request_counts: dict[str, list[tuple[float, int]]] = defaultdict(list)
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip rate limiting for health check and websocket
-        if request.url.path in ["/health", "/ws/notifications"]:
-            return await call_next(request)
-
-        client_ip = self._get_client_ip(request)
-        current_time = time.time()
-
-        # Clean old entries
-        self._cleanup_old_entries(client_ip, current_time)
-
-        # Count requests in current window
-        request_count = sum(count for _, count in self.request_counts[client_ip])
-
-        if request_count >= self.requests_per_minute:
-            return Response(
-                content='{"detail": "Rate limit exceeded. Try again later."}',
-                status_code=429,
-                media_type="application/json",
-                headers={
-                    "Retry-After": str(self.window_seconds),
-                    "X-RateLimit-Limit": str(self.requests_per_minute),
-                    "X-RateLimit-Remaining": "0",
-                },
+        self.sweep_interval = sweep_interval or window_seconds
+        self.store = store or RateLimitStore()
+        self._next_sweep = time.time() + self.sweep_interval
+        self.evicted = 0
+
+    def hit(
+        self, key: str, cost: int = 1, now: float | None = None, limit: int | None = None
+    ) -> RateLimitResult:
+        """
+        Count a request of `cost` units against `key` unless it would exceed
+        the limit. `limit` overrides the limiter's default for this key.
+        """
+        limit = self.limit if limit is None else limit
+        # Wall clock, so window boundaries agree across workers and hosts
+        now = time.time() if now is None else now
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        window = int(now // self.window_seconds)
+        elapsed = now - window * self.window_seconds
+        current = self.store.count(key, window)
+        previous = self.store.count(key, window - 1)
+        used = previous * (1 - elapsed / self.window_seconds) + current
+
+        if used + cost > limit:
+            return RateLimitResult(
+                allowed=False,
+                limit=limit,
+                remaining=0,
+                retry_after=self._retry_after(limit, current, previous, elapsed, cost),
             )
 
-        # Add current request
-        self.request_counts[client_ip].append((current_time, 1))
-
-        response = await call_next(request)
-
-        # Add rate limit headers
-        remaining = max(0, self.requests_per_minute - request_count - 1)
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-
-        return response
-
-    def _get_client_ip(self, request: Request) -> str:
-        """Get client IP, considering X-Forwarded-For header."""
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            # Take the first IP in the chain
-            return forwarded_for.split(",")[0].strip()
-        return request.client.host if request.client else "unknown"
-
-    def _cleanup_old_entries(self, client_ip: str, current_time: float):
-        """Remove entries older than the window."""
-        cutoff = current_time - self.window_seconds
-        self.request_counts[client_ip] = [
-            (ts, count)
-            for ts, count in self.request_counts[client_ip]
-            if ts > cutoff
-        ]
-
-
-class UserRateLimitMiddleware(BaseHTTPMiddleware):
+        self.store.add(key, window, cost)
+        return RateLimitResult(
+            allowed=True,
+            limit=limit,
+            remaining=max(0, math.floor(limit - used - cost)),
+            retry_after=0,
+        )
+
+    def sweep(self, now: float | None = None) -> int:
+        """Evict keys whose counts no longer affect any decision."""
+        now = time.time() if now is None else now
+        evicted = self.store.sweep(int(now // self.window_seconds) - 1)
+        self.evicted += evicted
+        self._next_sweep = now + self.sweep_interval
+        return evicted
+
+    def reset(self):
+        self.store.reset()
+
+    def stats(self) -> dict:
+        return {
+            **self.store.stats(),
+            "limit": self.limit,
+            "window_seconds": self.window_seconds,
+            "evicted": self.evicted,
+        }
+
+    def _retry_after(self, limit: int, current: int, previous: int, elapsed: float, cost: int) -> int:
+        """Seconds until the estimate leaves room for `cost`."""
+        room = limit - current - cost
+        if room < 0 or previous == 0:
+            # Only the next window's reset can help
+            return math.ceil(self.window_seconds - elapsed)
+        # previous * (1 - t / window) <= room  =>  t >= window * (1 - room / previous)
+        needed = self.window_seconds * (1 - room / previous)
+        return max(1, math.ceil(needed - elapsed))
+
+
+@dataclass(frozen=True, slots=True)
+class RateLimitPolicy:
+    name: str
+    # Route path as declared on the router, e.g. /api/orgs/{org_id}/audit/export
+    path: str
+    # Cost units per org per window
+    limit: int
+    # Requests per caller per window, counted before authentication; None uses
+    # the limiter's own per-caller limit (RATE_LIMIT_REQUESTS)
+    caller_limit: int | None = None
+
+
+class RouteRateLimits:
     """
-    Rate limiter based on authenticated user ID.
-    Falls back to IP-based limiting for unauthenticated requests.
+    Cost-weighted budgets for individual routes, counted per org.
+
+    Routes with a policy charge the org's budget once the endpoint has parsed
+    its input and checked the caller belongs to the org, so the cost (bulk
+    item count, export row estimate) is known without reading the body again.
+    Before that the middleware still counts each request against the caller,
+    at one unit per request up to the policy's `caller_limit`, so callers that
+    fail authentication or name orgs they do not belong to are throttled too.
+    A request costing more than the whole budget is rejected with 413 rather
+    than charged a part of it; callers split it up instead (fewer bulk items,
+    a narrower export range). Orgs can be given their own limits per policy.
     """
 
     def __init__(
         self,
-        app,
-        requests_per_minute: int = 100,
-        window_seconds: int = 60,
+        limiter: SlidingWindowLimiter,
+        policies: list[RateLimitPolicy],
+        org_limits: dict[str, dict[str, int]] | None = None,
     ):
-        super().__init__(app)
-        self.requests_per_minute = requests_per_minute
-        self.window_seconds = window_seconds
-        self.request_counts: dict[str, list[tuple[float, int]]] = defaultdict(list)
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        # Skip rate limiting for health check and websocket
-        if request.url.path in ["/health", "/ws/notifications"]:
-            return await call_next(request)
-
-        # Try to get user ID from authorization header
-        identifier = self._get_identifier(request)
-        current_time = time.time()
-
-        # Clean old entries
-        self._cleanup_old_entries(identifier, current_time)
-
-        # Count requests in current window
-        request_count = sum(count for _, count in self.request_counts[identifier])
-
-        if request_count >= self.requests_per_minute:
-            return Response(
-                content='{"detail": "Rate limit exceeded. Try again later."}',
-                status_code=429,
-                media_type="application/json",
+        self.limiter = limiter
+        self.policies = {policy.name: policy for policy in policies}
+        self.org_limits = org_limits or {}
+        self.enabled = True
+        self._paths = [(compile_path(policy.path)[0], policy.name) for policy in policies]
+
+    def policy_for(self, path: str) -> RateLimitPolicy | None:
+        for pattern, name in self._paths:
+            if pattern.match(path):
+                return self.policies[name]
+        return None
+
+    def limit_for(self, name: str, org_id: UUID | str) -> int:
+        return self.org_limits.get(str(org_id), {}).get(name, self.policies[name].limit)
+
+    def charge(
+        self, request: Request, name: str, org_id: UUID | str, cost: int = 1
+    ) -> RateLimitResult | None:
+        """
+        Charge `cost` to the org's budget for policy `name`; raises 429 when
+        exhausted and 413 when `cost` exceeds the whole budget. Only call it
+        once the caller is known to belong to the org.
+        """
+        if not self.enabled:
+            return None
+        limit = self.limit_for(name, org_id)
+        if cost > limit:
+            raise PayloadTooLarge(f"Request costs {cost} units, more than the {name} limit of {limit}")
+        result = self.limiter.hit(f"{name}:{org_id}", max(1, cost), limit=limit)
+        # Picked up by the middleware for the X-RateLimit-* headers
+        request.state.rate_limit = result
+        if not result.allowed:
+            raise TooManyRequests(
+                f"Rate limit for {name} exceeded. Try again later.",
                 headers={
-                    "Retry-After": str(self.window_seconds),
-                    "X-RateLimit-Limit": str(self.requests_per_minute),
+                    "Retry-After": str(result.retry_after),
+                    "X-RateLimit-Limit": str(result.limit),
                     "X-RateLimit-Remaining": "0",
                 },
             )
-
-        # Add current request
-        self.request_counts[identifier].append((current_time, 1))
-
-        response = await call_next(request)
-
-        # Add rate limit headers
-        remaining = max(0, self.requests_per_minute - request_count - 1)
-        response.headers["X-RateLimit-Limit"] = str(self.requests_per_minute)
-        response.headers["X-RateLimit-Remaining"] = str(remaining)
-
-        return response
-
-    def _get_identifier(self, request: Request) -> str:
-        """Get user ID from JWT or fall back to IP."""
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            # Extract user ID from JWT (simple approach - just use the token hash as identifier)
-            token = auth_header[7:]
-            # Use first 20 chars of token as identifier (unique per user session)
-            return f"token:{token[:20]}"
-
-        # Fall back to IP
-        forwarded_for = request.headers.get("X-Forwarded-For")
-        if forwarded_for:
-            return f"ip:{forwarded_for.split(',')[0].strip()}"
-        return f"ip:{request.client.host if request.client else 'unknown'}"
-
-    def _cleanup_old_entries(self, identifier: str, current_time: float):
-        """Remove entries older than the window."""
-        cutoff = current_time - self.window_seconds
-        self.request_counts[identifier] = [
-            (ts, count)
-            for ts, count in self.request_counts[identifier]
-            if ts > cutoff
-        ]
+        return result
+
+
+# Global limiter shared by the app's rate limit middleware; shared stores flush from the lifespan
+rate_limiter = SlidingWindowLimiter(
+    settings.RATE_LIMIT_REQUESTS,
+    settings.RATE_LIMIT_WINDOW_SECONDS,
+    store=create_rate_limit_store(),
+)
+
+# Per-org budgets for expensive or hot routes, in cost units per window
+route_limits = RouteRateLimits(
+    rate_limiter,
+    [
+        RateLimitPolicy(name, policy["path"], policy["limit"], policy.get("caller_limit"))
+        for name, policy in json.loads(settings.RATE_LIMIT_POLICIES).items()
+    ],
+    json.loads(settings.RATE_LIMIT_ORG_LIMITS),
+)
@@ -1,30 +1,20 @@
+from typing import AsyncIterator
 from uuid import UUID
 from datetime import datetime
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.schemas.audit import AuditLogOut, AuditListOut
-from src.services.audit_service import AuditService
-from src.services.org_service import OrgService
+from src.schemas.audit import AuditLogOut, AuditListOut, AuditTimeseriesOut
+from src.services.audit_rollup_service import AuditRollupService
+from src.services.audit_service import EXPORT_MEDIA_TYPES, AuditService
 from src.db.database import get_db
-from src.db.models.user import User
-from src.db.models.organization import OrgMemberRole
-from src.api.dependencies import get_current_user
-from src.core.exceptions import Forbidden
+from src.api.dependencies import AuthContext, require_org_admin
+from src.api.rate_limit import route_limits
 
 router = APIRouter(tags=["audit"])
 
 
-async def _check_org_admin(service: OrgService, org_id: UUID, user_id: UUID):
-    membership = await service.get_membership(org_id, user_id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-    return membership
-
-
 @router.get("/orgs/{org_id}/audit", response_model=AuditListOut)
 async def query_audit_logs(
     org_id: UUID,
@@ -35,14 +25,17 @@ async def query_audit_logs(
     end_date: datetime | None = Query(None),
     limit: int = Query(50, ge=1, le=1000),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
+    count: str = Query("estimate", pattern="^(exact|estimate|none)$"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    """Query audit logs with filters."""
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
+    """
+    Query audit logs with filters, newest first. Follow `next_cursor` to page;
+    `count` chooses an exact total, a planner estimate or none.
+    """
     actor_uuid = UUID(actor_id) if actor_id else None
-    logs, total = await AuditService(db).query(
+    page = await AuditService(db).query(
         org_id=org_id,
         action=action,
         resource_type=resource_type,
@@ -51,6 +44,8 @@ async def query_audit_logs(
         end_date=end_date,
         limit=limit,
         offset=offset,
+        cursor=cursor,
+        count=count,
     )
 
     return AuditListOut(
@@ -68,43 +63,90 @@ async def query_audit_logs(
                 user_agent=log.user_agent,
                 created_at=log.created_at,
             )
-            for log in logs
+            for log in page.logs
         ],
-        total=total,
+        total=page.total,
+        total_estimated=page.total_estimated,
         limit=limit,
         offset=offset,
+        next_cursor=page.next_cursor,
     )
 
 
 @router.get("/orgs/{org_id}/audit/export")
 async def export_audit_logs(
+    request: Request,
     org_id: UUID,
-    format: str = Query("json", pattern="^(json|csv)$"),
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
     action: str | None = Query(None),
     resource_type: str | None = Query(None),
     actor_id: str | None = Query(None),
     start_date: datetime | None = Query(None),
     end_date: datetime | None = Query(None),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    """Export audit logs in JSON or CSV format."""
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
+    """Stream audit logs as a JSON array, NDJSON or CSV."""
     actor_uuid = UUID(actor_id) if actor_id else None
-    content, media_type = await AuditService(db).export(
+    service = AuditService(db)
+    # Exports are charged by the number of rows they are expected to read
+    rows = await service.estimate_count(
         org_id=org_id,
-        format=format,
         action=action,
         resource_type=resource_type,
         actor_id=actor_uuid,
         start_date=start_date,
         end_date=end_date,
     )
+    route_limits.charge(request, "audit_export", org_id, cost=rows)
+
+    async def content() -> AsyncIterator[str]:
+        # Older FastAPI releases close dependency sessions before the body is
+        # streamed, so the rows are read on a session owned by the response
+        async with AsyncSession(db.bind, expire_on_commit=False) as session:
+            chunks, _ = await AuditService(session).export(
+                org_id=org_id,
+                format=format,
+                action=action,
+                resource_type=resource_type,
+                actor_id=actor_uuid,
+                start_date=start_date,
+                end_date=end_date,
+            )
+            async for chunk in chunks:
+                yield chunk
 
     filename = f"audit_logs_{org_id}.{format}"
-    return Response(
-        content=content,
-        media_type=media_type,
+    return StreamingResponse(
+        content(),
+        media_type=EXPORT_MEDIA_TYPES[format],
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
+
+
+@router.get("/orgs/{org_id}/audit/timeseries", response_model=AuditTimeseriesOut)
+async def audit_timeseries(
+    org_id: UUID,
+    bucket: str = Query("day", pattern="^(day|week|month)$"),
+    group_by: str | None = Query(None, pattern="^(action|resource_type)$"),
+    action: str | None = Query(None),
+    resource_type: str | None = Query(None),
+    start_date: datetime | None = Query(None),
+    end_date: datetime | None = Query(None),
+    db: AsyncSession = Depends(get_db),
+    auth: AuthContext = Depends(require_org_admin),
+):
+    """
+    Audit event counts per day, ISO week or month, read from the hourly
+    rollups. `group_by` splits each bucket by action or resource type.
+    """
+    series = await AuditRollupService(db).timeseries(
+        org_id=org_id,
+        bucket=bucket,
+        start_date=start_date,
+        end_date=end_date,
+        action=action,
+        resource_type=resource_type,
+        group_by=group_by,
+    )
+    return AuditTimeseriesOut(**series)
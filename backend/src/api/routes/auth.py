@@ -15,6 +15,7 @@ from src.services.org_service import OrgService
 from src.db.database import get_db
 from src.db.models.user import User
 from src.api.dependencies import get_current_user
+from src.core.identity_cache import UserIdentity
 from src.config import settings
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -63,7 +64,7 @@ async def refresh(payload: RefreshIn, db: AsyncSession = Depends(get_db)):
 @router.post("/logout", status_code=204)
 async def logout(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_user),
 ):
     """Logout user by invalidating their refresh token."""
     await AuthService(db).logout(current_user.id)
@@ -72,7 +73,7 @@ async def logout(
 @router.get("/me", response_model=UserWithOrgsOut)
 async def get_me(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_user),
 ):
     orgs = await OrgService(db).list_orgs(current_user.id)
     return UserWithOrgsOut(
@@ -1,5 +1,5 @@
 from uuid import UUID
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.schemas.authorize import (
@@ -8,26 +8,51 @@ from src.schemas.authorize import (
     AuthorizeBulkItem,
     BulkAuthorizeResponse,
 )
+from src.core.exceptions import BadRequest, Forbidden
+from src.services.org_service import OrgService
 from src.services.policy_service import PolicyService
 from src.db.database import get_db
-from src.db.models.user import User
 from src.api.dependencies import get_current_user
+from src.core.identity_cache import UserIdentity, identity_cache
+from src.api.rate_limit import route_limits
 
 router = APIRouter(prefix="/authorize", tags=["authorize"])
 
 
+async def _member_org_id(db: AsyncSession, org_id: str, user: UserIdentity) -> UUID:
+    """
+    Parse `org_id` and check the caller belongs to it, before its budget is
+    charged. The answer is cached beside the user's status, so the hot path
+    usually skips the membership lookup.
+    """
+    try:
+        org_uuid = UUID(org_id)
+    except ValueError:
+        raise BadRequest("Invalid org_id") from None
+    member = identity_cache.get_member(org_uuid, user.id)
+    if member is None:
+        member = await OrgService(db).get_membership(org_uuid, user.id) is not None
+        identity_cache.put_member(org_uuid, user.id, member)
+    if not member:
+        raise Forbidden("Not a member of this organization")
+    return org_uuid
+
+
 @router.post("", response_model=AuthorizeResponse)
 async def authorize(
+    request: Request,
     payload: AuthorizeRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_user),
 ):
     """
     Evaluate a single authorization request.
     Returns whether the action is allowed for the principal on the resource.
     """
+    org_id = await _member_org_id(db, payload.org_id, current_user)
+    route_limits.charge(request, "authorize", org_id)
     result = await PolicyService(db).evaluate(
-        org_id=UUID(payload.org_id),
+        org_id=org_id,
         principal_id=UUID(payload.principal_id),
         action=payload.action,
         resource=payload.resource,
@@ -38,20 +63,26 @@ async def authorize(
         matched_policy_id=result["matched_policy_id"],
         effect=result["effect"],
         reason=result["reason"],
+        cached=result["cached"],
     )
 
 
 @router.post("/bulk", response_model=BulkAuthorizeResponse)
 async def authorize_bulk(
+    request: Request,
     org_id: str,
     requests: list[AuthorizeBulkItem],
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_user),
 ):
     """
     Evaluate multiple authorization requests in bulk.
     More efficient than making multiple single requests.
+    Each item counts against the org's bulk budget.
     """
+    org_uuid = await _member_org_id(db, org_id, current_user)
+    route_limits.charge(request, "authorize_bulk", org_uuid, cost=len(requests))
+
     request_dicts = [
         {
             "principal_id": r.principal_id,
@@ -62,7 +93,7 @@ async def authorize_bulk(
         for r in requests
     ]
 
-    results = await PolicyService(db).evaluate_bulk(UUID(org_id), request_dicts)
+    results = await PolicyService(db).evaluate_bulk(org_uuid, request_dicts)
 
     return BulkAuthorizeResponse(
         results=[
@@ -71,6 +102,7 @@ async def authorize_bulk(
                 matched_policy_id=r["matched_policy_id"],
                 effect=r["effect"],
                 reason=r["reason"],
+                cached=r["cached"],
             )
             for r in results
         ]
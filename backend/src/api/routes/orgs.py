@@ -15,10 +15,15 @@ from src.schemas.organization import (
 from src.services.org_service import OrgService
 from src.services.audit_service import AuditService
 from src.db.database import get_db
-from src.db.models.user import User
-from src.db.models.organization import OrgMemberRole
-from src.api.dependencies import get_current_user
-from src.core.exceptions import NotFound, Forbidden
+from src.core.identity_cache import UserIdentity
+from src.api.dependencies import (
+    AuthContext,
+    get_current_user,
+    require_org_admin,
+    require_org_member,
+    require_org_owner,
+)
+from src.core.exceptions import NotFound
 
 router = APIRouter(prefix="/orgs", tags=["orgs"])
 
@@ -28,7 +33,7 @@ async def create_org(
     payload: OrgCreateIn,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_user),
 ):
     org, membership = await OrgService(db).create_org(current_user.id, payload)
 
@@ -55,7 +60,7 @@ async def create_org(
 @router.get("", response_model=list[OrgOut])
 async def list_orgs(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_user),
 ):
     orgs = await OrgService(db).list_orgs(current_user.id)
     return [
@@ -68,21 +73,18 @@ async def list_orgs(
 async def get_org(
     org_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     service = OrgService(db)
     org = await service.get_org(org_id)
     if not org:
         raise NotFound("Organization not found")
 
-    membership = await service.get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     return OrgDetailOut(
         id=str(org.id),
         name=org.name,
         slug=org.slug,
+        audit_retention_days=org.audit_retention_days,
         created_at=org.created_at,
         updated_at=org.updated_at,
     )
@@ -94,26 +96,20 @@ async def update_org(
     payload: OrgUpdateIn,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     service = OrgService(db)
-    membership = await service.get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-
     org = await service.update_org(org_id, payload)
 
     # Audit log
     await AuditService(db).log(
         org_id=org_id,
-        actor_id=current_user.id,
-        actor_email=current_user.email,
+        actor_id=auth.user.id,
+        actor_email=auth.user.email,
         action="org.updated",
         resource_type="organization",
         resource_id=str(org_id),
-        details=payload.model_dump(exclude_none=True),
+        details=payload.model_dump(exclude_unset=True),
         request=request,
     )
 
@@ -121,6 +117,7 @@ async def update_org(
         id=str(org.id),
         name=org.name,
         slug=org.slug,
+        audit_retention_days=org.audit_retention_days,
         created_at=org.created_at,
         updated_at=org.updated_at,
     )
@@ -131,21 +128,16 @@ async def delete_org(
     org_id: UUID,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_owner),
 ):
     service = OrgService(db)
     org = await service.get_org(org_id)
-    membership = await service.get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role != OrgMemberRole.OWNER:
-        raise Forbidden("Owner access required")
 
     # Audit log before deletion
     await AuditService(db).log(
         org_id=org_id,
-        actor_id=current_user.id,
-        actor_email=current_user.email,
+        actor_id=auth.user.id,
+        actor_email=auth.user.email,
         action="org.deleted",
         resource_type="organization",
         resource_id=str(org_id),
@@ -160,13 +152,9 @@ async def delete_org(
 async def list_members(
     org_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     service = OrgService(db)
-    membership = await service.get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     members = await service.list_members(org_id)
     return [
         OrgMemberOut(
@@ -185,15 +173,9 @@ async def remove_member(
     org_id: UUID,
     user_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     service = OrgService(db)
-    membership = await service.get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-
     await service.remove_member(org_id, user_id)
 
 
@@ -203,17 +185,11 @@ async def create_invite(
     org_id: UUID,
     payload: InviteCreateIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     service = OrgService(db)
-    membership = await service.get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-
     invite = await service.create_invite(
-        org_id, payload.email, current_user.id, payload.role
+        org_id, payload.email, auth.user.id, payload.role
     )
     return InviteOut(
         id=str(invite.id),
@@ -231,15 +207,9 @@ async def create_invite(
 async def list_invites(
     org_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     service = OrgService(db)
-    membership = await service.get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-
     invites = await service.list_invites(org_id)
     return [
         InviteOut(
@@ -260,7 +230,7 @@ async def list_invites(
 async def accept_invite(
     payload: InviteAcceptIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: UserIdentity = Depends(get_current_user),
 ):
     service = OrgService(db)
     membership = await service.accept_invite(payload.token, current_user.id)
@@ -292,13 +262,7 @@ async def cancel_invite(
     org_id: UUID,
     invite_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     service = OrgService(db)
-    membership = await service.get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-
     await service.cancel_invite(invite_id)
@@ -4,33 +4,20 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.schemas.permission import PermissionCreateIn, PermissionUpdateIn, PermissionOut
 from src.services.rbac_service import RBACService
-from src.services.org_service import OrgService
 from src.db.database import get_db
-from src.db.models.user import User
-from src.db.models.organization import OrgMemberRole
-from src.api.dependencies import get_current_user
-from src.core.exceptions import NotFound, Forbidden
+from src.api.dependencies import AuthContext, require_org_admin, require_org_member
+from src.core.exceptions import NotFound
 
 router = APIRouter(tags=["permissions"])
 
 
-async def _check_org_admin(service: OrgService, org_id: UUID, user_id: UUID):
-    membership = await service.get_membership(org_id, user_id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-    return membership
-
-
 @router.post("/orgs/{org_id}/permissions", response_model=PermissionOut)
 async def create_permission(
     org_id: UUID,
     payload: PermissionCreateIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
     permission = await RBACService(db).create_permission(org_id, payload)
     return PermissionOut(
         id=str(permission.id),
@@ -45,12 +32,8 @@ async def create_permission(
 async def list_permissions(
     org_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     permissions = await RBACService(db).list_permissions(org_id)
     return [
         PermissionOut(
@@ -70,10 +53,8 @@ async def update_permission(
     permission_id: UUID,
     payload: PermissionUpdateIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = RBACService(db)
     permission = await service.get_permission(permission_id)
     if not permission or permission.org_id != org_id:
@@ -94,10 +75,8 @@ async def delete_permission(
     org_id: UUID,
     permission_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = RBACService(db)
     permission = await service.get_permission(permission_id)
     if not permission or permission.org_id != org_id:
@@ -12,33 +12,20 @@ from src.schemas.policy import (
     PolicyValidateResponse,
 )
 from src.services.policy_service import PolicyService
-from src.services.org_service import OrgService
 from src.db.database import get_db
-from src.db.models.user import User
-from src.db.models.organization import OrgMemberRole
-from src.api.dependencies import get_current_user
-from src.core.exceptions import NotFound, Forbidden
+from src.api.dependencies import AuthContext, require_org_admin, require_org_member
+from src.core.exceptions import NotFound
 
 router = APIRouter(tags=["policies"])
 
 
-async def _check_org_admin(service: OrgService, org_id: UUID, user_id: UUID):
-    membership = await service.get_membership(org_id, user_id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-    return membership
-
-
 @router.post("/orgs/{org_id}/policies", response_model=PolicyOut)
 async def create_policy(
     org_id: UUID,
     payload: PolicyCreateIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
     policy = await PolicyService(db).create_policy(org_id, payload)
     return PolicyOut(
         id=str(policy.id),
@@ -62,12 +49,8 @@ async def list_policies(
     org_id: UUID,
     active_only: bool = Query(False),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     policies = await PolicyService(db).list_policies(org_id, active_only)
     return [
         PolicyOut(
@@ -94,12 +77,8 @@ async def get_policy(
     org_id: UUID,
     policy_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     policy = await PolicyService(db).get_policy(policy_id)
     if not policy or policy.org_id != org_id:
         raise NotFound("Policy not found")
@@ -127,10 +106,8 @@ async def update_policy(
     policy_id: UUID,
     payload: PolicyUpdateIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = PolicyService(db)
     policy = await service.get_policy(policy_id)
     if not policy or policy.org_id != org_id:
@@ -159,10 +136,8 @@ async def delete_policy(
     org_id: UUID,
     policy_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = PolicyService(db)
     policy = await service.get_policy(policy_id)
     if not policy or policy.org_id != org_id:
@@ -176,13 +151,9 @@ async def test_policy(
     org_id: UUID,
     payload: PolicyTestRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     """Test policy evaluation without actually enforcing it."""
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     result = await PolicyService(db).evaluate(
         org_id=org_id,
         principal_id=UUID(payload.principal_id),
@@ -203,13 +174,9 @@ async def validate_policy(
     org_id: UUID,
     payload: PolicyValidateRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     """Validate a policy definition without saving it."""
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     result = PolicyService(db).validate_policy(payload.model_dump())
     return PolicyValidateResponse(
         valid=result["valid"],
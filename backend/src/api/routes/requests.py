@@ -10,12 +10,9 @@ from src.schemas.access_request import (
     PendingRequestsOut,
 )
 from src.services.workflow_service import WorkflowService
-from src.services.org_service import OrgService
 from src.db.database import get_db
-from src.db.models.user import User
-from src.db.models.organization import OrgMemberRole
 from src.db.models.access_request import RequestStatus
-from src.api.dependencies import get_current_user
+from src.api.dependencies import AuthContext, require_org_admin, require_org_member
 from src.core.exceptions import NotFound, Forbidden
 
 router = APIRouter(tags=["requests"])
@@ -52,29 +49,16 @@ def _request_to_out(request) -> AccessRequestOut:
     )
 
 
-async def _check_org_admin(service: OrgService, org_id: UUID, user_id: UUID):
-    membership = await service.get_membership(org_id, user_id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-    return membership
-
-
 @router.post("/orgs/{org_id}/requests", response_model=AccessRequestOut)
 async def submit_request(
     org_id: UUID,
     payload: AccessRequestCreateIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     """Submit a new access request."""
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     request = await WorkflowService(db).submit_request(
-        org_id, current_user.id, payload
+        org_id, auth.user.id, payload
     )
     return _request_to_out(request)
 
@@ -83,14 +67,10 @@ async def submit_request(
 async def list_my_requests(
     org_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     """List current user's requests."""
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
-    requests = await WorkflowService(db).list_my_requests(org_id, current_user.id)
+    requests = await WorkflowService(db).list_my_requests(org_id, auth.user.id)
     return [_request_to_out(r) for r in requests]
 
 
@@ -98,11 +78,9 @@ async def list_my_requests(
 async def list_pending_requests(
     org_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     """List pending requests (admin only)."""
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     requests = await WorkflowService(db).list_pending_requests(org_id)
     return PendingRequestsOut(
         requests=[_request_to_out(r) for r in requests],
@@ -115,11 +93,9 @@ async def list_all_requests(
     org_id: UUID,
     status: str | None = Query(None),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     """List all requests (admin only)."""
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     status_enum = RequestStatus(status) if status else None
     requests = await WorkflowService(db).list_all_requests(org_id, status_enum)
     return [_request_to_out(r) for r in requests]
@@ -130,20 +106,15 @@ async def get_request(
     org_id: UUID,
     request_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     """Get a specific request."""
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     request = await WorkflowService(db).get_request(request_id)
     if not request or request.org_id != org_id:
         raise NotFound("Request not found")
 
     # Only requester or admin can view
-    is_admin = membership.role in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]
-    if request.requester_id != current_user.id and not is_admin:
+    if request.requester_id != auth.user.id and not auth.is_admin:
         raise Forbidden("Not authorized to view this request")
 
     return _request_to_out(request)
@@ -155,18 +126,16 @@ async def approve_request(
     request_id: UUID,
     payload: ApprovalActionIn | None = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     """Approve a pending request (admin only)."""
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = WorkflowService(db)
     request = await service.get_request(request_id)
     if not request or request.org_id != org_id:
         raise NotFound("Request not found")
 
     comment = payload.comment if payload else None
-    request = await service.approve_request(request_id, current_user.id, comment)
+    request = await service.approve_request(request_id, auth.user.id, comment)
     return _request_to_out(request)
 
 
@@ -176,18 +145,16 @@ async def deny_request(
     request_id: UUID,
     payload: ApprovalActionIn | None = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     """Deny a pending request (admin only)."""
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = WorkflowService(db)
     request = await service.get_request(request_id)
     if not request or request.org_id != org_id:
         raise NotFound("Request not found")
 
     reason = payload.comment if payload else None
-    request = await service.deny_request(request_id, current_user.id, reason)
+    request = await service.deny_request(request_id, auth.user.id, reason)
     return _request_to_out(request)
 
 
@@ -196,19 +163,15 @@ async def cancel_request(
     org_id: UUID,
     request_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     """Cancel a pending request (requester only)."""
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     service = WorkflowService(db)
     request = await service.get_request(request_id)
     if not request or request.org_id != org_id:
         raise NotFound("Request not found")
 
-    request = await service.cancel_request(request_id, current_user.id)
+    request = await service.cancel_request(request_id, auth.user.id)
     return _request_to_out(request)
 
 
@@ -218,11 +181,9 @@ async def request_more_info(
     request_id: UUID,
     payload: ApprovalActionIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
     """Request more information from the requester (admin only)."""
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = WorkflowService(db)
     request = await service.get_request(request_id)
     if not request or request.org_id != org_id:
@@ -231,7 +192,7 @@ async def request_more_info(
     if not payload.comment:
         raise Forbidden("A question is required when requesting more info")
 
-    request = await service.request_more_info(request_id, current_user.id, payload.comment)
+    request = await service.request_more_info(request_id, auth.user.id, payload.comment)
     return _request_to_out(request)
 
 
@@ -241,13 +202,9 @@ async def provide_info(
     request_id: UUID,
     payload: ApprovalActionIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
     """Provide additional information requested by approver (requester only)."""
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     service = WorkflowService(db)
     request = await service.get_request(request_id)
     if not request or request.org_id != org_id:
@@ -256,5 +213,5 @@ async def provide_info(
     if not payload.comment:
         raise Forbidden("A response is required")
 
-    request = await service.provide_info(request_id, current_user.id, payload.comment)
+    request = await service.provide_info(request_id, auth.user.id, payload.comment)
     return _request_to_out(request)
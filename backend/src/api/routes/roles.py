@@ -10,42 +10,29 @@ from src.schemas.role import (
     AddPermissionsIn,
 )
 from src.services.rbac_service import RBACService
-from src.services.org_service import OrgService
 from src.services.audit_service import AuditService
 from src.db.database import get_db
-from src.db.models.user import User
-from src.db.models.organization import OrgMemberRole
-from src.api.dependencies import get_current_user
-from src.core.exceptions import NotFound, Forbidden
+from src.api.dependencies import AuthContext, require_org_admin, require_org_member
+from src.core.exceptions import NotFound
 
 router = APIRouter(tags=["roles"])
 
 
-async def _check_org_admin(service: OrgService, org_id: UUID, user_id: UUID):
-    membership = await service.get_membership(org_id, user_id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-    return membership
-
-
 @router.post("/orgs/{org_id}/roles", response_model=RoleOut)
 async def create_role(
     org_id: UUID,
     payload: RoleCreateIn,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
     role = await RBACService(db).create_role(org_id, payload)
 
     # Audit log
     await AuditService(db).log(
         org_id=org_id,
-        actor_id=current_user.id,
-        actor_email=current_user.email,
+        actor_id=auth.user.id,
+        actor_email=auth.user.email,
         action="role.created",
         resource_type="role",
         resource_id=str(role.id),
@@ -68,12 +55,8 @@ async def create_role(
 async def list_roles(
     org_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     roles = await RBACService(db).list_roles(org_id)
     return [
         RoleWithPermissions(
@@ -102,12 +85,8 @@ async def get_role(
     org_id: UUID,
     role_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     role = await RBACService(db).get_role(role_id)
     if not role or role.org_id != org_id:
         raise NotFound("Role not found")
@@ -138,10 +117,8 @@ async def update_role(
     payload: RoleUpdateIn,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = RBACService(db)
     role = await service.get_role(role_id)
     if not role or role.org_id != org_id:
@@ -152,8 +129,8 @@ async def update_role(
     # Audit log
     await AuditService(db).log(
         org_id=org_id,
-        actor_id=current_user.id,
-        actor_email=current_user.email,
+        actor_id=auth.user.id,
+        actor_email=auth.user.email,
         action="role.updated",
         resource_type="role",
         resource_id=str(role_id),
@@ -178,10 +155,8 @@ async def delete_role(
     role_id: UUID,
     request: Request,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = RBACService(db)
     role = await service.get_role(role_id)
     if not role or role.org_id != org_id:
@@ -190,8 +165,8 @@ async def delete_role(
     # Audit log before deletion
     await AuditService(db).log(
         org_id=org_id,
-        actor_id=current_user.id,
-        actor_email=current_user.email,
+        actor_id=auth.user.id,
+        actor_email=auth.user.email,
         action="role.deleted",
         resource_type="role",
         resource_id=str(role_id),
@@ -208,10 +183,8 @@ async def add_permissions_to_role(
     role_id: UUID,
     payload: AddPermissionsIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = RBACService(db)
     role = await service.get_role(role_id)
     if not role or role.org_id != org_id:
@@ -227,10 +200,8 @@ async def remove_permission_from_role(
     role_id: UUID,
     permission_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     service = RBACService(db)
     role = await service.get_role(role_id)
     if not role or role.org_id != org_id:
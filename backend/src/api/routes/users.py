@@ -5,40 +5,25 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.schemas.role import RoleAssignIn, UserRoleOut
 from src.schemas.permission import UserPermissionsOut
 from src.services.rbac_service import RBACService
-from src.services.org_service import OrgService
 from src.db.database import get_db
-from src.db.models.user import User
-from src.db.models.organization import OrgMemberRole
-from src.api.dependencies import get_current_user
-from src.core.exceptions import Forbidden
+from src.api.dependencies import AuthContext, require_org_admin, require_org_member
 
 router = APIRouter(tags=["users"])
 
 
-async def _check_org_admin(service: OrgService, org_id: UUID, user_id: UUID):
-    membership = await service.get_membership(org_id, user_id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-    if membership.role not in [OrgMemberRole.OWNER, OrgMemberRole.ADMIN]:
-        raise Forbidden("Admin access required")
-    return membership
-
-
 @router.post("/orgs/{org_id}/users/{user_id}/roles", response_model=UserRoleOut)
 async def assign_role(
     org_id: UUID,
     user_id: UUID,
     payload: RoleAssignIn,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
-
     user_role = await RBACService(db).assign_role_to_user(
         org_id=org_id,
         user_id=user_id,
         role_id=UUID(payload.role_id),
-        assigned_by=current_user.id,
+        assigned_by=auth.user.id,
     )
     return UserRoleOut(
         id=str(user_role.id),
@@ -56,9 +41,8 @@ async def revoke_role(
     user_id: UUID,
     role_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_admin),
 ):
-    await _check_org_admin(OrgService(db), org_id, current_user.id)
     await RBACService(db).revoke_role_from_user(org_id, user_id, role_id)
 
 
@@ -67,12 +51,8 @@ async def get_user_permissions(
     org_id: UUID,
     user_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     permissions = await RBACService(db).get_user_permissions(org_id, user_id)
     return UserPermissionsOut(
         user_id=str(user_id),
@@ -86,12 +66,8 @@ async def get_user_roles(
     org_id: UUID,
     user_id: UUID,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    auth: AuthContext = Depends(require_org_member),
 ):
-    membership = await OrgService(db).get_membership(org_id, current_user.id)
-    if not membership:
-        raise Forbidden("Not a member of this organization")
-
     user_roles = await RBACService(db).get_user_roles(org_id, user_id)
     return [
         UserRoleOut(
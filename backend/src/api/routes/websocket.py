@@ -2,7 +2,7 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Query
 from jose import jwt, JWTError
 
 from src.config import settings
-from src.services.notification_service import manager
+from src.services.notification_service import DEFLATE_SUBPROTOCOL, Frame, manager
 
 router = APIRouter(tags=["websocket"])
 
@@ -24,6 +24,10 @@ async def websocket_endpoint(
     - pending_count: Updated pending request count (admins only)
     - role.assigned: Role assigned to user
     - role.revoked: Role revoked from user
+
+    Events are JSON text frames. Clients that offer the `authz.deflate`
+    subprotocol receive them as binary frames holding raw-deflate compressed
+    JSON instead; "pong" replies stay plain text either way.
     """
     # Validate token
     try:
@@ -41,27 +45,28 @@ async def websocket_endpoint(
         await websocket.close(code=4001, reason="Invalid token")
         return
 
-    # Connect
-    await manager.connect(websocket, org_id, user_id)
+    # Connect; everything sent from here on goes through the connection's queue
+    deflate = DEFLATE_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+    connection = await manager.connect(websocket, org_id, user_id, deflate=deflate)
 
     try:
         # Send connection confirmation
-        await websocket.send_json({
+        connection.send(Frame({
             "type": "connected",
             "data": {"user_id": user_id, "org_id": org_id},
-        })
+        }))
 
         # Keep connection alive and handle incoming messages
         while True:
             data = await websocket.receive_text()
             # Handle ping/pong for keepalive
             if data == "ping":
-                await websocket.send_text("pong")
+                connection.send("pong")
 
     except WebSocketDisconnect:
-        manager.disconnect(websocket, org_id, user_id)
+        connection.close()
     except Exception:
-        manager.disconnect(websocket, org_id, user_id)
+        connection.close()
 
 
 @router.get("/ws/health")
@@ -69,5 +74,6 @@ async def websocket_health():
     """Get WebSocket connection statistics."""
     return {
         "total_connections": manager.get_connection_count(),
+        "slow_consumers": manager.slow_consumers,
         "status": "healthy",
     }
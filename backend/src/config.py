@@ -23,6 +23,82 @@ class Settings(BaseSettings):
     GOOGLE_CLIENT_SECRET: str = ""
     OAUTH_REDIRECT_URL: str = "http://localhost:3000/auth/callback"
 
+    # Cross-worker cache invalidation: "auto", "postgres" or "local"
+    PUBSUB_BACKEND: str = "auto"
+
+    # Materialized (org, user) permission sets kept in memory per worker
+    PERMISSION_CACHE_MAX_ENTRIES: int = 100_000
+
+    # Authorization decisions cached per worker. Off (0) by default: a decision can
+    # outlive a write on another worker by up to the TTL, until that worker's authz
+    # version message arrives. Set a few seconds to trade that for fewer evaluations.
+    DECISION_CACHE_TTL_SECONDS: float = 0.0
+    DECISION_CACHE_MAX_ENTRIES: int = 50_000
+
+    # Org dashboard stats cached per worker, dropped on writes that change them
+    DASHBOARD_CACHE_TTL_SECONDS: float = 10.0
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 10_000
+    # org_stats counters are recounted and repaired this often (0 disables the job)
+    ORG_STATS_RECONCILE_INTERVAL_SECONDS: float = 3600.0
+
+    # Background audit writer: rows are flushed when a batch fills or the interval passes
+    AUDIT_QUEUE_MAX_SIZE: int = 10_000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 0.2
+    AUDIT_USE_COPY: bool = True
+    # Audit logs older than this many days are removed (0 keeps them forever); orgs can
+    # override it. On PostgreSQL whole monthly partitions past every org's retention are
+    # detached and then dropped ("drop") or left as standalone tables ("detach").
+    # "archive" first moves expired rows to gzipped NDJSON segments in AUDIT_ARCHIVE_DIR,
+    # which audit queries and exports keep reading. The directory must be shared by every
+    # worker (and host) that serves audit reads.
+    AUDIT_RETENTION_DAYS: int = 0
+    AUDIT_RETENTION_ACTION: str = "drop"
+    AUDIT_ARCHIVE_DIR: str = "audit-archive"
+    AUDIT_PARTITIONS_AHEAD: int = 3
+    AUDIT_RETENTION_DELETE_BATCH: int = 10_000
+    # Partitions are created and retention enforced this often (0 disables the job)
+    AUDIT_MAINTENANCE_INTERVAL_SECONDS: float = 3600.0
+
+    # Verified token claims (kept until token exp) and user status seen by get_current_user
+    IDENTITY_CACHE_MAX_ENTRIES: int = 50_000
+    USER_STATUS_TTL_SECONDS: float = 30.0
+
+    # Password hashing runs on a dedicated thread pool; hashes are upgraded on login
+    # when BCRYPT_ROUNDS changes
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Sliding-window rate limit per token (or client IP); idle keys are swept every window
+    RATE_LIMIT_REQUESTS: int = 100
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    # Where counts live: "memory" (per worker), "shared_memory" (workers on one host)
+    # or "redis" (any Redis-protocol server). Shared stores push increments in batches.
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_FLUSH_INTERVAL_SECONDS: float = 0.05
+    RATE_LIMIT_SHM_PATH: str = "/dev/shm/authz-rate-limit"
+    RATE_LIMIT_SHM_SLOTS: int = 65_536
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    # Per-org, cost-weighted budgets for single routes (cost units per window). Each
+    # caller is also held to "caller_limit" requests per window on the route, or to
+    # RATE_LIMIT_REQUESTS when unset. Per-org overrides look like
+    # {"<org id>": {"authorize_bulk": 100000}}
+    RATE_LIMIT_POLICIES: str = (
+        '{"authorize": {"path": "/api/authorize", "limit": 6000, "caller_limit": 1000},'
+        ' "authorize_bulk": {"path": "/api/authorize/bulk", "limit": 30000},'
+        ' "audit_export": {"path": "/api/orgs/{org_id}/audit/export", "limit": 500000}}'
+    )
+    RATE_LIMIT_ORG_LIMITS: str = "{}"
+
+    # Messages buffered per WebSocket; a client that falls this far behind is disconnected
+    WS_SEND_QUEUE_SIZE: int = 256
+    # Notifications reach other workers over the pubsub bus: events published within
+    # the batch interval share one message, and recently seen event ids are skipped
+    NOTIFICATION_BATCH_SECONDS: float = 0.01
+    NOTIFICATION_BATCH_SIZE: int = 100
+    NOTIFICATION_DEDUP_SIZE: int = 10_000
+
     CORS_ORIGINS: str = '["https://authz-liard.vercel.app","http://localhost:3000","http://localhost:5173"]'
 
     @property
@@ -1,4 +1,7 @@
 class AppError(Exception):
+    # Extra response headers, e.g. Retry-After
+    headers: dict[str, str] | None = None
+
     def __init__(self, message: str, status_code: int):
         self.message = message
         self.status_code = status_code
@@ -22,3 +25,16 @@ class NotFound(AppError):
 class Conflict(AppError):
     def __init__(self, message="Conflict"):
         super().__init__(message, 409)
+
+class PayloadTooLarge(AppError):
+    def __init__(self, message="Request too large"):
+        super().__init__(message, 413)
+
+class ServiceUnavailable(AppError):
+    def __init__(self, message="Service unavailable"):
+        super().__init__(message, 503)
+
+class TooManyRequests(AppError):
+    def __init__(self, message="Rate limit exceeded. Try again later.", headers: dict[str, str] | None = None):
+        super().__init__(message, 429)
+        self.headers = headers
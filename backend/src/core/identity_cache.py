@@ -0,0 +1,160 @@
+"""
+Caches used by get_current_user.
+
+Verified access-token claims are kept per token digest until the token's own
+`exp`, so repeat requests skip the HMAC check and JSON parse. Beside them, a
+short-TTL cache of user status (the columns routes read from current_user)
+saves the `users` lookup, and whether the user belongs to an org saves the
+membership lookup on /authorize. Callers get a frozen UserIdentity rather
+than an ORM User, so nothing can mistake a cache hit for a loaded row and
+write to it. A user's entries are dropped on logout, deactivation and
+membership changes, locally after commit and on other workers via the pubsub
+bus.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.core.pubsub import pubsub
+from src.db.models.user import User
+
+USER_CHANNEL = "user_invalidation"
+
+
+@dataclass(frozen=True, slots=True)
+class UserIdentity:
+    """Read-only copy of the user columns routes use; password and refresh token hashes are left out."""
+
+    id: UUID
+    email: str
+    name: str
+    avatar_url: str | None
+    oauth_provider: str | None
+    oauth_id: str | None
+    is_active: bool
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserIdentity":
+        return cls(**{field.name: getattr(user, field.name) for field in fields(cls)})
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class IdentityCache:
+    def __init__(self, max_entries: int, status_ttl: float):
+        self.max_entries = max_entries
+        self.status_ttl = status_ttl
+        # token digest -> (user id, exp as a unix timestamp)
+        self._claims: OrderedDict[bytes, tuple[UUID, float]] = OrderedDict()
+        # user id -> (expiry on the monotonic clock, identity)
+        self._users: OrderedDict[UUID, tuple[float, UserIdentity]] = OrderedDict()
+        # user id -> org id -> (expiry on the monotonic clock, is a member)
+        self._members: OrderedDict[UUID, dict[UUID, tuple[float, bool]]] = OrderedDict()
+        self.claim_hits = 0
+        self.claim_misses = 0
+        self.user_hits = 0
+        self.user_misses = 0
+        self.member_hits = 0
+        self.member_misses = 0
+
+    def get_claims(self, token: str) -> UUID | None:
+        """User id of a previously verified, unexpired access token."""
+        key = token_digest(token)
+        entry = self._claims.get(key)
+        if entry is None or entry[1] <= time.time():
+            if entry is not None:
+                del self._claims[key]
+            self.claim_misses += 1
+            return None
+        self._claims.move_to_end(key)
+        self.claim_hits += 1
+        return entry[0]
+
+    def put_claims(self, token: str, user_id: UUID, exp: float):
+        self._claims[token_digest(token)] = (user_id, exp)
+        while len(self._claims) > self.max_entries:
+            self._claims.popitem(last=False)
+
+    def get_user(self, user_id: UUID) -> UserIdentity | None:
+        """The user's cached identity, if still fresh."""
+        entry = self._users.get(user_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._users[user_id]
+            self.user_misses += 1
+            return None
+        self._users.move_to_end(user_id)
+        self.user_hits += 1
+        return entry[1]
+
+    def put_user(self, user: User) -> UserIdentity:
+        """Cache a freshly loaded user; returns the identity handed to callers."""
+        identity = UserIdentity.from_user(user)
+        self._users[user.id] = (time.monotonic() + self.status_ttl, identity)
+        self._users.move_to_end(user.id)
+        while len(self._users) > self.max_entries:
+            self._users.popitem(last=False)
+        return identity
+
+    def get_member(self, org_id: UUID, user_id: UUID) -> bool | None:
+        """Whether the user belongs to the org, if known and still fresh."""
+        entry = self._members.get(user_id, {}).get(org_id)
+        if entry is None or entry[0] <= time.monotonic():
+            self.member_misses += 1
+            return None
+        self._members.move_to_end(user_id)
+        self.member_hits += 1
+        return entry[1]
+
+    def put_member(self, org_id: UUID, user_id: UUID, member: bool):
+        orgs = self._members.setdefault(user_id, {})
+        orgs[org_id] = (time.monotonic() + self.status_ttl, member)
+        self._members.move_to_end(user_id)
+        while len(self._members) > self.max_entries:
+            self._members.popitem(last=False)
+
+    def invalidate_user(self, user_id: UUID | None):
+        """Drop a user's cached status and memberships; None drops every user."""
+        if user_id is None:
+            self._users.clear()
+            self._members.clear()
+        else:
+            self._users.pop(user_id, None)
+            self._members.pop(user_id, None)
+
+    def handle_message(self, payload: str):
+        self.invalidate_user(UUID(payload))
+
+    def stats(self) -> dict:
+        return {
+            "tokens": len(self._claims),
+            "users": len(self._users),
+            "max_entries": self.max_entries,
+            "claim_hits": self.claim_hits,
+            "claim_misses": self.claim_misses,
+            "user_hits": self.user_hits,
+            "user_misses": self.user_misses,
+            "member_hits": self.member_hits,
+            "member_misses": self.member_misses,
+        }
+
+
+async def publish_user_change(db: AsyncSession, user_id: UUID):
+    """Invalidate the user's cached status and memberships on every worker once `db` commits."""
+    await pubsub.publish(USER_CHANNEL, str(user_id), db)
+
+
+# Global identity cache instance
+identity_cache = IdentityCache(settings.IDENTITY_CACHE_MAX_ENTRIES, settings.USER_STATUS_TTL_SECONDS)
+pubsub.subscribe(USER_CHANNEL, identity_cache.handle_message)
+pubsub.on_reconnect(lambda: identity_cache.invalidate_user(None))
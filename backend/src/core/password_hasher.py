@@ -0,0 +1,96 @@
+"""
+bcrypt on a dedicated, size-limited thread pool.
+
+bcrypt releases the GIL, so hashing on worker threads keeps the event loop
+free for other requests while a login or registration is being processed.
+At most `workers` hashes run at once; up to `max_queue` more wait their turn
+and anything beyond that is rejected with 503 rather than piling up.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from src.config import settings
+from src.core.exceptions import ServiceUnavailable
+from src.core.security import hash_password, password_hash_rounds, verify_password
+
+T = TypeVar("T")
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, rounds: int, max_queue: int):
+        self.workers = workers
+        self.rounds = rounds
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots: asyncio.Semaphore | None = None
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.hash_seconds_total = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        if not password_hash:
+            # Accounts created through OAuth have no password
+            return False
+        return await self._run(verify_password, password, password_hash)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        rounds = password_hash_rounds(password_hash)
+        return rounds is not None and rounds != self.rounds
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "running": self.running,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.wait_seconds_total / self.completed * 1000 if self.completed else 0.0,
+            "max_wait_ms": self.wait_seconds_max * 1000,
+            "avg_hash_ms": self.hash_seconds_total / self.completed * 1000 if self.completed else 0.0,
+        }
+
+    async def _run(self, fn: Callable[..., T], *args) -> T:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.workers)
+        if self.waiting >= self.max_queue and self._slots.locked():
+            self.rejected += 1
+            raise ServiceUnavailable("Too many concurrent sign-ins, try again shortly")
+
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        started_at = time.perf_counter()
+        wait = started_at - queued_at
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.hash_seconds_total += time.perf_counter() - started_at
+            self._slots.release()
+
+
+# Global password hasher instance
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    rounds=settings.BCRYPT_ROUNDS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,171 @@
+"""
+Cross-worker publish/subscribe used to keep in-process caches coherent.
+
+Messages published with a session are transactional: they are only delivered
+once that session commits. Local subscribers are called right after the
+commit, and on PostgreSQL the message is also sent with NOTIFY inside the
+same transaction so every other worker's LISTEN connection receives it.
+"""
+import asyncio
+import logging
+from typing import Callable
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[str], None]
+
+_PENDING_KEY = "pubsub_pending"
+
+
+class PubSub:
+    """In-process publish/subscribe. Also serves as the stand-in bus for tests."""
+
+    def __init__(self):
+        self._handlers: dict[str, list[Handler]] = {}
+        self._reconnect_hooks: list[Callable[[], None]] = []
+
+    def subscribe(self, channel: str, handler: Handler):
+        """Register a handler for messages on a channel."""
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def on_reconnect(self, hook: Callable[[], None]):
+        """Register a hook called when messages may have been missed."""
+        self._reconnect_hooks.append(hook)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(
+        self, channel: str, payload: str, db: AsyncSession | None = None
+    ):
+        """
+        Publish a message. With a session, delivery is deferred until the
+        session's transaction commits and dropped if it rolls back.
+        """
+        if db is None:
+            self.dispatch(channel, payload)
+            return
+        db.sync_session.info.setdefault(_PENDING_KEY, []).append(
+            (self, channel, payload)
+        )
+
+    def dispatch(self, channel: str, payload: str):
+        """Deliver a message to this process's subscribers."""
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception:
+                logger.exception("pubsub handler failed on channel %s", channel)
+
+    def _fire_reconnect(self):
+        for hook in self._reconnect_hooks:
+            hook()
+
+
+class PostgresPubSub(PubSub):
+    """Publish/subscribe over PostgreSQL LISTEN/NOTIFY."""
+
+    def __init__(self, engine: AsyncEngine, reconnect_delay: float = 1.0):
+        super().__init__()
+        self.engine = engine
+        self.reconnect_delay = reconnect_delay
+        self._task: asyncio.Task | None = None
+        self._connected_once = False
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def publish(
+        self, channel: str, payload: str, db: AsyncSession | None = None
+    ):
+        if db is None:
+            async with self.engine.connect() as conn:
+                await conn.execute(select(func.pg_notify(channel, payload)))
+                await conn.commit()
+            self.dispatch(channel, payload)
+            return
+        # NOTIFY is transactional: other workers only see it after COMMIT
+        await db.execute(select(func.pg_notify(channel, payload)))
+        await super().publish(channel, payload, db)
+
+    def _on_notify(self, connection, pid, channel: str, payload: str):
+        self.dispatch(channel, payload)
+
+    async def _listen_forever(self):
+        while True:
+            try:
+                async with self.engine.connect() as conn:
+                    raw = await conn.get_raw_connection()
+                    driver = raw.driver_connection
+                    lost = asyncio.Event()
+
+                    def on_lost(_conn, lost=lost):
+                        lost.set()
+
+                    driver.add_termination_listener(on_lost)
+                    try:
+                        for channel in self._handlers:
+                            await driver.add_listener(channel, self._on_notify)
+
+                        # Anything published while we were disconnected is lost
+                        if self._connected_once:
+                            self._fire_reconnect()
+                        self._connected_once = True
+
+                        await lost.wait()
+                    finally:
+                        # Never hand a connection that is still LISTENing back
+                        # to the pool, whether it was lost or we were stopped
+                        driver.remove_termination_listener(on_lost)
+                        await conn.invalidate()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("pubsub listener connection failed")
+            await asyncio.sleep(self.reconnect_delay)
+
+
+@event.listens_for(Session, "after_commit")
+def _deliver_pending(session: Session):
+    for bus, channel, payload in session.info.pop(_PENDING_KEY, []):
+        bus.dispatch(channel, payload)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def create_pubsub() -> PubSub:
+    backend = settings.PUBSUB_BACKEND
+    if backend == "auto":
+        is_postgres = settings.ASYNC_DATABASE_URL.startswith("postgresql")
+        backend = "postgres" if is_postgres else "local"
+    if backend == "postgres":
+        from src.db.database import engine
+
+        return PostgresPubSub(engine)
+    return PubSub()
+
+
+# Global pubsub instance
+pubsub = create_pubsub()
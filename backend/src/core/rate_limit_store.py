@@ -0,0 +1,464 @@
+"""
+Counter storage behind the sliding-window rate limiter.
+
+The limiter reads and adds to per-(key, window) request counts on every
+request, so those calls must stay synchronous and cheap. Stores that share
+counts between workers buffer local increments and push them in one batch
+every RATE_LIMIT_FLUSH_INTERVAL_SECONDS from a background task; reads combine
+the last known shared total with what this worker has not pushed yet. A key
+can therefore overshoot its limit by whatever other workers admitted during
+one flush interval.
+
+- RateLimitStore: counts in this process only (one worker, and tests).
+- SharedMemoryRateLimitStore: an mmap'd counter table shared by the workers
+  of one host. Reads go straight to the table; writes take a file lock once
+  per batch.
+- RedisRateLimitStore: INCRBY/EXPIRE pipelines against any Redis-protocol
+  server, for workers on several hosts. LocalRespClient stands in for the
+  server in tests.
+"""
+import abc
+import asyncio
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (limiter key, window index)
+Slot = tuple[str, int]
+
+
+class _Window:
+    __slots__ = ("index", "current", "previous")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.current = 0
+        self.previous = 0
+
+
+class RateLimitStore:
+    """In-process counters; each key keeps its current and previous window."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._windows: dict[str, _Window] = {}
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def count(self, key: str, window: int) -> int:
+        entry = self._windows.get(key)
+        if entry is None:
+            return 0
+        if entry.index == window:
+            return entry.current
+        if entry.index == window + 1:
+            return entry.previous
+        return 0
+
+    def add(self, key: str, window: int, amount: int):
+        entry = self._windows.get(key)
+        if entry is None:
+            entry = self._windows[key] = _Window(window)
+        elif entry.index != window:
+            # Roll forward; a gap of more than one window leaves nothing to carry
+            entry.previous = entry.current if window == entry.index + 1 else 0
+            entry.current = 0
+            entry.index = window
+        entry.current += amount
+
+    def sweep(self, oldest: int) -> int:
+        """Forget keys with no count in `oldest` or any later window."""
+        idle = [key for key, entry in self._windows.items() if entry.index < oldest]
+        for key in idle:
+            del self._windows[key]
+        return len(idle)
+
+    def reset(self):
+        self._windows.clear()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "keys": len(self._windows)}
+
+
+class BufferedRateLimitStore(RateLimitStore, abc.ABC):
+    """Base for shared stores: local increments are pushed in batches."""
+
+    def __init__(self, flush_interval: float):
+        super().__init__()
+        self.flush_interval = flush_interval
+        # Not yet pushed, being pushed, and last known shared totals
+        self._pending: dict[Slot, int] = {}
+        self._inflight: dict[Slot, int] = {}
+        self._shared: dict[Slot, int] = {}
+        # Slots read since the last flush, refreshed even without local increments
+        self._watched: set[Slot] = set()
+        self._task: asyncio.Task | None = None
+        self.flushes = 0
+        self.errors = 0
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def count(self, key: str, window: int) -> int:
+        slot = (key, window)
+        return (
+            self._shared_count(slot)
+            + self._inflight.get(slot, 0)
+            + self._pending.get(slot, 0)
+        )
+
+    def add(self, key: str, window: int, amount: int):
+        slot = (key, window)
+        self._pending[slot] = self._pending.get(slot, 0) + amount
+
+    async def flush(self):
+        """Push buffered increments and refresh the totals of watched slots."""
+        if not self._pending and not self._watched:
+            return
+        self._inflight, self._pending = self._pending, {}
+        watched, self._watched = self._watched, set()
+        try:
+            totals = await self._push(self._inflight, watched)
+        except Exception:
+            self.errors += 1
+            logger.exception("rate limit flush failed; keeping counts local")
+            # Still count what this worker admitted
+            totals = {
+                slot: self._shared.get(slot, 0) + delta
+                for slot, delta in self._inflight.items()
+            }
+        self._shared.update(totals)
+        self._inflight = {}
+        self.flushes += 1
+
+    def sweep(self, oldest: int) -> int:
+        stale = [slot for slot in self._shared if slot[1] < oldest]
+        for slot in stale:
+            del self._shared[slot]
+        self._watched = {slot for slot in self._watched if slot[1] >= oldest}
+        return len(stale)
+
+    def reset(self):
+        self._pending.clear()
+        self._inflight.clear()
+        self._shared.clear()
+        self._watched.clear()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.name,
+            "keys": len(self._shared.keys() | self._pending.keys()),
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "errors": self.errors,
+        }
+
+    def _shared_count(self, slot: Slot) -> int:
+        self._watched.add(slot)
+        return self._shared.get(slot, 0)
+
+    @abc.abstractmethod
+    async def _push(self, deltas: dict[Slot, int], watched: set[Slot]) -> dict[Slot, int]:
+        """Apply `deltas` to the shared store; return totals for deltas and watched slots."""
+
+    async def _flush_forever(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+# Header: magic, table size; each slot: (key, window) hash, window, count
+_HEADER = struct.Struct("<QQ")
+_SLOT = struct.Struct("<Qqq")
+_MAGIC = 0x524C494D54424C31  # "RLIMTBL1"
+_MAX_PROBES = 16
+
+
+def _slot_hash(slot: Slot) -> int:
+    digest = hashlib.blake2b(f"{slot[0]}\x00{slot[1]}".encode(), digest_size=8).digest()
+    # Zero marks an empty slot
+    return int.from_bytes(digest, "little") or 1
+
+
+class SharedMemoryRateLimitStore(BufferedRateLimitStore):
+    """
+    Counters in an mmap'd file (normally on /dev/shm) shared by local workers.
+
+    The table is open-addressed on a hash of (key, window). Slots holding a
+    window older than the last sweep are reused. Lookups read the table
+    without locking; a reader racing a writer sees the count from just before
+    or just after the batch, either of which is fine for an estimate. If no
+    slot is free within a few probes the increment is kept local only.
+    """
+
+    name = "shared_memory"
+
+    def __init__(self, path: str, slots: int, flush_interval: float):
+        super().__init__(flush_interval)
+        self.path = path
+        self.slots = slots
+        self._oldest = 0
+        self.overflows = 0
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        size = _HEADER.size + slots * _SLOT.size
+        with self._locked():
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+            if _HEADER.unpack_from(self._map, 0) != (_MAGIC, slots):
+                self._map[:] = bytes(size)
+                _HEADER.pack_into(self._map, 0, _MAGIC, slots)
+
+    def _offset(self, index: int) -> int:
+        return _HEADER.size + index * _SLOT.size
+
+    def _find(self, slot: Slot, claim: bool) -> int | None:
+        """Offset of the slot's entry, optionally claiming a free one."""
+        slot_hash = _slot_hash(slot)
+        start = slot_hash % self.slots
+        free = None
+        for probe in range(_MAX_PROBES):
+            offset = self._offset((start + probe) % self.slots)
+            stored_hash, window, _ = _SLOT.unpack_from(self._map, offset)
+            if stored_hash == slot_hash and window == slot[1]:
+                return offset
+            if free is None and (stored_hash == 0 or window < self._oldest):
+                free = offset
+            if stored_hash == 0:
+                break
+        if claim and free is not None:
+            _SLOT.pack_into(self._map, free, slot_hash, slot[1], 0)
+            return free
+        return None
+
+    def _shared_count(self, slot: Slot) -> int:
+        offset = self._find(slot, claim=False)
+        if offset is None:
+            return self._shared.get(slot, 0)
+        return _SLOT.unpack_from(self._map, offset)[2]
+
+    async def _push(self, deltas: dict[Slot, int], watched: set[Slot]) -> dict[Slot, int]:
+        # Totals are read back from the table, so only unplaced increments are returned
+        unplaced = {}
+        with self._locked():
+            for slot, delta in deltas.items():
+                offset = self._find(slot, claim=True)
+                if offset is None:
+                    self.overflows += 1
+                    unplaced[slot] = self._shared.get(slot, 0) + delta
+                    continue
+                slot_hash, window, count = _SLOT.unpack_from(self._map, offset)
+                _SLOT.pack_into(self._map, offset, slot_hash, window, count + delta)
+        return unplaced
+
+    def sweep(self, oldest: int) -> int:
+        self._oldest = oldest
+        return super().sweep(oldest)
+
+    def reset(self):
+        super().reset()
+        with self._locked():
+            self._map[_HEADER.size:] = bytes(self.slots * _SLOT.size)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "slots": self.slots, "overflows": self.overflows}
+
+    @contextmanager
+    def _locked(self):
+        # POSIX only; imported here so the module loads where fcntl is missing
+        import fcntl
+
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+class RespError(Exception):
+    pass
+
+
+class RespClient:
+    """Minimal pipelining client for the Redis serialization protocol."""
+
+    def __init__(self, url: str, timeout: float = 1.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.database = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    async def execute_many(self, commands: list[tuple]) -> list:
+        """Send commands in one round trip and return their replies in order."""
+        try:
+            return await asyncio.wait_for(self._execute_many(commands), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            await self.close()
+            raise
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+    async def _execute_many(self, commands: list[tuple]) -> list:
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            setup = []
+            if self.password:
+                setup.append(("AUTH", self.password))
+            if self.database:
+                setup.append(("SELECT", self.database))
+            if setup:
+                await self._roundtrip(setup)
+        return await self._roundtrip(commands)
+
+    async def _roundtrip(self, commands: list[tuple]) -> list:
+        self._writer.write(b"".join(_encode(command) for command in commands))
+        await self._writer.drain()
+        replies = [await self._read_reply() for _ in commands]
+        for reply in replies:
+            if isinstance(reply, RespError):
+                raise reply
+        return replies
+
+    async def _read_reply(self):
+        line = (await self._reader.readuntil(b"\r\n"))[:-2]
+        kind, rest = line[:1], line[1:]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            return RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            return (await self._reader.readexactly(length + 2))[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [await self._read_reply() for _ in range(length)]
+        raise RespError(f"unexpected reply {line!r}")
+
+
+def _encode(command: tuple) -> bytes:
+    parts = [str(arg).encode() if not isinstance(arg, bytes) else arg for arg in command]
+    return b"".join(
+        [f"*{len(parts)}\r\n".encode()]
+        + [b"$%d\r\n%s\r\n" % (len(part), part) for part in parts]
+    )
+
+
+class LocalRespClient:
+    """In-process stand-in for a Redis server, supporting the commands used here."""
+
+    def __init__(self):
+        self.data: dict[str, tuple[int, float | None]] = {}
+
+    async def execute_many(self, commands: list[tuple]) -> list:
+        return [self._execute(*command) for command in commands]
+
+    def _execute(self, name: str, key: str, *args):
+        now = time.time()
+        value, expires = self.data.get(key, (0, None))
+        if expires is not None and expires <= now:
+            value, expires = 0, None
+            self.data.pop(key, None)
+        if name == "INCRBY":
+            value += int(args[0])
+            self.data[key] = (value, expires)
+            return value
+        if name == "EXPIRE":
+            if key not in self.data:
+                return 0
+            self.data[key] = (value, now + int(args[0]))
+            return 1
+        if name == "GET":
+            return str(value).encode() if key in self.data else None
+        raise RespError(f"unknown command {name}")
+
+
+class RedisRateLimitStore(BufferedRateLimitStore):
+    """Counters in a Redis-protocol server shared by workers on any host."""
+
+    name = "redis"
+
+    def __init__(self, client, window_seconds: int, flush_interval: float, prefix: str = "ratelimit:"):
+        super().__init__(flush_interval)
+        self.client = client
+        self.prefix = prefix
+        # A window is read for one more window after it ends
+        self.ttl = 2 * window_seconds + 1
+
+    async def _push(self, deltas: dict[Slot, int], watched: set[Slot]) -> dict[Slot, int]:
+        commands, slots = [], []
+        for slot, delta in deltas.items():
+            key = self._key(slot)
+            commands += [("INCRBY", key, delta), ("EXPIRE", key, self.ttl)]
+            slots += [slot, None]
+        for slot in watched - deltas.keys():
+            commands.append(("GET", self._key(slot)))
+            slots.append(slot)
+        if not commands:
+            return {}
+        replies = await self.client.execute_many(commands)
+        return {
+            slot: int(reply or 0)
+            for slot, reply in zip(slots, replies)
+            if slot is not None
+        }
+
+    async def stop(self):
+        await super().stop()
+        if hasattr(self.client, "close"):
+            await self.client.close()
+
+    def _key(self, slot: Slot) -> str:
+        return f"{self.prefix}{slot[0]}:{slot[1]}"
+
+
+def create_rate_limit_store() -> RateLimitStore:
+    backend = settings.RATE_LIMIT_BACKEND
+    interval = settings.RATE_LIMIT_FLUSH_INTERVAL_SECONDS
+    if backend == "shared_memory":
+        return SharedMemoryRateLimitStore(
+            settings.RATE_LIMIT_SHM_PATH, settings.RATE_LIMIT_SHM_SLOTS, interval
+        )
+    if backend == "redis":
+        return RedisRateLimitStore(
+            RespClient(settings.RATE_LIMIT_REDIS_URL),
+            settings.RATE_LIMIT_WINDOW_SECONDS,
+            interval,
+        )
+    return RateLimitStore()
@@ -1,4 +1,10 @@
+import json
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable, Select
 
 from src.config import settings
 
@@ -13,3 +19,36 @@ AsyncSessionLocal = async_sessionmaker(
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def dialect_insert(db: AsyncSession):
+    """Return the insert() construct supporting ON CONFLICT for the session's database."""
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite_insert
+    return pg_insert
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+
+async def estimate_rows(db: AsyncSession, stmt: Select) -> int | None:
+    """
+    Row count the PostgreSQL planner expects `stmt` to return, read from
+    EXPLAIN without executing it. None on databases without planner estimates.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return None
+    res = await db.execute(_Explain(stmt))
+    plan = res.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
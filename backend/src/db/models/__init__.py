@@ -6,3 +6,6 @@ from .policy import Policy  # noqa
 from .access_request import AccessRequest, ApprovalAction, RequestStatus  # noqa
 from .audit_log import AuditLog  # noqa
 from .invite import OrgInvite, InviteStatus  # noqa
+from .authz_version import AuthzVersion  # noqa
+from .org_stats import OrgStats  # noqa
+from .audit_rollup import AuditRollup  # noqa
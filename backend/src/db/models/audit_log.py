@@ -20,9 +20,9 @@ class AuditLog(Base):
         default=uuid.uuid4,
     )
 
+    # Covered by the (org_id, ...) indexes below
     org_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey("organizations.id", ondelete="CASCADE"),
-        index=True,
     )
 
     actor_id: Mapped[uuid.UUID | None] = mapped_column(
@@ -42,11 +42,14 @@ class AuditLog(Base):
     ip_address: Mapped[str | None] = mapped_column(String(45), nullable=True)
     user_agent: Mapped[str | None] = mapped_column(String(500), nullable=True)
 
+    # Part of the primary key because PostgreSQL partitions the table on it
     created_at: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), default=utc_now, index=True
+        DateTime(timezone=True), default=utc_now, primary_key=True, index=True
     )
 
     __table_args__ = (
         Index("ix_audit_org_action", "org_id", "action"),
         Index("ix_audit_org_created", "org_id", "created_at"),
+        # Monthly partitions are managed by src.services.audit_retention_service
+        {"postgresql_partition_by": "RANGE (created_at)"},
     )
@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, ForeignKey, DateTime, String
+
+from src.db.models.base import Base
+
+
+class AuditRollup(Base):
+    """Audit events per org, hour, action and resource type."""
+
+    __tablename__ = "audit_rollups_hourly"
+
+    org_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    # Start of the hour (UTC)
+    hour: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+
+    action: Mapped[str] = mapped_column(String(100), primary_key=True)
+    resource_type: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    events: Mapped[int] = mapped_column(BigInteger, default=0)
@@ -0,0 +1,24 @@
+import uuid
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import BigInteger, ForeignKey, DateTime
+
+from src.db.models.base import Base
+from src.core.security import utc_now
+
+
+class AuthzVersion(Base):
+    """Per-org version of policy/RBAC state, bumped on every authz write."""
+
+    __tablename__ = "authz_versions"
+
+    org_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    version: Mapped[int] = mapped_column(BigInteger, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utc_now, onupdate=utc_now
+    )
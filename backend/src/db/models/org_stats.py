@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Integer, ForeignKey, DateTime
+
+from src.db.models.base import Base
+from src.core.security import utc_now
+
+
+class OrgStats(Base):
+    """Per-org counters, adjusted in the same transaction as the writes they count."""
+
+    __tablename__ = "org_stats"
+
+    org_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("organizations.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    members: Mapped[int] = mapped_column(Integer, default=0)
+    roles: Mapped[int] = mapped_column(Integer, default=0)
+    permissions: Mapped[int] = mapped_column(Integer, default=0)
+    policies: Mapped[int] = mapped_column(Integer, default=0)
+    active_policies: Mapped[int] = mapped_column(Integer, default=0)
+    pending_requests: Mapped[int] = mapped_column(Integer, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=utc_now, onupdate=utc_now
+    )
@@ -3,7 +3,7 @@ import enum
 from datetime import datetime
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy import String, ForeignKey, Enum, UniqueConstraint, DateTime
+from sqlalchemy import String, ForeignKey, Enum, UniqueConstraint, DateTime, Integer
 
 from src.db.models.base import Base
 from src.core.security import utc_now
@@ -27,6 +27,9 @@ class Organization(Base):
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     slug: Mapped[str] = mapped_column(String(255), unique=True, index=True)
 
+    # Days audit logs are kept; None uses AUDIT_RETENTION_DAYS, 0 keeps them forever
+    audit_retention_days: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=utc_now
     )
@@ -1,4 +1,5 @@
 import json
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -6,7 +7,21 @@ from fastapi.responses import JSONResponse
 
 from src.config import settings
 from src.core.exceptions import AppError
-from src.api.rate_limit import UserRateLimitMiddleware
+from src.core.identity_cache import identity_cache
+from src.core.password_hasher import password_hasher
+from src.core.pubsub import pubsub
+from src.services.audit_archive import audit_archive
+from src.services.audit_retention_service import audit_maintenance
+from src.services.audit_writer import audit_writer
+from src.services.authz_version import authz_versions
+from src.services.dashboard_service import dashboard_cache
+from src.services.decision_cache import decision_cache
+from src.services.permission_cache import permission_cache
+from src.services.policy_engine import policy_cache
+from src.services.notification_service import manager, notification_bus
+from src.services.org_stats_service import org_stats_reconciler
+from src.api.middleware import UserRateLimitMiddleware
+from src.api.rate_limit import rate_limiter, route_limits
 from src.api.routes import (
     auth,
     orgs,
@@ -22,10 +37,31 @@ from src.api.routes import (
     oauth,
 )
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Listen for cache invalidations and notifications published by other workers
+    await pubsub.start()
+    await audit_writer.start()
+    await rate_limiter.store.start()
+    await org_stats_reconciler.start()
+    await audit_maintenance.start()
+    yield
+    await audit_maintenance.stop()
+    await org_stats_reconciler.stop()
+    await rate_limiter.store.stop()
+    # Drain queued audit rows before shutting down
+    await audit_writer.stop()
+    # Publish batched notifications before the bus goes away
+    await notification_bus.stop()
+    await pubsub.stop()
+
+
 app = FastAPI(
     title="AuthZ Backend",
     description="Authorization platform with RBAC, policies, and approval workflows",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -36,8 +72,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Rate limiting (100 requests per minute per user/IP)
-app.add_middleware(UserRateLimitMiddleware, requests_per_minute=100, window_seconds=60)
+# Rate limiting (RATE_LIMIT_REQUESTS per window per user/IP, route budgets per org)
+app.add_middleware(UserRateLimitMiddleware, limiter=rate_limiter, route_limits=route_limits)
 
 
 @app.exception_handler(AppError)
@@ -45,6 +81,7 @@ async def app_error_handler(request: Request, exc: AppError):
     return JSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.message},
+        headers=exc.headers,
     )
 
 
@@ -53,6 +90,27 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """In-process cache sizes and hit rates of this worker."""
+    return {
+        "policy_cache": policy_cache.stats(),
+        "decision_cache": decision_cache.stats(),
+        "dashboard_cache": dashboard_cache.stats(),
+        "org_stats_reconciler": org_stats_reconciler.stats(),
+        "permission_cache": permission_cache.stats(),
+        "authz_versions": authz_versions.stats(),
+        "audit_writer": audit_writer.stats(),
+        "audit_maintenance": audit_maintenance.stats(),
+        "audit_archive": audit_archive.stats(),
+        "identity_cache": identity_cache.stats(),
+        "password_hasher": password_hasher.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "notifications": manager.stats(),
+        "notification_bus": notification_bus.stats(),
+    }
+
+
 # Auth routes
 app.include_router(auth.router, prefix=settings.API_PREFIX)
 app.include_router(oauth.router, prefix=settings.API_PREFIX)
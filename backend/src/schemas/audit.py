@@ -25,19 +25,37 @@ class AuditQueryParams(BaseModel):
     end_date: datetime | None = None
     limit: int = Field(default=50, ge=1, le=1000)
     offset: int = Field(default=0, ge=0)
+    cursor: str | None = None
+    count: Literal["exact", "estimate", "none"] = "estimate"
 
 
 class AuditListOut(BaseModel):
     logs: list[AuditLogOut]
-    total: int
+    total: int | None
+    total_estimated: bool = False
     limit: int
     offset: int
+    next_cursor: str | None = None
 
 
 class AuditExportParams(BaseModel):
-    format: Literal["json", "csv"] = "json"
+    format: Literal["json", "ndjson", "csv"] = "json"
     action: str | None = None
     resource_type: str | None = None
     actor_id: str | None = None
     start_date: datetime | None = None
     end_date: datetime | None = None
+
+
+class AuditTimeseriesPoint(BaseModel):
+    bucket_start: datetime
+    key: str | None = None
+    count: int
+
+
+class AuditTimeseriesOut(BaseModel):
+    bucket: Literal["day", "week", "month"]
+    group_by: Literal["action", "resource_type"] | None = None
+    start_date: datetime
+    end_date: datetime
+    points: list[AuditTimeseriesPoint]
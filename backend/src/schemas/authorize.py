@@ -14,6 +14,7 @@ class AuthorizeResponse(BaseModel):
     matched_policy_id: str | None = None
     effect: str | None = None
     reason: str
+    cached: bool = False
 
 
 class BulkAuthorizeRequest(BaseModel):
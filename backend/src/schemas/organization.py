@@ -10,6 +10,8 @@ class OrgCreateIn(BaseModel):
 class OrgUpdateIn(BaseModel):
     name: str | None = Field(None, min_length=2, max_length=255)
     slug: str | None = Field(None, min_length=2, max_length=255, pattern=r"^[a-z0-9-]+$")
+    # 0 keeps audit logs forever; an explicit null restores the server default
+    audit_retention_days: int | None = Field(None, ge=0)
 
 
 class OrgOut(BaseModel):
@@ -23,6 +25,7 @@ class OrgDetailOut(BaseModel):
     id: str
     name: str
     slug: str
+    audit_retention_days: int | None = None
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,318 @@
+"""
+Cold storage for audit logs that aged out of the database.
+
+With AUDIT_RETENTION_ACTION=archive the maintenance job moves each org's
+rows past its retention into gzipped NDJSON segment files under
+AUDIT_ARCHIVE_DIR, one file per org and month, before removing them from
+audit_logs. Lines are in the NDJSON export format, newest first, so a
+segment can be streamed straight back out.
+
+Each org directory has a manifest.json listing its segments with their time
+range and row count, plus `archived_until`: every row of the org created
+before it is in the archive, every row from it onwards is in audit_logs.
+The manifest is replaced atomically after the segments are written and
+before any row is deleted, so a crash leaves at worst unlisted segment files
+or rows that are already archived but not yet deleted; AuditService never
+reads hot rows older than `archived_until`, so neither is seen twice.
+
+Reads go through a worker thread in batches, so streaming years of history
+does not block the event loop.
+"""
+import asyncio
+import gzip
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, NamedTuple
+from uuid import UUID
+
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+
+# Lines decoded per trip to the reader thread
+READ_BATCH_SIZE = 1000
+
+
+class ArchivedAuditLog(NamedTuple):
+    """An audit row read back from the archive; has the same attributes as AuditLog."""
+
+    id: UUID
+    org_id: UUID
+    actor_id: UUID | None
+    actor_email: str | None
+    action: str
+    resource_type: str
+    resource_id: str | None
+    details: dict | None
+    ip_address: str | None
+    user_agent: str | None
+    created_at: datetime
+
+
+def log_dict(log: Any) -> dict:
+    """JSON-ready form of an audit row, as exported and archived."""
+    return {
+        "id": str(log.id),
+        "org_id": str(log.org_id),
+        "actor_id": str(log.actor_id) if log.actor_id else None,
+        "actor_email": log.actor_email,
+        "action": log.action,
+        "resource_type": log.resource_type,
+        "resource_id": log.resource_id,
+        "details": log.details,
+        "ip_address": log.ip_address,
+        "user_agent": log.user_agent,
+        "created_at": log.created_at.isoformat(),
+    }
+
+
+def _from_line(line: bytes) -> ArchivedAuditLog:
+    data = json.loads(line)
+    created_at = datetime.fromisoformat(data["created_at"])
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return ArchivedAuditLog(
+        id=UUID(data["id"]),
+        org_id=UUID(data["org_id"]),
+        actor_id=UUID(data["actor_id"]) if data["actor_id"] else None,
+        actor_email=data["actor_email"],
+        action=data["action"],
+        resource_type=data["resource_type"],
+        resource_id=data["resource_id"],
+        details=data["details"],
+        ip_address=data["ip_address"],
+        user_agent=data["user_agent"],
+        created_at=created_at,
+    )
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts.astimezone(timezone.utc)
+
+
+def _month(ts: datetime) -> datetime:
+    return _utc(ts).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+@dataclass
+class Segment:
+    file: str
+    # Covers created_at in [start, end)
+    start: datetime
+    end: datetime
+    rows: int = 0
+    bytes: int = 0
+
+    def to_json(self) -> dict:
+        return {
+            "file": self.file,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Segment":
+        return cls(
+            file=data["file"],
+            start=datetime.fromisoformat(data["start"]),
+            end=datetime.fromisoformat(data["end"]),
+            rows=data["rows"],
+            bytes=data["bytes"],
+        )
+
+
+@dataclass
+class Manifest:
+    archived_until: datetime | None = None
+    # Oldest first; ranges never overlap
+    segments: list[Segment] = field(default_factory=list)
+
+
+class AuditArchive:
+    def __init__(self, root: str):
+        self.root = Path(root)
+        # org id -> (manifest mtime, manifest)
+        self._manifests: dict[UUID, tuple[int, Manifest]] = {}
+        self.segments_written = 0
+        self.rows_archived = 0
+        self.segments_read = 0
+        self.rows_read = 0
+
+    def manifest(self, org_id: UUID) -> Manifest:
+        """The org's manifest, reloaded whenever another worker has replaced it."""
+        path = self.root / str(org_id) / MANIFEST
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return Manifest()
+        cached = self._manifests.get(org_id)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        data = json.loads(path.read_text())
+        manifest = Manifest(
+            archived_until=datetime.fromisoformat(data["archived_until"]) if data["archived_until"] else None,
+            segments=[Segment.from_json(segment) for segment in data["segments"]],
+        )
+        self._manifests[org_id] = (mtime, manifest)
+        return manifest
+
+    def archived_until(self, org_id: UUID) -> datetime | None:
+        return self.manifest(org_id).archived_until
+
+    def segments(
+        self, org_id: UUID, start: datetime | None = None, end: datetime | None = None
+    ) -> list[Segment]:
+        """Segments overlapping [start, end], newest first."""
+        start = _utc(start) if start else None
+        end = _utc(end) if end else None
+        return [
+            segment
+            for segment in reversed(self.manifest(org_id).segments)
+            if (start is None or segment.end > start) and (end is None or segment.start <= end)
+        ]
+
+    async def archive(
+        self, org_id: UUID, batches: AsyncIterator[list[Any]], since: datetime | None, until: datetime
+    ) -> int:
+        """
+        Write the org's rows from `since` up to `until`, given newest first,
+        as monthly segments, then record them and move `archived_until` to
+        `until`. Returns the number of rows archived. Callers hold the org's
+        archive lock, so no two workers write segments for it at once.
+        """
+        directory = self.root / str(org_id)
+        await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+        until = _utc(until)
+        written: list[Segment] = []
+        writer: _SegmentWriter | None = None
+        try:
+            async for batch in batches:
+                pending: list[Any] = []
+                for row in batch:
+                    month = _month(row.created_at)
+                    if writer is not None and month != writer.month:
+                        await asyncio.to_thread(writer.write, pending)
+                        written.append(await asyncio.to_thread(writer.close))
+                        writer, pending = None, []
+                    if writer is None:
+                        writer = _SegmentWriter(directory, month, since, until)
+                    pending.append(row)
+                if writer is not None and pending:
+                    await asyncio.to_thread(writer.write, pending)
+            if writer is not None:
+                written.append(await asyncio.to_thread(writer.close))
+                writer = None
+        finally:
+            if writer is not None:
+                await asyncio.to_thread(writer.discard)
+
+        manifest = self.manifest(org_id)
+        segments = sorted([*manifest.segments, *written], key=lambda segment: segment.start)
+        await asyncio.to_thread(self._save_manifest, org_id, Manifest(until, segments))
+        rows = sum(segment.rows for segment in written)
+        self.segments_written += len(written)
+        self.rows_archived += rows
+        if written:
+            logger.info("Archived %d audit rows of org %s in %d segments", rows, org_id, len(written))
+        return rows
+
+    async def scan(
+        self,
+        org_id: UUID,
+        predicate: Callable[[ArchivedAuditLog], bool],
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> AsyncIterator[list[ArchivedAuditLog]]:
+        """Archived rows of the org matching `predicate`, newest first, in batches."""
+        for segment in self.segments(org_id, start, end):
+            self.segments_read += 1
+            path = self.root / str(org_id) / segment.file
+            reader = await asyncio.to_thread(gzip.open, path, "rb")
+            try:
+                while True:
+                    lines = await asyncio.to_thread(_read_lines, reader, READ_BATCH_SIZE)
+                    if not lines:
+                        break
+                    self.rows_read += len(lines)
+                    batch = [log for log in map(_from_line, lines) if predicate(log)]
+                    if batch:
+                        yield batch
+            finally:
+                await asyncio.to_thread(reader.close)
+
+    def stats(self) -> dict:
+        return {
+            "root": str(self.root),
+            "segments_written": self.segments_written,
+            "rows_archived": self.rows_archived,
+            "segments_read": self.segments_read,
+            "rows_read": self.rows_read,
+        }
+
+    def _save_manifest(self, org_id: UUID, manifest: Manifest):
+        path = self.root / str(org_id) / MANIFEST
+        data = {
+            "org_id": str(org_id),
+            "archived_until": manifest.archived_until.isoformat() if manifest.archived_until else None,
+            "segments": [segment.to_json() for segment in manifest.segments],
+        }
+        tmp = path.with_name(f".{MANIFEST}.{uuid.uuid4().hex}")
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=1)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        self._manifests.pop(org_id, None)
+
+
+def _read_lines(reader, count: int) -> list[bytes]:
+    lines = []
+    for line in reader:
+        lines.append(line)
+        if len(lines) == count:
+            break
+    return lines
+
+
+class _SegmentWriter:
+    """One month of an org's rows, written to a temporary file until closed."""
+
+    def __init__(self, directory: Path, month: datetime, since: datetime | None, until: datetime):
+        next_month = month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+        self.month = month
+        self.start = max(month, _utc(since)) if since else month
+        self.end = min(next_month, until)
+        self.path = directory / (
+            f"{self.start:%Y%m%dT%H%M%S}-{self.end:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}.ndjson.gz"
+        )
+        self.tmp = self.path.with_name(f".{self.path.name}.tmp")
+        self.file = gzip.open(self.tmp, "wb")
+        self.rows = 0
+
+    def write(self, rows: list[Any]):
+        self.file.write(b"".join(json.dumps(log_dict(row)).encode() + b"\n" for row in rows))
+        self.rows += len(rows)
+
+    def close(self) -> Segment:
+        self.file.close()
+        with open(self.tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(self.tmp, self.path)
+        return Segment(self.path.name, self.start, self.end, self.rows, self.path.stat().st_size)
+
+    def discard(self):
+        self.file.close()
+        self.tmp.unlink(missing_ok=True)
+
+
+# Global archive, written by the audit maintenance job and read by AuditService
+audit_archive = AuditArchive(settings.AUDIT_ARCHIVE_DIR)
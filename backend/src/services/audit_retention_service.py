@@ -0,0 +1,345 @@
+"""
+Audit log partitions and retention.
+
+On PostgreSQL audit_logs is range-partitioned by month on created_at
+(audit_logs_YYYY_MM, plus audit_logs_default for anything outside them).
+The maintenance job keeps AUDIT_PARTITIONS_AHEAD months of partitions
+created ahead of time; a month that somehow landed in the default
+partition first has its rows moved into the new partition as it is
+attached.
+
+Retention is per org: Organization.audit_retention_days, or
+AUDIT_RETENTION_DAYS when unset, with 0 meaning forever. A partition holds
+every org's rows for its month, so it is only detached, then dropped or kept
+as a standalone table (AUDIT_RETENTION_ACTION), once it is past the longest
+retention of any org. Orgs with a shorter retention lose their expired rows
+to batched deletes in the meantime, and AuditService hides rows past an
+org's retention so reads never depend on when the job last ran. Other
+databases have no partitions and rely on the deletes alone.
+
+With AUDIT_RETENTION_ACTION=archive, expired rows are first copied to the
+cold archive (src.services.audit_archive) in whole months, and removed from
+audit_logs only once the archive manifest records them. AuditService then
+reads them from there instead of hiding them. Every worker runs the job, so
+an org is archived and its rows deleted under a per-org advisory lock; a
+worker that finds the lock taken skips the org until its next run.
+AUDIT_ARCHIVE_DIR must be one directory shared by every worker that serves
+audit reads: a worker with its own copy would not see segments written
+elsewhere, whose rows are already gone from audit_logs.
+
+The hourly rollups are not touched, so audit charts keep the history.
+"""
+import asyncio
+import logging
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.core.security import utc_now
+from src.db.database import AsyncSessionLocal
+from src.db.models.audit_log import AuditLog
+from src.db.models.organization import Organization
+from src.services.audit_archive import audit_archive
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"^audit_logs_(\d{4})_(\d{2})$")
+DEFAULT_PARTITION = "audit_logs_default"
+
+# Rows read per round trip while archiving
+ARCHIVE_BATCH_SIZE = 1000
+
+# pg_try_advisory_xact_lock key, so only one worker changes partitions at a time
+PARTITION_LOCK_ID = 0x61756474
+
+# pg_try_advisory_lock key, paired with a hash of the org id, held while an
+# org's rows are archived and deleted
+ARCHIVE_LOCK_ID = 0x61726368
+
+
+def month_start(ts: datetime) -> datetime:
+    ts = ts.astimezone(timezone.utc) if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + month.month // 12, month=month.month % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"audit_logs_{month:%Y_%m}"
+
+
+def retention_cutoff(days: int | None, now: datetime | None = None) -> datetime | None:
+    """Oldest created_at kept for a retention of `days`; None when kept forever."""
+    days = settings.AUDIT_RETENTION_DAYS if days is None else days
+    if days <= 0:
+        return None
+    return (now or utc_now()) - timedelta(days=days)
+
+
+async def retention_floor(db: AsyncSession, org_id: UUID) -> datetime | None:
+    """Oldest created_at the org still keeps in audit_logs; None when it keeps everything."""
+    days = await db.scalar(select(Organization.audit_retention_days).where(Organization.id == org_id))
+    return retention_cutoff(days)
+
+
+class AuditRetentionService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def is_partitioned(self) -> bool:
+        if self.db.get_bind().dialect.name != "postgresql":
+            return False
+        return bool(
+            await self.db.scalar(
+                text(
+                    "SELECT count(*) FROM pg_partitioned_table pt "
+                    "JOIN pg_class c ON c.oid = pt.partrelid "
+                    "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+                ),
+                {"table": AuditLog.__tablename__},
+            )
+        )
+
+    async def list_partitions(self) -> list[tuple[str, datetime, datetime]]:
+        """Attached monthly partitions as (name, start, end), oldest first."""
+        res = await self.db.execute(
+            text(
+                "SELECT c.relname FROM pg_inherits i "
+                "JOIN pg_class c ON c.oid = i.inhrelid "
+                "JOIN pg_class p ON p.oid = i.inhparent "
+                "WHERE p.relname = :table AND pg_table_is_visible(p.oid)"
+            ),
+            {"table": AuditLog.__tablename__},
+        )
+        partitions = []
+        for name in res.scalars():
+            match = PARTITION_NAME.match(name)
+            if match:
+                start = datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc)
+                partitions.append((name, start, next_month(start)))
+        return sorted(partitions, key=lambda partition: partition[1])
+
+    async def ensure_partitions(self, now: datetime | None = None) -> list[str]:
+        """Create the current month's partition and AUDIT_PARTITIONS_AHEAD more; returns the new ones."""
+        if not await self.is_partitioned() or not await self._lock():
+            return []
+        existing = {name for name, _, _ in await self.list_partitions()}
+        created = []
+        month = month_start(now or utc_now())
+        for _ in range(settings.AUDIT_PARTITIONS_AHEAD + 1):
+            name = partition_name(month)
+            if name not in existing:
+                await self._create_partition(name, month, next_month(month))
+                created.append(name)
+            month = next_month(month)
+        await self.db.commit()
+        if created:
+            logger.info("Created audit partitions %s", ", ".join(created))
+        return created
+
+    async def enforce_retention(self, now: datetime | None = None) -> dict:
+        """Remove (or archive) audit rows past each org's retention; returns what was removed."""
+        now = now or utc_now()
+        res = await self.db.execute(select(Organization.id, Organization.audit_retention_days))
+        retention: dict[UUID, int | None] = dict(res.all())
+        archive = settings.AUDIT_RETENTION_ACTION == "archive"
+
+        archived = deleted = 0
+        cutoffs = {}
+        busy = False
+        for org_id, days in retention.items():
+            cutoff = retention_cutoff(days, now)
+            if cutoff is None:
+                continue
+            if not archive:
+                cutoffs[org_id] = cutoff
+                continue
+            async with self._org_lock(org_id) as locked:
+                if not locked:
+                    # Another worker is archiving this org right now
+                    busy = True
+                    continue
+                # Whole months, so each org gets one segment per month
+                cutoff = month_start(cutoff)
+                archived += await self._archive(org_id, cutoff)
+                deleted += await self._delete_before(cutoff, AuditLog.org_id == org_id)
+
+        # Partitions can hold rows another worker is still archiving
+        partitions = [] if busy else await self._expire_partitions(
+            [settings.AUDIT_RETENTION_DAYS, *(days for days in retention.values() if days is not None)],
+            now,
+        )
+        for org_id, cutoff in cutoffs.items():
+            deleted += await self._delete_before(cutoff, AuditLog.org_id == org_id)
+        return {"partitions": partitions, "archived": archived, "deleted": deleted}
+
+    async def _archive(self, org_id: UUID, until: datetime) -> int:
+        """Copy the org's rows created before `until` that are not archived yet to cold storage."""
+        since = audit_archive.archived_until(org_id)
+        if since is not None and since >= until:
+            return 0
+        query = select(*AuditLog.__table__.c).where(AuditLog.org_id == org_id, AuditLog.created_at < until)
+        if since is not None:
+            query = query.where(AuditLog.created_at >= since)
+        result = await self.db.stream(
+            query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+            .execution_options(yield_per=ARCHIVE_BATCH_SIZE)
+        )
+        rows = await audit_archive.archive(org_id, result.partitions(), since, until)
+        await self.db.commit()
+        return rows
+
+    async def _expire_partitions(self, retentions: list[int], now: datetime) -> list[str]:
+        """Detach (and drop) partitions that are past the longest retention of any org."""
+        if any(days <= 0 for days in retentions) or not await self.is_partitioned():
+            return []
+        horizon = now - timedelta(days=max(retentions))
+        if not await self._lock():
+            return []
+        expired = [name for name, _, end in await self.list_partitions() if end <= horizon]
+        for name in expired:
+            await self.db.execute(text(f"ALTER TABLE {AuditLog.__tablename__} DETACH PARTITION {name}"))
+            if settings.AUDIT_RETENTION_ACTION != "detach":
+                await self.db.execute(text(f"DROP TABLE {name}"))
+        await self.db.commit()
+        if expired:
+            logger.info(
+                "Audit retention: %s partitions %s",
+                "detached" if settings.AUDIT_RETENTION_ACTION == "detach" else "dropped",
+                ", ".join(expired),
+            )
+        return expired
+
+    async def _delete_before(self, cutoff: datetime, *filters) -> int:
+        """Delete matching rows older than `cutoff`, committing every batch."""
+        batch_size = settings.AUDIT_RETENTION_DELETE_BATCH
+        deleted = 0
+        while True:
+            expired = (
+                select(AuditLog.id)
+                .where(AuditLog.created_at < cutoff, *filters)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            res = await self.db.execute(
+                delete(AuditLog)
+                .where(AuditLog.created_at < cutoff, AuditLog.id.in_(expired))
+                .execution_options(synchronize_session=False)
+            )
+            await self.db.commit()
+            deleted += res.rowcount
+            if res.rowcount < batch_size:
+                return deleted
+
+    async def _lock(self) -> bool:
+        return bool(await self.db.scalar(select(func.pg_try_advisory_xact_lock(PARTITION_LOCK_ID))))
+
+    @asynccontextmanager
+    async def _org_lock(self, org_id: UUID) -> AsyncIterator[bool]:
+        """
+        Session-level advisory lock for archiving one org. It is taken on a
+        connection of its own so it survives the commits made while archiving
+        and deleting; yields whether it was acquired.
+        """
+        if self.db.get_bind().dialect.name != "postgresql":
+            yield True
+            return
+        key = (ARCHIVE_LOCK_ID, func.hashtext(str(org_id)))
+        async with self.db.bind.connect() as conn:
+            locked = bool(await conn.scalar(select(func.pg_try_advisory_lock(*key))))
+            try:
+                yield locked
+            finally:
+                if locked:
+                    await conn.scalar(select(func.pg_advisory_unlock(*key)))
+
+    async def _create_partition(self, name: str, start: datetime, end: datetime):
+        # Rows for the month may already sit in the default partition; attaching
+        # fails while they do, so they move into the new table first
+        table = AuditLog.__tablename__
+        await self.db.execute(
+            text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        )
+        bounds = f"created_at >= '{start.isoformat()}' AND created_at < '{end.isoformat()}'"
+        await self.db.execute(
+            text(
+                f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {bounds} RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            )
+        )
+        await self.db.execute(
+            text(
+                f"ALTER TABLE {table} ATTACH PARTITION {name} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        )
+
+
+class AuditMaintenance:
+    """Creates audit partitions and enforces retention every `interval` seconds."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.partitions_created = 0
+        self.partitions_expired = 0
+        self.rows_archived = 0
+        self.rows_deleted = 0
+
+    async def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> dict:
+        async with self.session_factory() as session:
+            service = AuditRetentionService(session)
+            created = await service.ensure_partitions()
+            removed = await service.enforce_retention()
+        self.runs += 1
+        self.partitions_created += len(created)
+        self.partitions_expired += len(removed["partitions"])
+        self.rows_archived += removed["archived"]
+        self.rows_deleted += removed["deleted"]
+        return {"created": created, **removed}
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "partitions_created": self.partitions_created,
+            "partitions_expired": self.partitions_expired,
+            "rows_archived": self.rows_archived,
+            "rows_deleted": self.rows_deleted,
+        }
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Audit maintenance failed")
+            await asyncio.sleep(self.interval)
+
+
+# Global maintenance job, started in the app lifespan
+audit_maintenance = AuditMaintenance(AsyncSessionLocal, settings.AUDIT_MAINTENANCE_INTERVAL_SECONDS)
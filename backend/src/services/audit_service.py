@@ -1,13 +1,73 @@
+import base64
+import binascii
 import csv
 import io
 import json
+import uuid
+from contextlib import aclosing
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable
 from uuid import UUID
-from datetime import datetime
-from sqlalchemy import select, func
+from datetime import datetime, timezone
+from sqlalchemy import Row, select, func, and_, or_
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import Request
 
+from src.config import settings
+from src.core.exceptions import BadRequest
+from src.core.security import utc_now
+from src.db.database import estimate_rows
 from src.db.models.audit_log import AuditLog
+from src.services.audit_archive import ArchivedAuditLog, audit_archive, log_dict
+from src.services.audit_retention_service import retention_floor
+from src.services.audit_rollup_service import add_to_rollups
+from src.services.audit_writer import audit_writer
+
+# Rows fetched per round trip while exporting
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_COLUMNS = [
+    "id",
+    "org_id",
+    "actor_id",
+    "actor_email",
+    "action",
+    "resource_type",
+    "resource_id",
+    "details",
+    "ip_address",
+    "user_agent",
+    "created_at",
+]
+
+EXPORT_MEDIA_TYPES = {
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+@dataclass
+class AuditPage:
+    logs: list[AuditLog | ArchivedAuditLog]
+    next_cursor: str | None
+    total: int | None
+    total_estimated: bool = False
+
+
+def encode_cursor(created_at: datetime, log_id: UUID) -> str:
+    """Opaque keyset cursor pointing just past the given row."""
+    raw = json.dumps([created_at.isoformat(), str(log_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, log_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(log_id)
+    except (binascii.Error, ValueError, TypeError):
+        raise BadRequest("Invalid cursor") from None
 
 
 class AuditService:
@@ -25,7 +85,11 @@ class AuditService:
         request: Request | None = None,
         actor_email: str | None = None,
     ) -> AuditLog:
-        """Create an audit log entry."""
+        """
+        Create an audit log entry. The row is handed to the background audit
+        writer; it is written inline only if the writer is not running or its
+        queue is full.
+        """
         ip_address = None
         user_agent = None
 
@@ -33,20 +97,26 @@ class AuditService:
             ip_address = request.client.host if request.client else None
             user_agent = request.headers.get("user-agent")
 
-        log_entry = AuditLog(
-            org_id=org_id,
-            actor_id=actor_id,
-            actor_email=actor_email,
-            action=action,
-            resource_type=resource_type,
-            resource_id=resource_id,
-            details=details,
-            ip_address=ip_address,
-            user_agent=user_agent,
-        )
+        row = {
+            "id": uuid.uuid4(),
+            "org_id": org_id,
+            "actor_id": actor_id,
+            "actor_email": actor_email,
+            "action": action,
+            "resource_type": resource_type,
+            "resource_id": resource_id,
+            "details": details,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "created_at": utc_now(),
+        }
+        log_entry = AuditLog(**row)
+        if audit_writer.submit(row):
+            return log_entry
+
         self.db.add(log_entry)
+        await add_to_rollups(self.db, [row])
         await self.db.commit()
-        await self.db.refresh(log_entry)
         return log_entry
 
     async def query(
@@ -59,41 +129,146 @@ class AuditService:
         end_date: datetime | None = None,
         limit: int = 50,
         offset: int = 0,
-    ) -> tuple[list[AuditLog], int]:
-        """Query audit logs with filters."""
-        query = select(AuditLog).where(AuditLog.org_id == org_id)
-        count_query = select(func.count(AuditLog.id)).where(AuditLog.org_id == org_id)
+        cursor: str | None = None,
+        count: str = "none",
+    ) -> AuditPage:
+        """
+        Query audit logs with filters, newest first.
 
-        if action:
-            query = query.where(AuditLog.action == action)
-            count_query = count_query.where(AuditLog.action == action)
+        Pages are read by keyset on (created_at, id) using the org/created_at
+        index: pass the previous page's next_cursor as `cursor`. `offset` is
+        only honoured without a cursor. `count` selects the total: "exact"
+        runs count(*), "estimate" asks the PostgreSQL planner, "none" skips it.
 
-        if resource_type:
-            query = query.where(AuditLog.resource_type == resource_type)
-            count_query = count_query.where(AuditLog.resource_type == resource_type)
+        Rows past the org's retention are hidden unless they are archived.
+        That floor, the date filters and the cursor all bound created_at, so
+        PostgreSQL only scans the monthly partitions inside them. Rows moved
+        to the cold archive are read from there once the database runs out,
+        so pages, cursors and totals span both.
+        """
+        hot_since, archived_until = await self._hot_bounds(org_id, start_date)
+        filters = self._filters(org_id, action, resource_type, actor_id, hot_since, end_date)
+        query = select(AuditLog).where(*filters)
 
-        if actor_id:
-            query = query.where(AuditLog.actor_id == actor_id)
-            count_query = count_query.where(AuditLog.actor_id == actor_id)
+        after = decode_cursor(cursor) if cursor else None
+        if after:
+            created_at, log_id = after
+            query = query.where(
+                AuditLog.created_at <= created_at,
+                or_(
+                    AuditLog.created_at < created_at,
+                    and_(AuditLog.created_at == created_at, AuditLog.id < log_id),
+                ),
+            )
+        elif offset:
+            query = query.offset(offset)
 
-        if start_date:
-            query = query.where(AuditLog.created_at >= start_date)
-            count_query = count_query.where(AuditLog.created_at >= start_date)
+        # One extra row tells whether there is a next page
+        query = query.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1)
+        result = await self.db.execute(query)
+        logs: list[AuditLog | ArchivedAuditLog] = list(result.scalars().all())
 
-        if end_date:
-            query = query.where(AuditLog.created_at <= end_date)
-            count_query = count_query.where(AuditLog.created_at <= end_date)
+        reads_archive = _reads_archive(archived_until, start_date)
+        if reads_archive and len(logs) <= limit:
+            skip = 0
+            if offset and not after and not logs:
+                # The offset went past every hot row; the rest of it skips archived ones
+                hot_rows = await self.db.scalar(select(func.count(AuditLog.id)).where(*filters)) or 0
+                skip = max(0, offset - hot_rows)
+            matches = _archived_filter(action, resource_type, actor_id, start_date, end_date, after)
+            # Segments newer than the cursor hold nothing for this page
+            newest = end_date
+            if after and (newest is None or _utc(after[0]) < _utc(newest)):
+                newest = after[0]
+            async with aclosing(audit_archive.scan(org_id, matches, start_date, newest)) as batches:
+                async for batch in batches:
+                    if skip:
+                        skipped = min(skip, len(batch))
+                        batch, skip = batch[skipped:], skip - skipped
+                    logs.extend(batch[: limit + 1 - len(logs)])
+                    if len(logs) > limit:
+                        break
 
-        # Get total count
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar() or 0
+        next_cursor = None
+        if len(logs) > limit:
+            logs = logs[:limit]
+            next_cursor = encode_cursor(logs[-1].created_at, logs[-1].id)
 
-        # Get paginated results
-        query = query.order_by(AuditLog.created_at.desc()).limit(limit).offset(offset)
-        result = await self.db.execute(query)
-        logs = list(result.scalars().all())
+        total = None
+        if count == "exact":
+            total = await self.db.scalar(select(func.count(AuditLog.id)).where(*filters)) or 0
+            if reads_archive:
+                matches = _archived_filter(action, resource_type, actor_id, start_date, end_date)
+                async for batch in audit_archive.scan(org_id, matches, start_date, end_date):
+                    total += len(batch)
+        elif count == "estimate":
+            total = await estimate_rows(self.db, select(AuditLog.id).where(*filters))
+            if total is not None and reads_archive:
+                total += _archived_estimate(org_id, start_date, end_date)
+
+        return AuditPage(
+            logs=logs,
+            next_cursor=next_cursor,
+            total=total,
+            total_estimated=count == "estimate" and total is not None,
+        )
+
+    async def _hot_bounds(
+        self, org_id: UUID, start_date: datetime | None
+    ) -> tuple[datetime | None, datetime | None]:
+        """
+        Lower created_at bound for audit_logs, and where the cold archive
+        takes over (None if the org has nothing archived). Rows past the
+        org's retention are hidden unless they are being archived.
+        """
+        archived_until = audit_archive.archived_until(org_id)
+        floors = [_utc(start_date) if start_date else None, archived_until]
+        if settings.AUDIT_RETENTION_ACTION != "archive":
+            floors.append(await retention_floor(self.db, org_id))
+        floors = [floor for floor in floors if floor is not None]
+        return (max(floors) if floors else None), archived_until
+
+    def _filters(
+        self,
+        org_id: UUID,
+        action: str | None,
+        resource_type: str | None,
+        actor_id: UUID | None,
+        start_date: datetime | None,
+        end_date: datetime | None,
+    ) -> list:
+        filters = [AuditLog.org_id == org_id]
+        if action:
+            filters.append(AuditLog.action == action)
+        if resource_type:
+            filters.append(AuditLog.resource_type == resource_type)
+        if actor_id:
+            filters.append(AuditLog.actor_id == actor_id)
+        if start_date:
+            filters.append(AuditLog.created_at >= start_date)
+        if end_date:
+            filters.append(AuditLog.created_at <= end_date)
+        return filters
 
-        return logs, total
+    async def estimate_count(
+        self,
+        org_id: UUID,
+        action: str | None = None,
+        resource_type: str | None = None,
+        actor_id: UUID | None = None,
+        start_date: datetime | None = None,
+        end_date: datetime | None = None,
+    ) -> int:
+        """Planner row estimate for the filters; an exact count where there is no planner estimate."""
+        hot_since, archived_until = await self._hot_bounds(org_id, start_date)
+        filters = self._filters(org_id, action, resource_type, actor_id, hot_since, end_date)
+        estimate = await estimate_rows(self.db, select(AuditLog.id).where(*filters))
+        if estimate is None:
+            estimate = await self.db.scalar(select(func.count(AuditLog.id)).where(*filters)) or 0
+        if _reads_archive(archived_until, start_date):
+            # Every archived row in range; the segments are not scanned for the other filters
+            estimate += _archived_estimate(org_id, start_date, end_date)
+        return estimate
 
     async def export(
         self,
@@ -104,79 +279,121 @@ class AuditService:
         actor_id: UUID | None = None,
         start_date: datetime | None = None,
         end_date: datetime | None = None,
-    ) -> tuple[str, str]:
-        """Export audit logs in specified format."""
-        # Get all matching logs (with reasonable limit)
-        logs, _ = await self.query(
-            org_id=org_id,
-            action=action,
-            resource_type=resource_type,
-            actor_id=actor_id,
-            start_date=start_date,
-            end_date=end_date,
-            limit=10000,
-            offset=0,
+    ) -> tuple[AsyncIterator[str], str]:
+        """
+        Export audit logs in the specified format (json, ndjson or csv).
+        Returns an async iterator of text chunks and the media type; rows are
+        read through a server-side cursor, so memory does not grow with the
+        size of the export. Archived rows are streamed from their segments
+        after the database rows, which are all newer.
+        """
+        hot_since, archived_until = await self._hot_bounds(org_id, start_date)
+        rows = self.stream(
+            self._filters(org_id, action, resource_type, actor_id, hot_since, end_date)
         )
-
+        if _reads_archive(archived_until, start_date):
+            matches = _archived_filter(action, resource_type, actor_id, start_date, end_date)
+            rows = _chain(rows, audit_archive.scan(org_id, matches, start_date, end_date))
         if format == "csv":
-            return self._export_csv(logs), "text/csv"
-        else:
-            return self._export_json(logs), "application/json"
-
-    def _export_json(self, logs: list[AuditLog]) -> str:
-        """Export logs as JSON."""
-        data = [
-            {
-                "id": str(log.id),
-                "org_id": str(log.org_id),
-                "actor_id": str(log.actor_id) if log.actor_id else None,
-                "actor_email": log.actor_email,
-                "action": log.action,
-                "resource_type": log.resource_type,
-                "resource_id": log.resource_id,
-                "details": log.details,
-                "ip_address": log.ip_address,
-                "user_agent": log.user_agent,
-                "created_at": log.created_at.isoformat(),
-            }
-            for log in logs
-        ]
-        return json.dumps(data, indent=2)
-
-    def _export_csv(self, logs: list[AuditLog]) -> str:
+            return self._export_csv(rows), EXPORT_MEDIA_TYPES["csv"]
+        if format == "ndjson":
+            return self._export_ndjson(rows), EXPORT_MEDIA_TYPES["ndjson"]
+        return self._export_json(rows), EXPORT_MEDIA_TYPES["json"]
+
+    async def stream(self, filters: list) -> AsyncIterator[list[Row]]:
+        """Matching rows, newest first, in batches of EXPORT_BATCH_SIZE."""
+        query = (
+            select(*AuditLog.__table__.c)
+            .where(*filters)
+            .order_by(AuditLog.created_at.desc(), AuditLog.id.desc())
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        result = await self.db.stream(query)
+        async for batch in result.partitions():
+            yield batch
+
+    async def _export_json(self, batches: AsyncIterator[list[Row]]) -> AsyncIterator[str]:
+        """Export logs as a JSON array, one element per line."""
+        separator = "[\n"
+        async for batch in batches:
+            yield separator + ",\n".join(json.dumps(log_dict(row)) for row in batch)
+            separator = ",\n"
+        yield "[]\n" if separator == "[\n" else "\n]\n"
+
+    async def _export_ndjson(self, batches: AsyncIterator[list[Row]]) -> AsyncIterator[str]:
+        """Export logs as newline-delimited JSON."""
+        async for batch in batches:
+            yield "".join(json.dumps(log_dict(row)) + "\n" for row in batch)
+
+    async def _export_csv(self, batches: AsyncIterator[list[Row]]) -> AsyncIterator[str]:
         """Export logs as CSV."""
         output = io.StringIO()
         writer = csv.writer(output)
 
         # Header
-        writer.writerow([
-            "id",
-            "org_id",
-            "actor_id",
-            "actor_email",
-            "action",
-            "resource_type",
-            "resource_id",
-            "details",
-            "ip_address",
-            "user_agent",
-            "created_at",
-        ])
+        writer.writerow(EXPORT_COLUMNS)
+        yield output.getvalue()
 
         # Data
-        for log in logs:
-            writer.writerow([
-                str(log.id),
-                str(log.org_id),
-                str(log.actor_id) if log.actor_id else "",
-                log.actor_email or "",
-                log.action,
-                log.resource_type,
-                log.resource_id or "",
-                json.dumps(log.details) if log.details else "",
-                log.ip_address or "",
-                log.user_agent or "",
-                log.created_at.isoformat(),
-            ])
-
-        return output.getvalue()
+        async for batch in batches:
+            output.seek(0)
+            output.truncate()
+            for log in batch:
+                writer.writerow([
+                    str(log.id),
+                    str(log.org_id),
+                    str(log.actor_id) if log.actor_id else "",
+                    log.actor_email or "",
+                    log.action,
+                    log.resource_type,
+                    log.resource_id or "",
+                    json.dumps(log.details) if log.details else "",
+                    log.ip_address or "",
+                    log.user_agent or "",
+                    log.created_at.isoformat(),
+                ])
+            yield output.getvalue()
+
+
+def _utc(ts: datetime) -> datetime:
+    return ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts
+
+
+def _reads_archive(archived_until: datetime | None, start_date: datetime | None) -> bool:
+    return archived_until is not None and (start_date is None or _utc(start_date) < archived_until)
+
+
+def _archived_estimate(org_id: UUID, start_date: datetime | None, end_date: datetime | None) -> int:
+    return sum(segment.rows for segment in audit_archive.segments(org_id, start_date, end_date))
+
+
+def _archived_filter(
+    action: str | None,
+    resource_type: str | None,
+    actor_id: UUID | None,
+    start_date: datetime | None,
+    end_date: datetime | None,
+    after: tuple[datetime, UUID] | None = None,
+) -> Callable[[ArchivedAuditLog], bool]:
+    """The query filters (and keyset cursor) applied to archived rows."""
+    start = _utc(start_date) if start_date else None
+    end = _utc(end_date) if end_date else None
+    after = (_utc(after[0]), after[1]) if after else None
+
+    def matches(log: ArchivedAuditLog) -> bool:
+        return (
+            (not action or log.action == action)
+            and (not resource_type or log.resource_type == resource_type)
+            and (not actor_id or log.actor_id == actor_id)
+            and (start is None or log.created_at >= start)
+            and (end is None or log.created_at <= end)
+            and (after is None or (log.created_at, log.id) < after)
+        )
+
+    return matches
+
+
+async def _chain(*sources: AsyncIterator[list]) -> AsyncIterator[list]:
+    for source in sources:
+        async for batch in source:
+            yield batch
@@ -0,0 +1,207 @@
+"""
+Background writer for audit log entries.
+
+Requests hand finished audit rows to a bounded asyncio queue and return
+without touching the database. A single task drains the queue and writes
+batches with one multi-row INSERT (COPY on PostgreSQL) whenever
+AUDIT_BATCH_SIZE rows are waiting or AUDIT_FLUSH_INTERVAL_SECONDS has
+passed since the first row of the batch arrived. The batch's hourly rollup
+counters are updated in the same transaction. On shutdown the queue is
+drained before the process exits.
+
+When the queue is full, or the writer is not running (tests, scripts),
+submit() returns False and the caller writes the row inline instead; every
+rejection is counted as backpressure.
+"""
+import asyncio
+import json
+import logging
+from typing import Any
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.db.database import AsyncSessionLocal
+from src.db.models.audit_log import AuditLog
+from src.services.audit_rollup_service import add_to_rollups
+
+logger = logging.getLogger(__name__)
+
+AUDIT_COLUMNS = [
+    "id",
+    "org_id",
+    "actor_id",
+    "actor_email",
+    "action",
+    "resource_type",
+    "resource_id",
+    "details",
+    "ip_address",
+    "user_agent",
+    "created_at",
+]
+
+# Queued after the last row on shutdown
+_STOP = object()
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        use_copy: bool = True,
+    ):
+        self.session_factory = session_factory
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.use_copy = use_copy
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.backpressure = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0):
+        """Flush everything queued so far, then stop the writer task."""
+        if not self.running:
+            return
+        task, self._task = self._task, None
+        await self._queue.put(_STOP)
+        try:
+            await asyncio.wait_for(task, timeout)
+        except asyncio.TimeoutError:
+            logger.error("Audit writer did not drain in %.1fs; %d rows lost", timeout, self._queue.qsize())
+
+    def submit(self, row: dict[str, Any]) -> bool:
+        """Queue a row for writing. False means the caller must write it itself."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self.backpressure += 1
+            if self.backpressure == 1 or self.backpressure % 1000 == 0:
+                logger.warning(
+                    "Audit queue full (%d rows); writing inline (%d times so far)",
+                    self.max_queue, self.backpressure,
+                )
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "backpressure": self.backpressure,
+        }
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            first = await self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        row = await asyncio.wait_for(self._queue.get(), timeout)
+                    except asyncio.TimeoutError:
+                        break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+            try:
+                await self.flush(batch)
+            except Exception:
+                # Keep draining: a dead writer would silently push every later
+                # row onto the inline path
+                self.failed += len(batch)
+                logger.exception("Audit batch of %d rows lost", len(batch))
+
+    async def flush(self, rows: list[dict[str, Any]]):
+        """
+        Write a batch; if it fails, retry row by row so one bad row loses only
+        itself. COPY raises the driver's own errors, which SQLAlchemy does not
+        wrap, so any exception counts as a failed write.
+        """
+        try:
+            async with self.session_factory() as session:
+                await self._write(session, rows)
+                await add_to_rollups(session, rows)
+                await session.commit()
+        except Exception:
+            logger.exception("Audit batch of %d rows failed; retrying row by row", len(rows))
+            for row in rows:
+                try:
+                    async with self.session_factory() as session:
+                        await session.execute(insert(AuditLog), [row])
+                        await add_to_rollups(session, [row])
+                        await session.commit()
+                except Exception:
+                    self.failed += 1
+                    logger.exception("Dropping audit row %s", row.get("action"))
+                else:
+                    self.written += 1
+        else:
+            self.written += len(rows)
+        self.batches += 1
+
+    async def _write(self, session: AsyncSession, rows: list[dict[str, Any]]):
+        if self.use_copy and session.get_bind().dialect.name == "postgresql":
+            conn = await session.connection()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                AuditLog.__tablename__,
+                records=[_copy_record(row) for row in rows],
+                columns=AUDIT_COLUMNS,
+            )
+        else:
+            # executemany; SQLAlchemy batches it into multi-row INSERT statements
+            await session.execute(insert(AuditLog), rows)
+
+
+def _copy_record(row: dict[str, Any]) -> tuple:
+    details = row.get("details")
+    return tuple(
+        json.dumps(details) if column == "details" and details is not None else row.get(column)
+        for column in AUDIT_COLUMNS
+    )
+
+
+# Global audit writer instance, started in the app lifespan
+audit_writer = AuditWriter(
+    AsyncSessionLocal,
+    max_queue=settings.AUDIT_QUEUE_MAX_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    use_copy=settings.AUDIT_USE_COPY,
+)
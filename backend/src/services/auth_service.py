@@ -3,15 +3,15 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models.user import User
+from src.core.password_hasher import password_hasher
 from src.core.security import (
-    hash_password,
-    verify_password,
     create_tokens,
     decode_token,
     hash_token,
     verify_token_hash,
 )
 from src.core.exceptions import BadRequest, Unauthorized, NotFound
+from src.core.identity_cache import publish_user_change
 from src.services.audit_service import AuditService
 
 
@@ -29,7 +29,7 @@ class AuthService:
         user = User(
             email=payload.email,
             name=payload.name,
-            password_hash=hash_password(payload.password),
+            password_hash=await password_hasher.hash(payload.password),
         )
 
         self.db.add(user)
@@ -48,12 +48,16 @@ class AuthService:
         )
         user = res.scalar_one_or_none()
 
-        if not user or not verify_password(payload.password, user.password_hash):
+        if not user or not await password_hasher.verify(payload.password, user.password_hash):
             raise Unauthorized("Invalid email or password")
 
         if not user.is_active:
             raise Unauthorized("User account is disabled")
 
+        # Upgrade hashes made with a different cost factor while we have the password
+        if password_hasher.needs_rehash(user.password_hash):
+            user.password_hash = await password_hasher.hash(payload.password)
+
         tokens = create_tokens(str(user.id))
         # Store refresh token hash for rotation/invalidation
         user.refresh_token_hash = hash_token(tokens["refresh_token"])
@@ -99,7 +103,21 @@ class AuthService:
             raise NotFound("User not found")
 
         user.refresh_token_hash = None
+        await publish_user_change(self.db, user.id)
+        await self.db.commit()
+
+    async def set_active(self, user_id: str | UUID, is_active: bool) -> User:
+        """Enable or disable an account; disabling also revokes its refresh token."""
+        user = await self.get_user(user_id)
+        if not user:
+            raise NotFound("User not found")
+
+        user.is_active = is_active
+        if not is_active:
+            user.refresh_token_hash = None
+        await publish_user_change(self.db, user.id)
         await self.db.commit()
+        return user
 
     async def get_user(self, user_id: str | UUID) -> User | None:
         if isinstance(user_id, str):
@@ -0,0 +1,130 @@
+"""
+Per-org authorization versions and cross-worker cache invalidation.
+
+Every write that changes policies or role assignments bumps the org's
+version in the same transaction and publishes it on the pubsub channel.
+Each worker tracks the newest version it has seen per org and, separately,
+per org and scope, and evicts the matching in-process caches when a newer
+one for that scope arrives. Scopes share the org's counter, so a policy bump
+overtaking another worker's earlier RBAC bump must not hide the RBAC one.
+"""
+import json
+import uuid
+from typing import Callable
+from uuid import UUID
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.pubsub import PubSub, pubsub
+from src.core.security import utc_now
+from src.db.database import dialect_insert
+from src.db.models.authz_version import AuthzVersion
+
+AUTHZ_CHANNEL = "authz_invalidation"
+
+SCOPE_POLICY = "policy"
+SCOPE_RBAC = "rbac"
+
+# Identifies this process, so it can tell its own broadcasts from other workers'
+WORKER_ID = uuid.uuid4().hex
+
+# Receives the affected org, or None when every org must be evicted
+EvictHandler = Callable[[UUID | None], None]
+
+
+class AuthzVersionRegistry:
+    """Tracks the latest known authz version of each org in this process."""
+
+    def __init__(self):
+        self._versions: dict[UUID, int] = {}
+        # (org id, scope) -> newest version whose handlers have run
+        self._scope_versions: dict[tuple[UUID, str], int] = {}
+        self._handlers: dict[str, list[tuple[EvictHandler, bool]]] = {}
+
+    def on_change(self, scope: str, handler: EvictHandler, remote_only: bool = False):
+        """
+        Register a cache eviction handler for a scope. Caches that apply this
+        worker's own writes incrementally pass remote_only=True.
+        """
+        self._handlers.setdefault(scope, []).append((handler, remote_only))
+
+    def current(self, org_id: UUID) -> int | None:
+        return self._versions.get(org_id)
+
+    def observe(
+        self, org_id: UUID, version: int, scope: str, local: bool = False
+    ) -> bool:
+        """Record a version; evict caches for the scope if it is new for that scope."""
+        known = self._scope_versions.get((org_id, scope))
+        if known is not None and version <= known:
+            return False
+        self._scope_versions[(org_id, scope)] = version
+        if version > self._versions.get(org_id, 0):
+            self._versions[org_id] = version
+        for handler, remote_only in self._handlers.get(scope, []):
+            if not (local and remote_only):
+                handler(org_id)
+        return True
+
+    def seed(self, org_id: UUID, version: int):
+        """Record a version read from the database without evicting anything."""
+        known = self._versions.get(org_id)
+        if known is None or version > known:
+            self._versions[org_id] = version
+
+    def reset(self):
+        """Forget all versions and evict every cache (e.g. after missed messages)."""
+        self._versions.clear()
+        self._scope_versions.clear()
+        for handlers in self._handlers.values():
+            for handler, _ in handlers:
+                handler(None)
+
+    def handle_message(self, payload: str):
+        message = json.loads(payload)
+        self.observe(
+            UUID(message["org_id"]),
+            message["version"],
+            message["scope"],
+            local=message.get("origin") == WORKER_ID,
+        )
+
+    def stats(self) -> dict:
+        return {"orgs": len(self._versions)}
+
+
+async def bump_authz_version(
+    db: AsyncSession, org_id: UUID, scope: str, bus: PubSub | None = None
+) -> int:
+    """
+    Increment the org's authz version inside the caller's transaction and
+    publish it. Subscribers only see the new version once the caller commits.
+    """
+    insert = dialect_insert(db)
+    stmt = insert(AuthzVersion).values(org_id=org_id, version=1, updated_at=utc_now())
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AuthzVersion.org_id],
+        set_={"version": AuthzVersion.version + 1, "updated_at": utc_now()},
+    ).returning(AuthzVersion.version)
+    res = await db.execute(stmt)
+    version = res.scalar_one()
+
+    payload = json.dumps(
+        {"org_id": str(org_id), "version": version, "scope": scope, "origin": WORKER_ID}
+    )
+    await (bus or pubsub).publish(AUTHZ_CHANNEL, payload, db)
+    return version
+
+
+async def load_authz_version(db: AsyncSession, org_id: UUID) -> int:
+    """Read the org's current authz version (0 if it was never bumped)."""
+    res = await db.execute(
+        select(AuthzVersion.version).where(AuthzVersion.org_id == org_id)
+    )
+    return res.scalar_one_or_none() or 0
+
+
+# Global registry instance
+authz_versions = AuthzVersionRegistry()
+pubsub.subscribe(AUTHZ_CHANNEL, authz_versions.handle_message)
+pubsub.on_reconnect(authz_versions.reset)
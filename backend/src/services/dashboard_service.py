@@ -0,0 +1,164 @@
+"""
+Org dashboard statistics.
+
+All stats come from one statement. Running totals are read from the org's
+org_stats row and today's audit events from the hourly audit rollups; the
+request windows are one aggregate whose counters differ only in their
+FILTER clause, joined side by side with the rest. Adding a stat adds a
+FILTER term, not a round trip. Results are cached per org for a short TTL
+and dropped after writes that change them: policy and RBAC writes through
+the authz version hooks, and every org_stats adjustment through its pubsub
+channel.
+"""
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from uuid import UUID
+
+from sqlalchemy import func, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import settings
+from src.core.pubsub import pubsub
+from src.core.security import utc_now
+from src.db.models.access_request import AccessRequest, RequestStatus
+from src.db.models.audit_rollup import AuditRollup
+from src.db.models.org_stats import OrgStats
+from src.services.authz_version import SCOPE_POLICY, SCOPE_RBAC, authz_versions
+from src.services.org_stats_service import ORG_STATS_CHANNEL, OrgStatsService
+
+# org_stats counter -> DashboardStats field
+STAT_NAMES = {
+    "members": "total_members",
+    "roles": "total_roles",
+    "permissions": "total_permissions",
+    "policies": "total_policies",
+    "active_policies": "active_policies",
+    "pending_requests": "pending_requests",
+}
+
+
+class DashboardCache:
+    """Per-org dashboard stats with a TTL, bounded as an LRU."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # org id -> (expires at, stats)
+        self._entries: OrderedDict[UUID, tuple[float, dict]] = OrderedDict()
+        # Bumped by every invalidation, so stats computed before one are not stored after it
+        self.epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, org_id: UUID) -> dict | None:
+        entry = self._entries.get(org_id)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[org_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(org_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, org_id: UUID, stats: dict, epoch: int):
+        if not self.enabled or epoch != self.epoch:
+            return
+        self._entries[org_id] = (time.monotonic() + self.ttl_seconds, stats)
+        self._entries.move_to_end(org_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, org_id: UUID | None):
+        """Drop an org's stats; None drops every org."""
+        self.epoch += 1
+        if org_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(org_id, None)
+
+    def handle_message(self, payload: str):
+        self.invalidate(UUID(payload))
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class DashboardService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_stats(self, org_id: UUID) -> dict:
+        """Dashboard counters for the org, from the cache when fresh."""
+        stats = dashboard_cache.get(org_id)
+        if stats is None:
+            epoch = dashboard_cache.epoch
+            stats = await self.compute_stats(org_id)
+            dashboard_cache.put(org_id, stats, epoch)
+        return stats
+
+    async def compute_stats(self, org_id: UUID) -> dict:
+        now = utc_now()
+        week_ago = now - timedelta(days=7)
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        resolved_this_week = AccessRequest.resolved_at >= week_ago
+        requests = (
+            select(
+                func.count()
+                .filter(AccessRequest.created_at >= week_ago)
+                .label("requests_this_week"),
+                func.count()
+                .filter(AccessRequest.status == RequestStatus.APPROVED, resolved_this_week)
+                .label("approved_this_week"),
+                func.count()
+                .filter(AccessRequest.status == RequestStatus.DENIED, resolved_this_week)
+                .label("denied_this_week"),
+            )
+            .where(AccessRequest.org_id == org_id)
+            .subquery()
+        )
+        audit = (
+            select(func.coalesce(func.sum(AuditRollup.events), 0).label("audit_events_today"))
+            .where(AuditRollup.org_id == org_id, AuditRollup.hour >= today_start)
+            .subquery()
+        )
+
+        # Running totals are kept in org_stats and audit events in the rollups; only
+        # the request windows are counted here.
+        # Each aggregate is a single row and the joins put them side by side.
+        counters = [getattr(OrgStats, name).label(STAT_NAMES[name]) for name in STAT_NAMES]
+        stmt = (
+            select(*requests.c, *audit.c, *counters)
+            .select_from(requests)
+            .join(audit, true())
+            .outerjoin(OrgStats, OrgStats.org_id == org_id)
+        )
+        stats = dict((await self.db.execute(stmt)).one()._mapping)
+        if stats["total_members"] is None:
+            counts = await OrgStatsService(self.db).get(org_id)
+            stats.update({STAT_NAMES[name]: value for name, value in counts.items()})
+        return stats
+
+
+# Global dashboard cache instance
+dashboard_cache = DashboardCache(
+    settings.DASHBOARD_CACHE_TTL_SECONDS, settings.DASHBOARD_CACHE_MAX_ENTRIES
+)
+pubsub.subscribe(ORG_STATS_CHANNEL, dashboard_cache.handle_message)
+pubsub.on_reconnect(lambda: dashboard_cache.invalidate(None))
+authz_versions.on_change(SCOPE_POLICY, dashboard_cache.invalidate)
+authz_versions.on_change(SCOPE_RBAC, dashboard_cache.invalidate)
@@ -0,0 +1,90 @@
+"""
+Short-lived cache of authorization decisions.
+
+Entries are keyed by (org, principal, action, resource, context digest) and
+tagged with the org's authz version at evaluation time. Any policy or RBAC
+write bumps that version, so older entries stop matching without a scan and
+are dropped lazily when next looked up or when they fall off the LRU.
+
+Version messages from other workers arrive asynchronously, so a cached
+decision can outlive a remote write by up to the TTL. The cache is therefore
+off unless DECISION_CACHE_TTL_SECONDS is set.
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from uuid import UUID
+
+from src.config import settings
+
+DecisionKey = tuple[UUID, UUID, str, str, bytes]
+
+
+def decision_key(
+    org_id: UUID, principal_id: UUID, action: str, resource: str, context: dict | None
+) -> DecisionKey:
+    """Build a cache key; the context is reduced to a digest of its canonical JSON."""
+    encoded = json.dumps(context or {}, sort_keys=True, separators=(",", ":"), default=str)
+    digest = hashlib.blake2b(encoded.encode(), digest_size=16).digest()
+    return org_id, principal_id, action, resource, digest
+
+
+class DecisionCache:
+    """Bounded LRU of decisions with a TTL and hit/miss counters."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key -> (authz version, expires at, decision)
+        self._entries: OrderedDict[DecisionKey, tuple[int, float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, key: DecisionKey, version: int) -> dict | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        entry_version, expires_at, decision = entry
+        if entry_version != version or expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return decision
+
+    def put(self, key: DecisionKey, version: int, decision: dict):
+        self._entries[key] = (version, time.monotonic() + self.ttl_seconds, decision)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+# Global decision cache instance
+decision_cache = DecisionCache(
+    settings.DECISION_CACHE_TTL_SECONDS, settings.DECISION_CACHE_MAX_ENTRIES
+)
@@ -1,94 +1,394 @@
+import asyncio
 import json
-from uuid import UUID
+import logging
+import uuid
+import zlib
+from collections import deque
+from typing import Iterable
+
 from fastapi import WebSocket
-from typing import Any
 
+from src.config import settings
+from src.core.pubsub import PubSub, pubsub
 
-class ConnectionManager:
-    """Manages WebSocket connections for real-time notifications."""
+logger = logging.getLogger(__name__)
 
-    def __init__(self):
-        # Map of org_id -> list of (user_id, websocket) tuples
-        self.active_connections: dict[str, list[tuple[str, WebSocket]]] = {}
+NOTIFICATION_CHANNEL = "notifications"
 
-    async def connect(self, websocket: WebSocket, org_id: str, user_id: str):
-        """Accept and register a new WebSocket connection."""
-        await websocket.accept()
-        if org_id not in self.active_connections:
-            self.active_connections[org_id] = []
-        self.active_connections[org_id].append((user_id, websocket))
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_NOTIFY_PAYLOAD_BYTES = 7900
 
-    def disconnect(self, websocket: WebSocket, org_id: str, user_id: str):
-        """Remove a WebSocket connection."""
-        if org_id in self.active_connections:
-            self.active_connections[org_id] = [
-                (uid, ws)
-                for uid, ws in self.active_connections[org_id]
-                if ws != websocket
-            ]
-            if not self.active_connections[org_id]:
-                del self.active_connections[org_id]
-
-    async def send_personal_message(self, message: dict, websocket: WebSocket):
-        """Send a message to a specific WebSocket."""
+# Sent when a client stops reading and its send queue fills up (RFC 6455 "Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# Clients that offer this subprotocol get events as raw-deflate compressed binary frames
+DEFLATE_SUBPROTOCOL = "authz.deflate"
+
+
+class Frame:
+    """
+    A notification encoded once and shared by every recipient.
+
+    Broadcasting used to call send_json per socket, re-encoding the same
+    event for each one. The JSON text and the ASGI send message carrying it
+    are built here once; the deflated form is built on first use, so it is
+    also paid once per event no matter how many compressed connections
+    receive it.
+    """
+
+    __slots__ = ("text", "message", "_deflated")
+
+    def __init__(self, message: dict):
+        self.text = json.dumps(message, separators=(",", ":"), default=str)
+        self.message = {"type": "websocket.send", "text": self.text}
+        self._deflated: dict | None = None
+
+    @property
+    def deflated(self) -> dict:
+        if self._deflated is None:
+            compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+            data = compressor.compress(self.text.encode()) + compressor.flush()
+            self._deflated = {"type": "websocket.send", "bytes": data}
+        return self._deflated
+
+
+class Connection:
+    """
+    One WebSocket with its own bounded send queue.
+
+    A writer task drains the queue, so a broadcast only enqueues and never
+    waits for the socket. If the client falls `max_queue` messages behind it
+    is disconnected with SLOW_CONSUMER_CLOSE_CODE instead of holding up the
+    other recipients or growing memory without bound. The queue is a deque
+    plus one wakeup future: asyncio.Queue costs several loop callbacks per
+    item, which dominates fan-out to thousands of sockets.
+    """
+
+    def __init__(
+        self,
+        manager: "ConnectionManager",
+        websocket: WebSocket,
+        org_id: str,
+        user_id: str,
+        max_queue: int,
+        deflate: bool = False,
+    ):
+        self.manager = manager
+        self.websocket = websocket
+        self.org_id = org_id
+        self.user_id = user_id
+        self.deflate = deflate
+        self.closed = False
+        self.max_queue = max_queue
+        self._pending: deque = deque()
+        self._wakeup: asyncio.Future | None = None
+        self._writer: asyncio.Task | None = None
+
+    def start(self):
+        self._writer = asyncio.create_task(self._write_forever())
+
+    def send(self, message: Frame | str) -> bool:
+        """Queue an encoded event (or raw text) for this socket; False if it was dropped."""
+        if self.closed:
+            return False
+        if len(self._pending) >= self.max_queue:
+            self.manager.slow_consumers += 1
+            logger.warning("Closing slow WebSocket consumer %s in org %s", self.user_id, self.org_id)
+            self.close(SLOW_CONSUMER_CLOSE_CODE, "Send queue overflow")
+            return False
+        self._pending.append(message)
+        wakeup = self._wakeup
+        if wakeup is not None:
+            self._wakeup = None
+            if not wakeup.done():
+                wakeup.set_result(None)
+        return True
+
+    def close(self, code: int = 1000, reason: str | None = None):
+        """Unregister, drop anything still queued and close the socket."""
+        if self.closed:
+            return
+        self.closed = True
+        self.manager.disconnect(self)
+        self._pending.clear()
+        if self._writer is not None:
+            self._writer.cancel()
+        # The loop only keeps weak references to tasks; the manager holds this
+        # one until the close handshake is done
+        task = asyncio.create_task(self._close_socket(code, reason))
+        self.manager.closing.add(task)
+        task.add_done_callback(self.manager.closing.discard)
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def _write_forever(self):
+        loop = asyncio.get_running_loop()
+        send = self.websocket.send
+        pending = self._pending
+        try:
+            while True:
+                if not pending:
+                    self._wakeup = loop.create_future()
+                    await self._wakeup
+                    continue
+                message = pending.popleft()
+                if isinstance(message, str):
+                    await send({"type": "websocket.send", "text": message})
+                elif self.deflate:
+                    await send(message.deflated)
+                else:
+                    await send(message.message)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The client went away; the endpoint's receive loop cleans up
+            self.closed = True
+            self.manager.disconnect(self)
+
+    async def _close_socket(self, code: int, reason: str | None):
         try:
-            await websocket.send_json(message)
+            await asyncio.wait_for(self.websocket.close(code=code, reason=reason), timeout=5)
         except Exception:
             pass  # Connection may be closed
 
-    async def broadcast_to_org(self, org_id: str, message: dict):
-        """Broadcast a message to all users in an organization."""
-        if org_id not in self.active_connections:
-            return
 
-        for user_id, websocket in self.active_connections[org_id]:
-            try:
-                await websocket.send_json(message)
-            except Exception:
-                pass  # Connection may be closed
+class ConnectionManager:
+    """Manages WebSocket connections for real-time notifications."""
 
-    async def broadcast_to_user(self, org_id: str, user_id: str, message: dict):
-        """Send a message to a specific user in an organization."""
-        if org_id not in self.active_connections:
+    def __init__(self, max_queue: int = 256):
+        self.max_queue = max_queue
+        # org_id -> user_id -> that user's open connections
+        self.active_connections: dict[str, dict[str, set[Connection]]] = {}
+        # Sockets still running their close handshake
+        self.closing: set[asyncio.Task] = set()
+        self.slow_consumers = 0
+
+    async def connect(
+        self, websocket: WebSocket, org_id: str, user_id: str, deflate: bool = False
+    ) -> Connection:
+        """Accept and register a new WebSocket connection."""
+        await websocket.accept(subprotocol=DEFLATE_SUBPROTOCOL if deflate else None)
+        connection = Connection(self, websocket, org_id, user_id, self.max_queue, deflate)
+        self.active_connections.setdefault(org_id, {}).setdefault(user_id, set()).add(connection)
+        connection.start()
+        return connection
+
+    def disconnect(self, connection: Connection):
+        """Remove a WebSocket connection."""
+        users = self.active_connections.get(connection.org_id)
+        if users is None:
+            return
+        connections = users.get(connection.user_id)
+        if connections is None:
             return
+        connections.discard(connection)
+        if not connections:
+            del users[connection.user_id]
+            if not users:
+                del self.active_connections[connection.org_id]
 
-        for uid, websocket in self.active_connections[org_id]:
-            if uid == user_id:
-                try:
-                    await websocket.send_json(message)
-                except Exception:
-                    pass
+    async def send_personal_message(self, message: dict | Frame, connection: Connection):
+        """Send a message to a specific connection."""
+        connection.send(_frame(message))
+
+    async def broadcast_to_org(self, org_id: str, message: dict | Frame):
+        """Broadcast a message to all users in an organization."""
+        self.deliver(org_id, _frame(message))
+
+    async def broadcast_to_user(self, org_id: str, user_id: str, message: dict | Frame):
+        """Send a message to a specific user in an organization."""
+        self.deliver(org_id, _frame(message), [user_id])
 
     async def broadcast_to_admins(
-        self, org_id: str, admin_ids: list[str], message: dict
+        self, org_id: str, admin_ids: list[str], message: dict | Frame
     ):
         """Send a message to specific admin users in an organization."""
-        if org_id not in self.active_connections:
-            return
+        self.deliver(org_id, _frame(message), admin_ids)
 
-        for user_id, websocket in self.active_connections[org_id]:
-            if user_id in admin_ids:
-                try:
-                    await websocket.send_json(message)
-                except Exception:
-                    pass
+    def deliver(self, org_id: str, frame: Frame, user_ids: Iterable[str] | None = None):
+        """Queue a frame for the given users of an org (all of them if None) on this worker."""
+        users = self.active_connections.get(org_id)
+        if not users:
+            return
+        if user_ids is None:
+            targets = list(users.values())
+        else:
+            targets = [users[user_id] for user_id in set(user_ids) if user_id in users]
+        for connections in targets:
+            self._send_all(connections, frame)
 
     def get_connection_count(self, org_id: str | None = None) -> int:
         """Get the number of active connections."""
         if org_id:
-            return len(self.active_connections.get(org_id, []))
-        return sum(len(conns) for conns in self.active_connections.values())
+            return sum(len(conns) for conns in self.active_connections.get(org_id, {}).values())
+        return sum(
+            len(conns) for users in self.active_connections.values() for conns in users.values()
+        )
+
+    def stats(self) -> dict:
+        return {
+            "connections": self.get_connection_count(),
+            "orgs": len(self.active_connections),
+            "closing": len(self.closing),
+            "max_queue": self.max_queue,
+            "slow_consumers": self.slow_consumers,
+        }
+
+    def _send_all(self, connections: set[Connection], frame: Frame):
+        # Copy: an overflowing connection removes itself while we iterate
+        for connection in list(connections):
+            connection.send(frame)
+
+
+def _frame(message: dict | Frame) -> Frame:
+    return message if isinstance(message, Frame) else Frame(message)
 
 
 # Global connection manager instance
-manager = ConnectionManager()
+manager = ConnectionManager(max_queue=settings.WS_SEND_QUEUE_SIZE)
+
+
+class NotificationBus:
+    """
+    Carries notifications between workers so each delivers to its own sockets.
+
+    Events are published on a PubSub channel (LISTEN/NOTIFY on PostgreSQL,
+    in-process otherwise; any PubSub backend works). Events published within
+    `batch_seconds` of each other go out as one message, split to stay under
+    the NOTIFY payload limit. Every event carries an id and each worker
+    remembers the last `dedup_size` ids, so an event seen twice (the
+    publishing worker hears its own NOTIFY after delivering locally) reaches
+    each socket once.
+    """
+
+    def __init__(
+        self,
+        bus: PubSub,
+        manager: ConnectionManager,
+        batch_seconds: float = 0.01,
+        batch_size: int = 100,
+        dedup_size: int = 10_000,
+    ):
+        self.bus = bus
+        self.manager = manager
+        self.batch_seconds = batch_seconds
+        self.batch_size = batch_size
+        self.dedup_size = dedup_size
+        self._pending: list[dict] = []
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._seen: dict[str, None] = {}
+        self.published = 0
+        self.batches = 0
+        self.delivered = 0
+        self.duplicates = 0
+        self.oversized = 0
+        bus.subscribe(NOTIFICATION_CHANNEL, self.handle_message)
+
+    async def publish(self, org_id: str, message: dict, user_ids: list[str] | None = None):
+        """Queue an event for the given users of an org (all of them if None) on every worker."""
+        self._pending.append({
+            "id": uuid.uuid4().hex,
+            "org_id": org_id,
+            "user_ids": user_ids,
+            "event": message,
+        })
+        self.published += 1
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(self.batch_seconds, self._flush_later)
+
+    async def flush(self):
+        """Publish everything queued so far."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        events, self._pending = self._pending, []
+        for payload in self._payloads(events):
+            self.batches += 1
+            try:
+                await self.bus.publish(NOTIFICATION_CHANNEL, payload)
+            except Exception:
+                logger.exception("Publishing notifications failed; delivering locally only")
+                self.handle_message(payload)
+
+    async def stop(self):
+        await self.flush()
+
+    def _flush_later(self):
+        self._flush_handle = None
+        self._flush_task = asyncio.create_task(self.flush())
+
+    def handle_message(self, payload: str):
+        """Deliver a batch received from the bus to this worker's sockets."""
+        for envelope in json.loads(payload):
+            event_id = envelope["id"]
+            if event_id in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen[event_id] = None
+            if len(self._seen) > self.dedup_size:
+                del self._seen[next(iter(self._seen))]
+            self.manager.deliver(envelope["org_id"], Frame(envelope["event"]), envelope["user_ids"])
+            self.delivered += 1
+
+    def stats(self) -> dict:
+        return {
+            "published": self.published,
+            "batches": self.batches,
+            "delivered": self.delivered,
+            "duplicates": self.duplicates,
+            "oversized": self.oversized,
+            "pending": len(self._pending),
+        }
+
+    def _payloads(self, events: list[dict]) -> list[str]:
+        """Pack events into as few payloads as fit under the NOTIFY size limit."""
+        payloads = []
+        batch: list[str] = []
+        size = 2
+        for envelope in events:
+            encoded = json.dumps(envelope, separators=(",", ":"), default=str)
+            if len(encoded.encode()) + 2 > MAX_NOTIFY_PAYLOAD_BYTES:
+                # Too big for NOTIFY on its own; only this worker's sockets get it
+                self.oversized += 1
+                logger.warning("Notification %s too large for the bus", envelope["id"])
+                self.handle_message(f"[{encoded}]")
+                continue
+            if batch and size + len(encoded.encode()) + 1 > MAX_NOTIFY_PAYLOAD_BYTES:
+                payloads.append(f"[{','.join(batch)}]")
+                batch, size = [], 2
+            batch.append(encoded)
+            size += len(encoded.encode()) + 1
+        if batch:
+            payloads.append(f"[{','.join(batch)}]")
+        return payloads
+
+
+# Global notification bus instance
+notification_bus = NotificationBus(
+    pubsub,
+    manager,
+    batch_seconds=settings.NOTIFICATION_BATCH_SECONDS,
+    batch_size=settings.NOTIFICATION_BATCH_SIZE,
+    dedup_size=settings.NOTIFICATION_DEDUP_SIZE,
+)
 
 
 class NotificationService:
-    """Service for sending notifications through WebSockets."""
+    """
+    Service for sending notifications through WebSockets.
+
+    Events go through the notification bus so clients connected to any
+    worker receive them.
+    """
 
     def __init__(self):
         self.manager = manager
+        self.bus = notification_bus
 
     async def notify_new_request(
         self, org_id: str, request_id: str, requester_name: str, admin_ids: list[str]
@@ -102,7 +402,7 @@ class NotificationService:
                 "message": f"New access request from {requester_name}",
             },
         }
-        await self.manager.broadcast_to_admins(org_id, admin_ids, message)
+        await self.bus.publish(org_id, message, admin_ids)
 
     async def notify_request_resolved(
         self,
@@ -122,7 +422,7 @@ class NotificationService:
                 "message": f"Your access request was {status}",
             },
         }
-        await self.manager.broadcast_to_user(org_id, requester_id, message)
+        await self.bus.publish(org_id, message, [requester_id])
 
     async def notify_pending_count(self, org_id: str, count: int, admin_ids: list[str]):
         """Update admins with the pending request count."""
@@ -132,7 +432,7 @@ class NotificationService:
                 "count": count,
             },
         }
-        await self.manager.broadcast_to_admins(org_id, admin_ids, message)
+        await self.bus.publish(org_id, message, admin_ids)
 
     async def notify_role_assigned(
         self, org_id: str, user_id: str, role_name: str, assigned_by: str
@@ -146,7 +446,7 @@ class NotificationService:
                 "message": f"You were assigned the role: {role_name}",
             },
         }
-        await self.manager.broadcast_to_user(org_id, user_id, message)
+        await self.bus.publish(org_id, message, [user_id])
 
     async def notify_role_revoked(
         self, org_id: str, user_id: str, role_name: str, revoked_by: str
@@ -160,4 +460,4 @@ class NotificationService:
                 "message": f"Your role was revoked: {role_name}",
             },
         }
-        await self.manager.broadcast_to_user(org_id, user_id, message)
+        await self.bus.publish(org_id, message, [user_id])
@@ -1,15 +1,17 @@
 import secrets
 from datetime import timedelta
 from uuid import UUID
-from sqlalchemy import select
+from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.db.models.organization import Organization, OrgMembership, OrgMemberRole
 from src.db.models.user import User
 from src.db.models.invite import OrgInvite, InviteStatus
 from src.core.exceptions import NotFound, Conflict, Forbidden, BadRequest
+from src.core.identity_cache import publish_user_change
 from src.core.security import utc_now
 from src.services.audit_service import AuditService
+from src.services.org_stats_service import OrgStatsService
 
 
 class OrgService:
@@ -33,6 +35,8 @@ class OrgService:
             role=OrgMemberRole.OWNER,
         )
         self.db.add(membership)
+        await publish_user_change(self.db, user_id)
+        await OrgStatsService(self.db).recount(org.id)
         await self.db.commit()
         await self.db.refresh(org)
         return org, membership
@@ -68,6 +72,24 @@ class OrgService:
         )
         return res.scalar_one_or_none()
 
+    async def get_user_with_membership(
+        self, org_id: UUID, user_id: UUID
+    ) -> tuple[User | None, OrgMembership | None]:
+        """A user and their membership in `org_id`, in one query."""
+        res = await self.db.execute(
+            select(User, OrgMembership)
+            .outerjoin(
+                OrgMembership,
+                and_(
+                    OrgMembership.user_id == User.id,
+                    OrgMembership.org_id == org_id,
+                ),
+            )
+            .where(User.id == user_id)
+        )
+        row = res.first()
+        return (row[0], row[1]) if row else (None, None)
+
     async def list_members(self, org_id: UUID):
         res = await self.db.execute(
             select(User, OrgMembership)
@@ -85,6 +107,8 @@ class OrgService:
 
         membership = OrgMembership(user_id=user_id, org_id=org_id, role=role)
         self.db.add(membership)
+        await publish_user_change(self.db, user_id)
+        await OrgStatsService(self.db).adjust(org_id, members=1)
         await self.db.commit()
         await self.db.refresh(membership)
         return membership
@@ -117,6 +141,8 @@ class OrgService:
                 raise Forbidden("Cannot remove the last owner")
 
         await self.db.delete(membership)
+        await publish_user_change(self.db, user_id)
+        await OrgStatsService(self.db).adjust(org_id, members=-1)
         await self.db.commit()
 
     async def update_org(self, org_id: UUID, payload) -> Organization:
@@ -132,6 +158,8 @@ class OrgService:
             if existing and existing.id != org_id:
                 raise Conflict("Organization with this slug already exists")
             org.slug = payload.slug
+        if "audit_retention_days" in payload.model_fields_set:
+            org.audit_retention_days = payload.audit_retention_days
 
         await self.db.commit()
         await self.db.refresh(org)
@@ -148,6 +176,7 @@ class OrgService:
         )
         for membership in memberships.scalars().all():
             await self.db.delete(membership)
+            await publish_user_change(self.db, membership.user_id)
 
         await self.db.delete(org)
         await self.db.commit()
@@ -241,6 +270,8 @@ class OrgService:
 
         # Mark invite as accepted
         invite.status = InviteStatus.ACCEPTED
+        await publish_user_change(self.db, user_id)
+        await OrgStatsService(self.db).adjust(invite.org_id, members=1)
         await self.db.commit()
         await self.db.refresh(membership)
         return membership
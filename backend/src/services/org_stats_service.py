@@ -0,0 +1,254 @@
+"""
+Per-org counters in the org_stats table.
+
+Services adjust the counters with a relative UPDATE in the same transaction
+as the write being counted, so readers get members, roles, permissions,
+policies and pending requests from one primary-key lookup instead of
+count(*) scans. An org without a row (created before the table, or by a
+script) is recounted the first time it is adjusted or read.
+
+Anything that bypasses the services can still make the counters drift, so a
+background job periodically recounts every org and repairs rows that
+disagree.
+"""
+import asyncio
+import logging
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.config import settings
+from src.core.pubsub import pubsub
+from src.core.security import utc_now
+from src.db.database import AsyncSessionLocal, dialect_insert
+from src.db.models.access_request import AccessRequest, RequestStatus
+from src.db.models.org_stats import OrgStats
+from src.db.models.organization import Organization, OrgMembership
+from src.db.models.permission import Permission
+from src.db.models.policy import Policy
+from src.db.models.role import Role
+
+logger = logging.getLogger(__name__)
+
+# Carries the id of an org whose counters changed, once the change commits
+ORG_STATS_CHANNEL = "org_stats_changed"
+
+COUNTERS = ("members", "roles", "permissions", "policies", "active_policies", "pending_requests")
+
+# pg_try_advisory_xact_lock key, so only one worker reconciles at a time
+RECONCILE_LOCK_ID = 0x6F726773
+
+
+def pending_delta(old: RequestStatus | None, new: RequestStatus) -> int:
+    """Change in the pending request count when a request moves from `old` to `new`."""
+    return (new == RequestStatus.PENDING) - (old == RequestStatus.PENDING)
+
+
+class OrgStatsService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def adjust(self, org_id: UUID, **deltas: int):
+        """Add deltas to the org's counters inside the caller's transaction."""
+        deltas = {name: delta for name, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        res = await self.db.execute(
+            update(OrgStats)
+            .where(OrgStats.org_id == org_id)
+            .values(
+                {
+                    **{name: getattr(OrgStats, name) + delta for name, delta in deltas.items()},
+                    "updated_at": utc_now(),
+                }
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if res.rowcount == 0:
+            # The recount sees the caller's pending write through autoflush
+            await self.recount(org_id)
+        await self.publish_change(org_id)
+
+    async def record_transition(self, org_id: UUID, old: RequestStatus | None, new: RequestStatus):
+        """
+        Count an access request moving from `old` to `new`. The change is
+        published even when the pending count stays the same, since the
+        dashboard's weekly approved and denied windows read the requests.
+        """
+        delta = pending_delta(old, new)
+        if delta:
+            await self.adjust(org_id, pending_requests=delta)
+        else:
+            await self.publish_change(org_id)
+
+    async def publish_change(self, org_id: UUID):
+        """Tell every worker the org's stats changed, once the caller commits."""
+        await pubsub.publish(ORG_STATS_CHANNEL, str(org_id), self.db)
+
+    async def get(self, org_id: UUID) -> dict:
+        """The org's counters, recounted and stored first if it has no row yet."""
+        res = await self.db.execute(
+            select(*(getattr(OrgStats, name) for name in COUNTERS)).where(OrgStats.org_id == org_id)
+        )
+        row = res.one_or_none()
+        if row is None:
+            counts = await self.recount(org_id)
+            await self.db.commit()
+            return counts
+        return dict(row._mapping)
+
+    async def recount(self, org_id: UUID) -> dict:
+        """Count the org's rows and overwrite its counters with the result."""
+        res = await self.db.execute(_counts_query(org_id))
+        row = res.one()
+        counts = {name: getattr(row, name) for name in COUNTERS}
+        insert = dialect_insert(self.db)
+        stmt = insert(OrgStats).values(org_id=org_id, updated_at=utc_now(), **counts)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrgStats.org_id],
+            set_={**counts, "updated_at": utc_now()},
+        )
+        await self.db.execute(stmt)
+        return counts
+
+    async def reconcile(self) -> int:
+        """Recount every org and repair counters that drifted; returns the number repaired."""
+        if self.db.get_bind().dialect.name == "postgresql":
+            locked = await self.db.scalar(select(func.pg_try_advisory_xact_lock(RECONCILE_LOCK_ID)))
+            if not locked:
+                return 0
+
+        # Counts and stored counters come from one statement, so they share a snapshot
+        counts = _counts_query().subquery()
+        stored = [getattr(OrgStats, name).label(f"stored_{name}") for name in COUNTERS]
+        res = await self.db.execute(
+            select(counts, OrgStats.org_id.label("stored_org_id"), *stored)
+            .outerjoin(OrgStats, OrgStats.org_id == counts.c.org_id)
+        )
+
+        repaired = 0
+        insert = dialect_insert(self.db)
+        for row in res.all():
+            actual = {name: getattr(row, name) for name in COUNTERS}
+            if row.stored_org_id is None:
+                await self.db.execute(
+                    insert(OrgStats)
+                    .values(org_id=row.org_id, updated_at=utc_now(), **actual)
+                    .on_conflict_do_nothing(index_elements=[OrgStats.org_id])
+                )
+                repaired += 1
+                continue
+            seen = {name: getattr(row, f"stored_{name}") for name in COUNTERS}
+            if seen == actual:
+                continue
+            logger.warning("org_stats drift for org %s: %s, counted %s", row.org_id, seen, actual)
+            # Only overwrite what we compared against; a write committed since then
+            # leaves the row alone until the next run
+            await self.db.execute(
+                update(OrgStats)
+                .where(
+                    OrgStats.org_id == row.org_id,
+                    *(getattr(OrgStats, name) == value for name, value in seen.items()),
+                )
+                .values(updated_at=utc_now(), **actual)
+                .execution_options(synchronize_session=False)
+            )
+            await self.publish_change(row.org_id)
+            repaired += 1
+        await self.db.commit()
+        return repaired
+
+
+def _counts_query(org_id: UUID | None = None):
+    """Actual counter values per org, one grouped aggregate per table."""
+
+    def per_org(model, *columns):
+        stmt = select(model.org_id, *columns).group_by(model.org_id)
+        if org_id is not None:
+            stmt = stmt.where(model.org_id == org_id)
+        return stmt.subquery()
+
+    members = per_org(OrgMembership, func.count().label("members"))
+    roles = per_org(Role, func.count().label("roles"))
+    permissions = per_org(Permission, func.count().label("permissions"))
+    policies = per_org(
+        Policy,
+        func.count().label("policies"),
+        func.count().filter(Policy.is_active == True).label("active_policies"),
+    )
+    requests = per_org(
+        AccessRequest,
+        func.count().filter(AccessRequest.status == RequestStatus.PENDING).label("pending_requests"),
+    )
+
+    aggregates = [
+        (members, "members"),
+        (roles, "roles"),
+        (permissions, "permissions"),
+        (policies, "policies"),
+        (policies, "active_policies"),
+        (requests, "pending_requests"),
+    ]
+    stmt = select(
+        Organization.id.label("org_id"),
+        *(func.coalesce(agg.c[name], 0).label(name) for agg, name in aggregates),
+    )
+    for agg in (members, roles, permissions, policies, requests):
+        stmt = stmt.outerjoin(agg, agg.c.org_id == Organization.id)
+    if org_id is not None:
+        stmt = stmt.where(Organization.id == org_id)
+    return stmt
+
+
+class OrgStatsReconciler:
+    """Runs OrgStatsService.reconcile every `interval` seconds in the background."""
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: asyncio.Task | None = None
+        self.runs = 0
+        self.repaired = 0
+
+    async def start(self):
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> int:
+        async with self.session_factory() as session:
+            repaired = await OrgStatsService(session).reconcile()
+        self.runs += 1
+        self.repaired += repaired
+        return repaired
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "interval_seconds": self.interval,
+            "runs": self.runs,
+            "repaired": self.repaired,
+        }
+
+    async def _run_forever(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("org_stats reconciliation failed")
+
+
+# Global reconciler instance, started in the app lifespan
+org_stats_reconciler = OrgStatsReconciler(
+    AsyncSessionLocal, settings.ORG_STATS_RECONCILE_INTERVAL_SECONDS
+)
@@ -0,0 +1,206 @@
+"""
+Materialized effective permissions per (org, user).
+
+Each cached principal holds the ids of its roles and the frozenset of
+permission names those roles grant, so a permission check is a single hash
+lookup. RBAC writes update affected entries in place using a per-org map of
+role -> permission names; entries that cannot be updated safely are evicted
+and reloaded on next use.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from uuid import UUID
+
+from src.config import settings
+
+
+@dataclass(frozen=True, slots=True)
+class PrincipalPermissions:
+    role_ids: frozenset[UUID]
+    permissions: frozenset[str]
+
+
+Key = tuple[UUID, UUID]
+
+
+class PermissionCache:
+    """Bounded LRU of materialized permission sets with size and hit metrics."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Key, PrincipalPermissions] = OrderedDict()
+        # org_id -> role_id -> permission names (complete for every role held)
+        self._roles: dict[UUID, dict[UUID, frozenset[str]]] = {}
+        # role_id -> cached principals holding it
+        self._members: dict[UUID, set[Key]] = {}
+        # org_id -> cached principals of the org
+        self._org_keys: dict[UUID, set[Key]] = {}
+        self._generations: dict[UUID, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, org_id: UUID, user_id: UUID) -> PrincipalPermissions | None:
+        key = (org_id, user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def generation(self, org_id: UUID) -> tuple[int, int]:
+        return self._epoch, self._generations.get(org_id, 0)
+
+    def put(
+        self,
+        org_id: UUID,
+        user_id: UUID,
+        role_permissions: dict[UUID, frozenset[str]],
+        generation: tuple[int, int],
+    ) -> PrincipalPermissions:
+        """
+        Materialize a principal from its roles' permissions. The entry is only
+        stored if no RBAC write touched the org since `generation` was taken.
+        """
+        entry = PrincipalPermissions(
+            role_ids=frozenset(role_permissions),
+            permissions=frozenset().union(*role_permissions.values()),
+        )
+        if self.generation(org_id) != generation:
+            return entry
+
+        roles = self._roles.setdefault(org_id, {})
+        roles.update(role_permissions)
+        self._store((org_id, user_id), entry)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return entry
+
+    # Incremental maintenance, called after the corresponding write commits
+
+    def role_permissions_added(self, org_id: UUID, role_id: UUID, names: set[str]):
+        self._touch(org_id)
+        roles = self._roles.get(org_id, {})
+        if role_id not in roles:
+            return
+        roles[role_id] = roles[role_id] | names
+        for key in list(self._members.get(role_id, ())):
+            entry = self._entries[key]
+            self._store(key, PrincipalPermissions(entry.role_ids, entry.permissions | names))
+
+    def role_permissions_removed(self, org_id: UUID, role_id: UUID, names: set[str]):
+        self._touch(org_id)
+        roles = self._roles.get(org_id, {})
+        if role_id not in roles:
+            return
+        roles[role_id] = roles[role_id] - names
+        for key in list(self._members.get(role_id, ())):
+            self._rematerialize(key, self._entries[key].role_ids)
+
+    def role_assigned(self, org_id: UUID, user_id: UUID, role_id: UUID):
+        self._touch(org_id)
+        entry = self._entries.get((org_id, user_id))
+        if entry is None:
+            return
+        self._rematerialize((org_id, user_id), entry.role_ids | {role_id})
+
+    def role_revoked(self, org_id: UUID, user_id: UUID, role_id: UUID):
+        self._touch(org_id)
+        entry = self._entries.get((org_id, user_id))
+        if entry is None:
+            return
+        self._rematerialize((org_id, user_id), entry.role_ids - {role_id})
+
+    def role_deleted(self, org_id: UUID, role_id: UUID):
+        self._touch(org_id)
+        for key in list(self._members.get(role_id, ())):
+            self._rematerialize(key, self._entries[key].role_ids - {role_id})
+        self._roles.get(org_id, {}).pop(role_id, None)
+
+    def permission_deleted(self, org_id: UUID, name: str):
+        self._touch(org_id)
+        roles = self._roles.get(org_id, {})
+        affected: set[Key] = set()
+        for role_id, names in roles.items():
+            if name in names:
+                roles[role_id] = names - {name}
+                affected.update(self._members.get(role_id, ()))
+        for key in affected:
+            self._rematerialize(key, self._entries[key].role_ids)
+
+    def evict(self, org_id: UUID | None):
+        """Eviction hook for RBAC changes made by other workers; None evicts everything."""
+        if org_id is None:
+            self._epoch += 1
+            self._entries.clear()
+            self._roles.clear()
+            self._members.clear()
+            self._org_keys.clear()
+            self._generations.clear()
+            return
+        self._touch(org_id)
+        for key in list(self._org_keys.get(org_id, ())):
+            self._remove(key)
+        self._roles.pop(org_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "orgs": len(self._roles),
+            "roles": sum(len(r) for r in self._roles.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _touch(self, org_id: UUID):
+        self._generations[org_id] = self._generations.get(org_id, 0) + 1
+
+    def _rematerialize(self, key: Key, role_ids: frozenset[UUID]):
+        roles = self._roles.get(key[0], {})
+        if not role_ids.issubset(roles):
+            # A role we never loaded; reload this principal on next use
+            self._remove(key)
+            return
+        permissions = frozenset().union(*(roles[r] for r in role_ids))
+        self._store(key, PrincipalPermissions(role_ids, permissions))
+
+    def _store(self, key: Key, entry: PrincipalPermissions):
+        previous = self._entries.get(key)
+        if previous is not None:
+            for role_id in previous.role_ids - entry.role_ids:
+                self._discard_member(role_id, key)
+        for role_id in entry.role_ids:
+            self._members.setdefault(role_id, set()).add(key)
+        self._org_keys.setdefault(key[0], set()).add(key)
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+
+    def _remove(self, key: Key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for role_id in entry.role_ids:
+            self._discard_member(role_id, key)
+        org_keys = self._org_keys.get(key[0])
+        if org_keys is not None:
+            org_keys.discard(key)
+            if not org_keys:
+                del self._org_keys[key[0]]
+
+    def _discard_member(self, role_id: UUID, key: Key):
+        members = self._members.get(role_id)
+        if members is not None:
+            members.discard(key)
+            if not members:
+                del self._members[role_id]
+
+
+# Global permission cache instance
+permission_cache = PermissionCache(settings.PERMISSION_CACHE_MAX_ENTRIES)
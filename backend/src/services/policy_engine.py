@@ -0,0 +1,345 @@
+"""
+Compiled, in-memory policy decision engine.
+
+Policies are parsed once per organization into immutable structures with
+pre-compiled glob regexes and pre-bound condition predicates, so evaluating
+a request is a pure in-memory walk with no database access.
+
+Action and resource patterns are indexed per org: literal patterns live in a
+hash map, trailing-star prefixes like "documents:*" in a character trie, and
+only the remaining wildcards are scanned. Evaluation therefore only visits
+policies that can match the requested (action, resource) pair.
+"""
+import fnmatch
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+from uuid import UUID
+
+from src.db.models.policy import Policy
+
+
+Predicate = Callable[[dict], bool]
+
+CONDITION_OPERATORS = {"eq", "neq", "in", "not_in", "gt", "gte", "lt", "lte"}
+
+WILDCARD_CHARS = frozenset("*?[")
+
+
+def is_literal_pattern(pattern: str) -> bool:
+    """Return True if a glob pattern contains no wildcard characters."""
+    return not any(ch in WILDCARD_CHARS for ch in pattern)
+
+
+def is_prefix_pattern(pattern: str) -> bool:
+    """Return True for patterns like "documents:*" (a literal followed by one star)."""
+    return pattern.endswith("*") and is_literal_pattern(pattern[:-1])
+
+
+class _TrieNode:
+    __slots__ = ("children", "positions")
+
+    def __init__(self):
+        self.children: dict[str, "_TrieNode"] = {}
+        self.positions: list[int] = []
+
+
+class PatternIndex:
+    """
+    Maps a value (an action or a resource) to the positions of the policies
+    with at least one glob pattern matching it.
+    """
+
+    def __init__(self):
+        self._match_all: set[int] = set()
+        self._literals: dict[str, set[int]] = {}
+        self._prefixes = _TrieNode()
+        self._residual: dict[str, set[int]] = {}
+        self._residual_regexes: list[tuple[re.Pattern, set[int]]] = []
+        self._frozen_match_all: frozenset[int] = frozenset()
+
+    def add(self, position: int, patterns: Iterable[str] | None):
+        """Index a policy's patterns. An empty list or a bare "*" matches everything."""
+        patterns = list(patterns or [])
+        if not patterns or "*" in patterns:
+            self._match_all.add(position)
+            return
+
+        for pattern in patterns:
+            if is_literal_pattern(pattern):
+                self._literals.setdefault(pattern, set()).add(position)
+            elif is_prefix_pattern(pattern):
+                node = self._prefixes
+                for ch in pattern[:-1]:
+                    node = node.children.setdefault(ch, _TrieNode())
+                node.positions.append(position)
+            else:
+                self._residual.setdefault(pattern, set()).add(position)
+
+    def freeze(self):
+        self._frozen_match_all = frozenset(self._match_all)
+        # One regex per distinct residual pattern, however many policies share it
+        self._residual_regexes = [
+            (re.compile(fnmatch.translate(pattern)), positions)
+            for pattern, positions in self._residual.items()
+        ]
+
+    def candidates(self, value: str) -> frozenset[int]:
+        hits: list[int] = []
+
+        literal = self._literals.get(value)
+        if literal:
+            hits.extend(literal)
+
+        node = self._prefixes
+        hits.extend(node.positions)
+        for ch in value:
+            node = node.children.get(ch)
+            if node is None:
+                break
+            hits.extend(node.positions)
+
+        for regex, positions in self._residual_regexes:
+            if regex.match(value) is not None:
+                hits.extend(positions)
+
+        if not hits:
+            return self._frozen_match_all
+        return self._frozen_match_all.union(hits)
+
+    def stats(self) -> dict:
+        return {
+            "match_all": len(self._match_all),
+            "literals": len(self._literals),
+            "residual": len(self._residual),
+        }
+
+
+def _compile_operator(key: str, op: str, expected: Any) -> Predicate | None:
+    """Bind a single condition operator to its expected value."""
+    if op == "eq":
+        return lambda ctx: ctx.get(key) == expected
+    if op == "neq":
+        return lambda ctx: ctx.get(key) != expected
+    if op == "in":
+        return lambda ctx: ctx.get(key) in expected
+    if op == "not_in":
+        return lambda ctx: ctx.get(key) not in expected
+    if op == "gt":
+        return lambda ctx: (v := ctx.get(key)) is not None and v > expected
+    if op == "gte":
+        return lambda ctx: (v := ctx.get(key)) is not None and v >= expected
+    if op == "lt":
+        return lambda ctx: (v := ctx.get(key)) is not None and v < expected
+    if op == "lte":
+        return lambda ctx: (v := ctx.get(key)) is not None and v <= expected
+    # Unknown operators are ignored, matching validate_policy's warnings-only stance
+    return None
+
+
+def compile_conditions(conditions: dict | None) -> tuple[Predicate, ...]:
+    """
+    Compile a conditions dict into a tuple of predicates over the request context.
+    Supports basic operators: eq, neq, in, not_in, gt, gte, lt, lte
+    """
+    predicates: list[Predicate] = []
+    for key, condition in (conditions or {}).items():
+        if isinstance(condition, dict):
+            for op, expected in condition.items():
+                predicate = _compile_operator(key, op, expected)
+                if predicate is not None:
+                    predicates.append(predicate)
+        else:
+            # Simple equality check
+            predicates.append(_compile_operator(key, "eq", condition))
+    return tuple(predicates)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledPolicy:
+    """An immutable, pre-parsed policy."""
+
+    id: str
+    name: str
+    effect: str
+    priority: int
+    match_all_principals: bool
+    principal_users: frozenset[str]
+    principal_roles: frozenset[str]
+    actions: tuple[str, ...]
+    resources: tuple[str, ...]
+    conditions: tuple[Predicate, ...]
+
+    @classmethod
+    def from_model(cls, policy: Policy) -> "CompiledPolicy":
+        principals = policy.principals or {}
+        users = frozenset(principals.get("users") or [])
+        roles = frozenset(principals.get("roles") or [])
+        return cls(
+            id=str(policy.id),
+            name=policy.name,
+            effect=policy.effect,
+            priority=policy.priority,
+            match_all_principals=(not users and not roles) or "*" in users or "*" in roles,
+            principal_users=users,
+            principal_roles=roles,
+            actions=tuple(policy.actions or []),
+            resources=tuple(policy.resources or []),
+            conditions=compile_conditions(policy.conditions),
+        )
+
+    def matches_principal(self, role_names: frozenset[str], principal_id: str) -> bool:
+        if self.match_all_principals or principal_id in self.principal_users:
+            return True
+        return not self.principal_roles.isdisjoint(role_names)
+
+    def matches_conditions(self, context: dict) -> bool:
+        for predicate in self.conditions:
+            if not predicate(context):
+                return False
+        return True
+
+
+def implicit_deny() -> dict:
+    return {
+        "allowed": False,
+        "matched_policy_id": None,
+        "effect": None,
+        "reason": "No matching policy found (implicit deny)",
+    }
+
+
+class CompiledPolicySet:
+    """
+    All active policies of an organization, ordered by evaluation priority,
+    together with their action and resource indexes. Immutable once built.
+    """
+
+    __slots__ = ("policies", "action_index", "resource_index")
+
+    def __init__(self, policies: tuple[CompiledPolicy, ...]):
+        self.policies = policies
+        self.action_index = PatternIndex()
+        self.resource_index = PatternIndex()
+        for position, policy in enumerate(policies):
+            self.action_index.add(position, policy.actions)
+            self.resource_index.add(position, policy.resources)
+        self.action_index.freeze()
+        self.resource_index.freeze()
+
+    @classmethod
+    def compile(cls, policies: Iterable[Policy]) -> "CompiledPolicySet":
+        """Compile policies already ordered by priority desc, created_at."""
+        return cls(tuple(CompiledPolicy.from_model(p) for p in policies))
+
+    def __len__(self) -> int:
+        return len(self.policies)
+
+    def candidates(self, action: str, resource: str) -> list[int]:
+        """Positions of the policies matching both action and resource, in priority order."""
+        actions = self.action_index.candidates(action)
+        if not actions:
+            return []
+        resources = self.resource_index.candidates(resource)
+        if len(actions) > len(resources):
+            actions, resources = resources, actions
+        return sorted(actions.intersection(resources))
+
+    def evaluate(
+        self,
+        role_names: frozenset[str],
+        principal_id: str,
+        action: str,
+        resource: str,
+        context: dict,
+    ) -> dict:
+        """
+        Evaluate the policy set and return an authorization decision.
+        Deny takes precedence over allow; within an effect the first policy in
+        priority order wins.
+        """
+        allow_matched: CompiledPolicy | None = None
+        policies = self.policies
+
+        for position in self.candidates(action, resource):
+            policy = policies[position]
+            if allow_matched is not None and policy.effect != "deny":
+                continue
+            if not policy.matches_principal(role_names, principal_id):
+                continue
+            if policy.conditions and not policy.matches_conditions(context):
+                continue
+
+            if policy.effect == "deny":
+                return {
+                    "allowed": False,
+                    "matched_policy_id": policy.id,
+                    "effect": "deny",
+                    "reason": f"Denied by policy: {policy.name}",
+                }
+            allow_matched = policy
+
+        if allow_matched is not None:
+            return {
+                "allowed": True,
+                "matched_policy_id": allow_matched.id,
+                "effect": "allow",
+                "reason": f"Allowed by policy: {allow_matched.name}",
+            }
+
+        return implicit_deny()
+
+
+class PolicySetCache:
+    """
+    Process-local cache of compiled policy sets, keyed by organization.
+
+    Each org carries a generation counter that is bumped on invalidation, so a
+    set compiled from rows read before a concurrent write is never stored.
+    """
+
+    def __init__(self):
+        self._sets: dict[UUID, CompiledPolicySet] = {}
+        self._generations: dict[UUID, int] = {}
+        self._epoch = 0
+
+    def get(self, org_id: UUID) -> CompiledPolicySet | None:
+        return self._sets.get(org_id)
+
+    def generation(self, org_id: UUID) -> tuple[int, int]:
+        return self._epoch, self._generations.get(org_id, 0)
+
+    def put(
+        self, org_id: UUID, compiled: CompiledPolicySet, generation: tuple[int, int]
+    ) -> bool:
+        """Store a compiled set unless the org was invalidated since `generation`."""
+        if self.generation(org_id) != generation:
+            return False
+        self._sets[org_id] = compiled
+        return True
+
+    def invalidate(self, org_id: UUID):
+        self._generations[org_id] = self._generations.get(org_id, 0) + 1
+        self._sets.pop(org_id, None)
+
+    def clear(self):
+        self._epoch += 1
+        self._sets.clear()
+        self._generations.clear()
+
+    def evict(self, org_id: UUID | None):
+        """Eviction hook for authz version changes; None evicts every org."""
+        if org_id is None:
+            self.clear()
+        else:
+            self.invalidate(org_id)
+
+    def stats(self) -> dict:
+        return {
+            "orgs": len(self._sets),
+            "policies": sum(len(s) for s in self._sets.values()),
+        }
+
+
+# Global compiled policy cache instance
+policy_cache = PolicySetCache()
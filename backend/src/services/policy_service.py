@@ -1,5 +1,4 @@
-import fnmatch
-import re
+from typing import Iterable
 from uuid import UUID
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -7,6 +6,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.db.models.policy import Policy
 from src.db.models.role import UserRole, Role
 from src.core.exceptions import NotFound, Conflict
+from src.services.policy_engine import (
+    CONDITION_OPERATORS,
+    CompiledPolicySet,
+    policy_cache,
+)
+from src.services.org_stats_service import OrgStatsService
+from src.services.authz_version import (
+    SCOPE_POLICY,
+    authz_versions,
+    bump_authz_version,
+    load_authz_version,
+)
+from src.services.decision_cache import decision_cache, decision_key
+
+authz_versions.on_change(SCOPE_POLICY, policy_cache.evict)
 
 
 class PolicyService:
@@ -26,6 +40,9 @@ class PolicyService:
             priority=payload.priority,
         )
         self.db.add(policy)
+        # New policies start active
+        await OrgStatsService(self.db).adjust(org_id, policies=1, active_policies=1)
+        await bump_authz_version(self.db, org_id, SCOPE_POLICY)
         await self.db.commit()
         await self.db.refresh(policy)
         return policy
@@ -66,8 +83,11 @@ class PolicyService:
         if payload.priority is not None:
             policy.priority = payload.priority
         if payload.is_active is not None:
+            active_delta = payload.is_active - policy.is_active
             policy.is_active = payload.is_active
+            await OrgStatsService(self.db).adjust(policy.org_id, active_policies=active_delta)
 
+        await bump_authz_version(self.db, policy.org_id, SCOPE_POLICY)
         await self.db.commit()
         await self.db.refresh(policy)
         return policy
@@ -78,6 +98,10 @@ class PolicyService:
             raise NotFound("Policy not found")
 
         await self.db.delete(policy)
+        await OrgStatsService(self.db).adjust(
+            policy.org_id, policies=-1, active_policies=-int(policy.is_active)
+        )
+        await bump_authz_version(self.db, policy.org_id, SCOPE_POLICY)
         await self.db.commit()
 
     async def toggle_policy(self, policy_id: UUID, is_active: bool) -> Policy:
@@ -85,11 +109,24 @@ class PolicyService:
         if not policy:
             raise NotFound("Policy not found")
 
+        active_delta = is_active - policy.is_active
         policy.is_active = is_active
+        await OrgStatsService(self.db).adjust(policy.org_id, active_policies=active_delta)
+        await bump_authz_version(self.db, policy.org_id, SCOPE_POLICY)
         await self.db.commit()
         await self.db.refresh(policy)
         return policy
 
+    async def get_compiled_policies(self, org_id: UUID) -> CompiledPolicySet:
+        """Get the org's compiled active policies, loading them on first use."""
+        compiled = policy_cache.get(org_id)
+        if compiled is None:
+            generation = policy_cache.generation(org_id)
+            policies = await self.list_policies(org_id, active_only=True)
+            compiled = CompiledPolicySet.compile(policies)
+            policy_cache.put(org_id, compiled, generation)
+        return compiled
+
     async def evaluate(
         self,
         org_id: UUID,
@@ -100,143 +137,101 @@ class PolicyService:
     ) -> dict:
         """
         Evaluate policies and return authorization decision.
-        Returns: {"allowed": bool, "matched_policy_id": str|None, "effect": str|None, "reason": str}
+        Returns: {"allowed": bool, "matched_policy_id": str|None, "effect": str|None,
+                  "reason": str, "cached": bool}
         """
-        context = context or {}
+        if decision_cache.enabled:
+            version = await self.get_authz_version(org_id)
+            key = decision_key(org_id, principal_id, action, resource, context)
+            cached = decision_cache.get(key, version)
+            if cached is not None:
+                return {**cached, "cached": True}
 
         # Get user's roles
-        user_roles = await self._get_user_roles(org_id, principal_id)
-        role_names = [r.name for r in user_roles]
-
-        # Get active policies ordered by priority
-        policies = await self.list_policies(org_id, active_only=True)
-
-        # Default deny
-        result = {
-            "allowed": False,
-            "matched_policy_id": None,
-            "effect": None,
-            "reason": "No matching policy found (implicit deny)",
-        }
+        roles = await self._get_role_names(org_id, [principal_id])
 
-        # Evaluate policies (deny takes precedence over allow at same priority)
-        deny_matched = None
-        allow_matched = None
-
-        for policy in policies:
-            if not self._match_principal(policy, role_names, str(principal_id)):
-                continue
-            if not self._match_action(policy.actions, action):
-                continue
-            if not self._match_resource(policy.resources, resource):
-                continue
-            if policy.conditions and not self._evaluate_conditions(
-                policy.conditions, context
-            ):
-                continue
-
-            # Policy matched
-            if policy.effect == "deny":
-                if deny_matched is None or policy.priority > deny_matched.priority:
-                    deny_matched = policy
-            else:
-                if allow_matched is None or policy.priority > allow_matched.priority:
-                    allow_matched = policy
-
-        # Deny takes precedence
-        if deny_matched:
-            return {
-                "allowed": False,
-                "matched_policy_id": str(deny_matched.id),
-                "effect": "deny",
-                "reason": f"Denied by policy: {deny_matched.name}",
-            }
-
-        if allow_matched:
-            return {
-                "allowed": True,
-                "matched_policy_id": str(allow_matched.id),
-                "effect": "allow",
-                "reason": f"Allowed by policy: {allow_matched.name}",
-            }
-
-        return result
+        # Active policies are compiled once per org and served from memory
+        policies = await self.get_compiled_policies(org_id)
+
+        result = policies.evaluate(
+            roles.get(principal_id, frozenset()),
+            str(principal_id),
+            action,
+            resource,
+            context or {},
+        )
+        if decision_cache.enabled:
+            decision_cache.put(key, version, result)
+        return {**result, "cached": False}
 
     async def evaluate_bulk(
         self, org_id: UUID, requests: list[dict]
     ) -> list[dict]:
-        """Evaluate multiple authorization requests."""
-        results = []
-        for req in requests:
-            result = await self.evaluate(
-                org_id=org_id,
-                principal_id=UUID(req["principal_id"]),
-                action=req["action"],
-                resource=req["resource"],
-                context=req.get("context", {}),
-            )
-            results.append(result)
+        """
+        Evaluate multiple authorization requests against one policy snapshot.
+        Roles for all distinct principals are resolved in a single query.
+        Results are returned in request order.
+        """
+        principal_ids = [UUID(req["principal_id"]) for req in requests]
+        results: list[dict | None] = [None] * len(requests)
+        keys: list = [None] * len(requests)
+        pending = list(range(len(requests)))
+
+        if decision_cache.enabled:
+            version = await self.get_authz_version(org_id)
+            pending = []
+            for i, (principal_id, req) in enumerate(zip(principal_ids, requests)):
+                keys[i] = decision_key(
+                    org_id, principal_id, req["action"], req["resource"], req.get("context")
+                )
+                cached = decision_cache.get(keys[i], version)
+                if cached is not None:
+                    results[i] = {**cached, "cached": True}
+                else:
+                    pending.append(i)
+
+        if pending:
+            roles = await self._get_role_names(org_id, {principal_ids[i] for i in pending})
+            policies = await self.get_compiled_policies(org_id)
+
+            evaluate = policies.evaluate
+            no_roles: frozenset[str] = frozenset()
+            for i in pending:
+                req = requests[i]
+                result = evaluate(
+                    roles.get(principal_ids[i], no_roles),
+                    str(principal_ids[i]),
+                    req["action"],
+                    req["resource"],
+                    req.get("context") or {},
+                )
+                if decision_cache.enabled:
+                    decision_cache.put(keys[i], version, result)
+                results[i] = {**result, "cached": False}
+
         return results
 
-    async def _get_user_roles(self, org_id: UUID, user_id: UUID) -> list[Role]:
-        """Get all roles assigned to a user in an organization."""
+    async def get_authz_version(self, org_id: UUID) -> int:
+        """The org's authz version, read from the database once per worker."""
+        version = authz_versions.current(org_id)
+        if version is None:
+            authz_versions.seed(org_id, await load_authz_version(self.db, org_id))
+            version = authz_versions.current(org_id)
+        return version
+
+    async def _get_role_names(
+        self, org_id: UUID, user_ids: Iterable[UUID]
+    ) -> dict[UUID, frozenset[str]]:
+        """Get the names of the roles assigned to each user in an organization."""
         res = await self.db.execute(
-            select(Role)
-            .join(UserRole)
-            .where(UserRole.org_id == org_id, UserRole.user_id == user_id)
+            select(UserRole.user_id, Role.name)
+            .join(Role, Role.id == UserRole.role_id)
+            .where(UserRole.org_id == org_id, UserRole.user_id.in_(list(user_ids)))
         )
-        return list(res.scalars().all())
-
-    def _match_principal(
-        self, policy: Policy, user_roles: list[str], user_id: str
-    ) -> bool:
-        """Check if the principal matches the policy."""
-        principals = policy.principals or {}
-
-        # Check if no principals specified (matches all)
-        if not principals.get("roles") and not principals.get("users"):
-            return True
-
-        # Check user match
-        policy_users = principals.get("users", [])
-        if "*" in policy_users or user_id in policy_users:
-            return True
-
-        # Check role match
-        policy_roles = principals.get("roles", [])
-        if "*" in policy_roles:
-            return True
-        for role in user_roles:
-            if role in policy_roles:
-                return True
-
-        return False
-
-    def _match_action(self, policy_actions: list[str], action: str) -> bool:
-        """Check if the action matches using wildcards."""
-        if not policy_actions:
-            return True
-
-        for pattern in policy_actions:
-            if pattern == "*":
-                return True
-            if fnmatch.fnmatch(action, pattern):
-                return True
-
-        return False
-
-    def _match_resource(self, policy_resources: list[str], resource: str) -> bool:
-        """Check if the resource matches using wildcards."""
-        if not policy_resources:
-            return True
-
-        for pattern in policy_resources:
-            if pattern == "*":
-                return True
-            if fnmatch.fnmatch(resource, pattern):
-                return True
-
-        return False
+        names: dict[UUID, set[str]] = {}
+        for user_id, role_name in res.all():
+            names.setdefault(user_id, set()).add(role_name)
+        return {user_id: frozenset(n) for user_id, n in names.items()}
 
     def validate_policy(self, policy_data: dict) -> dict:
         """
@@ -292,11 +287,10 @@ class PolicyService:
             if not isinstance(conditions, dict):
                 errors.append("conditions must be an object")
             else:
-                valid_ops = {"eq", "neq", "in", "not_in", "gt", "gte", "lt", "lte"}
                 for key, condition in conditions.items():
                     if isinstance(condition, dict):
                         for op in condition.keys():
-                            if op not in valid_ops:
+                            if op not in CONDITION_OPERATORS:
                                 errors.append(f"Unknown condition operator: '{op}'")
 
         # Check priority
@@ -309,47 +303,3 @@ class PolicyService:
             "errors": errors,
             "warnings": warnings,
         }
-
-    def _evaluate_conditions(self, conditions: dict, context: dict) -> bool:
-        """
-        Evaluate conditions against context.
-        Supports basic operators: eq, neq, in, not_in, gt, gte, lt, lte
-        """
-        if not conditions:
-            return True
-
-        for key, condition in conditions.items():
-            context_value = context.get(key)
-
-            if isinstance(condition, dict):
-                for op, expected in condition.items():
-                    if op == "eq" and context_value != expected:
-                        return False
-                    elif op == "neq" and context_value == expected:
-                        return False
-                    elif op == "in" and context_value not in expected:
-                        return False
-                    elif op == "not_in" and context_value in expected:
-                        return False
-                    elif op == "gt" and (
-                        context_value is None or context_value <= expected
-                    ):
-                        return False
-                    elif op == "gte" and (
-                        context_value is None or context_value < expected
-                    ):
-                        return False
-                    elif op == "lt" and (
-                        context_value is None or context_value >= expected
-                    ):
-                        return False
-                    elif op == "lte" and (
-                        context_value is None or context_value > expected
-                    ):
-                        return False
-            else:
-                # Simple equality check
-                if context_value != condition:
-                    return False
-
-        return True
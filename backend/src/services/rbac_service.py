@@ -6,6 +6,12 @@ from sqlalchemy.orm import selectinload
 from src.db.models.role import Role, RolePermission, UserRole
 from src.db.models.permission import Permission
 from src.core.exceptions import NotFound, Conflict, Forbidden
+from src.services.authz_version import SCOPE_RBAC, authz_versions, bump_authz_version
+from src.services.org_stats_service import OrgStatsService
+from src.services.permission_cache import PrincipalPermissions, permission_cache
+
+# This worker applies its own RBAC writes to the cache incrementally
+authz_versions.on_change(SCOPE_RBAC, permission_cache.evict, remote_only=True)
 
 
 class RBACService:
@@ -26,6 +32,7 @@ class RBACService:
             description=payload.description,
         )
         self.db.add(role)
+        await OrgStatsService(self.db).adjust(org_id, roles=1)
         await self.db.commit()
         await self.db.refresh(role)
         return role
@@ -65,6 +72,9 @@ class RBACService:
             )
             if existing.scalar_one_or_none():
                 raise Conflict(f"Role '{payload.name}' already exists")
+            if payload.name != role.name:
+                # Policies match principals by role name
+                await bump_authz_version(self.db, role.org_id, SCOPE_RBAC)
             role.name = payload.name
 
         if payload.description is not None:
@@ -82,8 +92,12 @@ class RBACService:
         if role.is_system:
             raise Forbidden("Cannot delete system role")
 
+        org_id = role.org_id
         await self.db.delete(role)
+        await OrgStatsService(self.db).adjust(org_id, roles=-1)
+        await bump_authz_version(self.db, org_id, SCOPE_RBAC)
         await self.db.commit()
+        permission_cache.role_deleted(org_id, role_id)
 
     # Permission operations
     async def create_permission(self, org_id: UUID, payload) -> Permission:
@@ -101,6 +115,7 @@ class RBACService:
             description=payload.description,
         )
         self.db.add(permission)
+        await OrgStatsService(self.db).adjust(org_id, permissions=1)
         await self.db.commit()
         await self.db.refresh(permission)
         return permission
@@ -136,8 +151,12 @@ class RBACService:
         if not permission:
             raise NotFound("Permission not found")
 
+        org_id, name = permission.org_id, permission.name
         await self.db.delete(permission)
+        await OrgStatsService(self.db).adjust(org_id, permissions=-1)
+        await bump_authz_version(self.db, org_id, SCOPE_RBAC)
         await self.db.commit()
+        permission_cache.permission_deleted(org_id, name)
 
     # Role-Permission operations
     async def add_permissions_to_role(self, role_id: UUID, permission_ids: list[UUID]):
@@ -146,6 +165,7 @@ class RBACService:
             raise NotFound("Role not found")
 
         existing_perm_ids = {rp.permission_id for rp in role.permissions}
+        added: set[str] = set()
 
         for perm_id in permission_ids:
             if perm_id in existing_perm_ids:
@@ -160,8 +180,15 @@ class RBACService:
 
             role_permission = RolePermission(role_id=role_id, permission_id=perm_id)
             self.db.add(role_permission)
+            existing_perm_ids.add(perm_id)
+            added.add(permission.name)
 
+        org_id = role.org_id
+        if added:
+            await bump_authz_version(self.db, org_id, SCOPE_RBAC)
         await self.db.commit()
+        if added:
+            permission_cache.role_permissions_added(org_id, role_id, added)
 
     async def remove_permission_from_role(self, role_id: UUID, permission_id: UUID):
         role = await self.get_role(role_id)
@@ -171,13 +198,21 @@ class RBACService:
         if role.is_system:
             raise Forbidden("Cannot modify system role")
 
+        removed = {
+            rp.permission.name for rp in role.permissions if rp.permission_id == permission_id
+        }
+        org_id = role.org_id
         await self.db.execute(
             delete(RolePermission).where(
                 RolePermission.role_id == role_id,
                 RolePermission.permission_id == permission_id,
             )
         )
+        if removed:
+            await bump_authz_version(self.db, org_id, SCOPE_RBAC)
         await self.db.commit()
+        if removed:
+            permission_cache.role_permissions_removed(org_id, role_id, removed)
 
     # User-Role operations
     async def assign_role_to_user(
@@ -207,7 +242,9 @@ class RBACService:
             assigned_by=assigned_by,
         )
         self.db.add(user_role)
+        await bump_authz_version(self.db, org_id, SCOPE_RBAC)
         await self.db.commit()
+        permission_cache.role_assigned(org_id, user_id, role_id)
         await self.db.refresh(user_role)
         return user_role
 
@@ -224,7 +261,9 @@ class RBACService:
             raise NotFound("User does not have this role")
 
         await self.db.delete(user_role)
+        await bump_authz_version(self.db, org_id, SCOPE_RBAC)
         await self.db.commit()
+        permission_cache.role_revoked(org_id, user_id, role_id)
 
     async def get_user_roles(self, org_id: UUID, user_id: UUID) -> list[UserRole]:
         res = await self.db.execute(
@@ -235,23 +274,39 @@ class RBACService:
         )
         return list(res.scalars().all())
 
-    async def get_user_permissions(self, org_id: UUID, user_id: UUID) -> list[str]:
-        user_roles = await self.get_user_roles(org_id, user_id)
-        role_ids = [ur.role_id for ur in user_roles]
-
-        if not role_ids:
-            return []
+    async def get_permission_set(self, org_id: UUID, user_id: UUID) -> PrincipalPermissions:
+        """Effective permissions of a user, materialized in the permission cache."""
+        cached = permission_cache.get(org_id, user_id)
+        if cached is not None:
+            return cached
 
+        generation = permission_cache.generation(org_id)
         res = await self.db.execute(
-            select(Permission.name)
-            .join(RolePermission)
-            .where(RolePermission.role_id.in_(role_ids))
-            .distinct()
+            select(UserRole.role_id, Permission.name)
+            .select_from(UserRole)
+            .outerjoin(RolePermission, RolePermission.role_id == UserRole.role_id)
+            .outerjoin(Permission, Permission.id == RolePermission.permission_id)
+            .where(UserRole.org_id == org_id, UserRole.user_id == user_id)
         )
-        return list(res.scalars().all())
+        role_permissions: dict[UUID, set[str]] = {}
+        for role_id, name in res.all():
+            names = role_permissions.setdefault(role_id, set())
+            if name is not None:
+                names.add(name)
+
+        return permission_cache.put(
+            org_id,
+            user_id,
+            {role_id: frozenset(names) for role_id, names in role_permissions.items()},
+            generation,
+        )
+
+    async def get_user_permissions(self, org_id: UUID, user_id: UUID) -> list[str]:
+        permissions = await self.get_permission_set(org_id, user_id)
+        return sorted(permissions.permissions)
 
     async def check_permission(
         self, org_id: UUID, user_id: UUID, permission: str
     ) -> bool:
-        permissions = await self.get_user_permissions(org_id, user_id)
-        return permission in permissions
+        permissions = await self.get_permission_set(org_id, user_id)
+        return permission in permissions.permissions
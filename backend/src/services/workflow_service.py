@@ -8,6 +8,9 @@ from src.db.models.access_request import AccessRequest, ApprovalAction, RequestS
 from src.db.models.role import UserRole
 from src.core.security import utc_now
 from src.core.exceptions import NotFound, Forbidden, BadRequest
+from src.services.authz_version import SCOPE_RBAC, bump_authz_version
+from src.services.org_stats_service import OrgStatsService
+from src.services.permission_cache import permission_cache
 
 
 class WorkflowService:
@@ -33,6 +36,7 @@ class WorkflowService:
             duration_hours=payload.duration_hours,
         )
         self.db.add(request)
+        await OrgStatsService(self.db).adjust(org_id, pending_requests=1)
         await self.db.commit()
         await self.db.refresh(request)
         return request
@@ -105,7 +109,9 @@ class WorkflowService:
         self.db.add(action)
 
         # Update request status
+        previous = request.status
         request.status = RequestStatus.APPROVED
+        await OrgStatsService(self.db).record_transition(request.org_id, previous, request.status)
         request.resolved_at = utc_now()
 
         # Set expiration if duration specified
@@ -114,8 +120,11 @@ class WorkflowService:
 
         # Grant access
         await self._grant_access(request, approver_id)
+        grant = (request.org_id, request.requester_id, request.requested_role_id)
 
         await self.db.commit()
+        if grant[2]:
+            permission_cache.role_assigned(*grant)
         await self.db.refresh(request)
         return request
 
@@ -140,7 +149,9 @@ class WorkflowService:
         self.db.add(action)
 
         # Update request status
+        previous = request.status
         request.status = RequestStatus.DENIED
+        await OrgStatsService(self.db).record_transition(request.org_id, previous, request.status)
         request.resolved_at = utc_now()
 
         await self.db.commit()
@@ -159,7 +170,9 @@ class WorkflowService:
         if request.status not in [RequestStatus.PENDING, RequestStatus.INFO_REQUESTED]:
             raise BadRequest(f"Request is already {request.status.value}")
 
+        previous = request.status
         request.status = RequestStatus.CANCELLED
+        await OrgStatsService(self.db).record_transition(request.org_id, previous, request.status)
         request.resolved_at = utc_now()
 
         await self.db.commit()
@@ -187,7 +200,9 @@ class WorkflowService:
         self.db.add(action)
 
         # Update request status
+        previous = request.status
         request.status = RequestStatus.INFO_REQUESTED
+        await OrgStatsService(self.db).record_transition(request.org_id, previous, request.status)
 
         await self.db.commit()
         await self.db.refresh(request)
@@ -217,7 +232,9 @@ class WorkflowService:
         self.db.add(action)
 
         # Move back to pending for review
+        previous = request.status
         request.status = RequestStatus.PENDING
+        await OrgStatsService(self.db).record_transition(request.org_id, previous, request.status)
 
         await self.db.commit()
         await self.db.refresh(request)
@@ -242,3 +259,4 @@ class WorkflowService:
                     assigned_by=assigned_by,
                 )
                 self.db.add(user_role)
+                await bump_authz_version(self.db, request.org_id, SCOPE_RBAC)
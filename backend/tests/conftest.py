@@ -3,6 +3,8 @@ import sys
 
 # Set test database URL BEFORE importing any app modules
 os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+# Cheapest bcrypt cost keeps registration fast in tests
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
 
 import asyncio
 import pytest
@@ -19,7 +21,7 @@ from src.db.models import (  # noqa
     User, Organization, OrgMembership, OrgMemberRole,
     Permission, Role, RolePermission, UserRole,
     Policy, AccessRequest, ApprovalAction, AuditLog,
-    OrgInvite,
+    OrgInvite, AuthzVersion,
 )
 
 
@@ -78,8 +80,12 @@ async def client(test_session_factory):
     """Create a test client with the test database."""
     # Import app here to ensure environment is set
     from src.main import app
+    from src.api.rate_limit import rate_limiter
     from src.db.database import get_db
 
+    # Every test registers from the same client IP; start each one with empty buckets
+    rate_limiter.reset()
+
     # Each request gets a fresh session from the factory
     async def override_get_db():
         async with test_session_factory() as session:
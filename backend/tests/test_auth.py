@@ -1,5 +1,13 @@
+import dataclasses
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
+
+from src.core.identity_cache import identity_cache
+from src.core.password_hasher import password_hasher
+from src.core.security import password_hash_rounds
+from src.services.auth_service import AuthService
 
 
 @pytest.mark.asyncio
@@ -149,3 +157,95 @@ async def test_logout(client: AsyncClient, auth_headers: dict):
     """Test user logout."""
     response = await client.post("/api/auth/logout", headers=auth_headers)
     assert response.status_code == 204
+
+
+@pytest.mark.asyncio
+async def test_deactivated_user_is_rejected_immediately(
+    client: AsyncClient, auth_headers: dict, test_session_factory
+):
+    """Test that the cached user status is dropped when an account is disabled."""
+    response = await client.get("/api/auth/me", headers=auth_headers)
+    assert response.status_code == 200
+    user_id = response.json()["id"]
+
+    # Served from the identity cache
+    response = await client.get("/api/auth/me", headers=auth_headers)
+    assert response.json()["email"] == "test@example.com"
+
+    async with test_session_factory() as db:
+        await AuthService(db).set_active(user_id, False)
+
+    response = await client.get("/api/auth/me", headers=auth_headers)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "User account is disabled"
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_when_cost_changes(
+    client: AsyncClient, test_session_factory, monkeypatch
+):
+    """Test that a login upgrades a hash made with a different bcrypt cost."""
+    credentials = {"email": "rehash@example.com", "password": "password123"}
+    await client.post("/api/auth/register", json={**credentials, "name": "Rehash"})
+
+    monkeypatch.setattr(password_hasher, "rounds", password_hasher.rounds + 1)
+    response = await client.post("/api/auth/login", json=credentials)
+    assert response.status_code == 200
+
+    async with test_session_factory() as db:
+        user = await AuthService(db).get_user_by_email(credentials["email"])
+    assert password_hash_rounds(user.password_hash) == password_hasher.rounds
+    assert password_hasher.stats()["completed"] >= 3
+
+    response = await client.post("/api/auth/login", json=credentials)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_org_routes_load_user_and_membership_in_one_query(
+    client: AsyncClient, org_with_auth: dict, test_engine
+):
+    """Test that org-scoped routes authorize with one joined query and check roles in memory."""
+    org_id = org_with_auth["org_id"]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    identity_cache.invalidate_user(None)
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = await client.get(
+            f"/api/orgs/{org_id}/requests/pending", headers=org_with_auth["headers"]
+        )
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+    auth_queries = [s for s in statements if "org_memberships" in s]
+    assert len(auth_queries) == 1
+    assert "FROM users LEFT OUTER JOIN org_memberships" in auth_queries[0]
+
+    response = await client.post(
+        "/api/auth/register",
+        json={"email": "outsider@example.com", "name": "Outsider", "password": "testpassword123"},
+    )
+    outsider = {"Authorization": f"Bearer {response.json()['tokens']['access_token']}"}
+    response = await client.get(f"/api/orgs/{org_id}/requests/pending", headers=outsider)
+    assert response.status_code == 403
+    assert response.json()["detail"] == "Not a member of this organization"
+
+
+@pytest.mark.asyncio
+async def test_cached_user_is_read_only(client: AsyncClient, auth_headers: dict, test_session_factory):
+    """Test that identity cache hits hand out a frozen copy, not a detached ORM User."""
+    async with test_session_factory() as db:
+        user = await AuthService(db).get_user_by_email("test@example.com")
+    identity = identity_cache.put_user(user)
+    assert identity_cache.get_user(user.id) is identity
+    assert not hasattr(identity, "password_hash")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        identity.is_active = False
+
+    response = await client.get("/api/auth/me", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.json()["email"] == "test@example.com"
@@ -0,0 +1,236 @@
+import pytest
+from httpx import AsyncClient
+
+from src.services.decision_cache import decision_cache
+
+
+async def _current_user_id(client: AsyncClient, headers: dict) -> str:
+    response = await client.get("/api/auth/me", headers=headers)
+    return response.json()["id"]
+
+
+async def _authorize(
+    client: AsyncClient,
+    org_with_auth: dict,
+    principal_id: str,
+    action: str,
+    resource: str,
+    context: dict | None = None,
+) -> dict:
+    response = await client.post(
+        "/api/authorize",
+        json={
+            "org_id": org_with_auth["org_id"],
+            "principal_id": principal_id,
+            "action": action,
+            "resource": resource,
+            "context": context or {},
+        },
+        headers=org_with_auth["headers"],
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_authorize_implicit_deny(client: AsyncClient, org_with_auth: dict):
+    """Test that requests with no matching policy are denied."""
+    user_id = await _current_user_id(client, org_with_auth["headers"])
+
+    data = await _authorize(client, org_with_auth, user_id, "read", "document:1")
+
+    assert data["allowed"] is False
+    assert data["matched_policy_id"] is None
+
+
+@pytest.mark.asyncio
+async def test_authorize_wildcards_and_deny_precedence(client: AsyncClient, org_with_auth: dict):
+    """Test glob matching and that deny wins over a higher priority allow."""
+    user_id = await _current_user_id(client, org_with_auth["headers"])
+    await client.post(
+        f"/api/orgs/{org_with_auth['org_id']}/policies",
+        json={
+            "name": "allow-docs",
+            "effect": "allow",
+            "actions": ["read", "write"],
+            "resources": ["document:*"],
+            "priority": 10,
+        },
+        headers=org_with_auth["headers"],
+    )
+    await client.post(
+        f"/api/orgs/{org_with_auth['org_id']}/policies",
+        json={
+            "name": "deny-secret-writes",
+            "effect": "deny",
+            "actions": ["write"],
+            "resources": ["document:secret-?"],
+        },
+        headers=org_with_auth["headers"],
+    )
+
+    data = await _authorize(client, org_with_auth, user_id, "read", "document:secret-1")
+    assert data["allowed"] is True
+    assert data["reason"] == "Allowed by policy: allow-docs"
+
+    data = await _authorize(client, org_with_auth, user_id, "write", "document:secret-1")
+    assert data["allowed"] is False
+    assert data["effect"] == "deny"
+
+    data = await _authorize(client, org_with_auth, user_id, "read", "folder:1")
+    assert data["allowed"] is False
+    assert data["effect"] is None
+
+
+@pytest.mark.asyncio
+async def test_authorize_conditions(client: AsyncClient, org_with_auth: dict):
+    """Test that policy conditions are evaluated against the request context."""
+    user_id = await _current_user_id(client, org_with_auth["headers"])
+    await client.post(
+        f"/api/orgs/{org_with_auth['org_id']}/policies",
+        json={
+            "name": "business-hours",
+            "effect": "allow",
+            "actions": ["*"],
+            "resources": ["*"],
+            "conditions": {"hour": {"gte": 9, "lt": 17}, "region": "eu"},
+        },
+        headers=org_with_auth["headers"],
+    )
+
+    data = await _authorize(
+        client, org_with_auth, user_id, "read", "report:1", {"hour": 10, "region": "eu"}
+    )
+    assert data["allowed"] is True
+
+    data = await _authorize(
+        client, org_with_auth, user_id, "read", "report:1", {"hour": 20, "region": "eu"}
+    )
+    assert data["allowed"] is False
+
+    data = await _authorize(client, org_with_auth, user_id, "read", "report:1", {"region": "eu"})
+    assert data["allowed"] is False
+
+
+@pytest.mark.asyncio
+async def test_authorize_sees_policy_changes(client: AsyncClient, org_with_auth: dict):
+    """Test that policy writes invalidate the compiled policy set."""
+    user_id = await _current_user_id(client, org_with_auth["headers"])
+    create_response = await client.post(
+        f"/api/orgs/{org_with_auth['org_id']}/policies",
+        json={"name": "allow-all", "effect": "allow", "actions": ["*"], "resources": ["*"]},
+        headers=org_with_auth["headers"],
+    )
+    policy_id = create_response.json()["id"]
+
+    data = await _authorize(client, org_with_auth, user_id, "read", "document:1")
+    assert data["allowed"] is True
+
+    await client.put(
+        f"/api/orgs/{org_with_auth['org_id']}/policies/{policy_id}",
+        json={"effect": "deny"},
+        headers=org_with_auth["headers"],
+    )
+    data = await _authorize(client, org_with_auth, user_id, "read", "document:1")
+    assert data["allowed"] is False
+    assert data["effect"] == "deny"
+
+    await client.delete(
+        f"/api/orgs/{org_with_auth['org_id']}/policies/{policy_id}",
+        headers=org_with_auth["headers"],
+    )
+    data = await _authorize(client, org_with_auth, user_id, "read", "document:1")
+    assert data["matched_policy_id"] is None
+
+
+@pytest.mark.asyncio
+async def test_authorize_bulk_preserves_order(client: AsyncClient, org_with_auth: dict):
+    """Test bulk evaluation across principals, returned in request order."""
+    org_id = org_with_auth["org_id"]
+    headers = org_with_auth["headers"]
+    user_id = await _current_user_id(client, headers)
+    other_id = "00000000-0000-0000-0000-000000000001"
+
+    role_response = await client.post(
+        f"/api/orgs/{org_id}/roles", json={"name": "editor"}, headers=headers
+    )
+    await client.post(
+        f"/api/orgs/{org_id}/users/{user_id}/roles",
+        json={"role_id": role_response.json()["id"]},
+        headers=headers,
+    )
+    await client.post(
+        f"/api/orgs/{org_id}/policies",
+        json={
+            "name": "editors-write",
+            "effect": "allow",
+            "principals": {"roles": ["editor"]},
+            "actions": ["write"],
+            "resources": ["document:*"],
+        },
+        headers=headers,
+    )
+
+    items = [
+        {"principal_id": user_id, "action": "write", "resource": "document:1"},
+        {"principal_id": other_id, "action": "write", "resource": "document:1"},
+        {"principal_id": user_id, "action": "delete", "resource": "document:1"},
+        {"principal_id": user_id, "action": "write", "resource": "document:2"},
+    ]
+    response = await client.post(
+        f"/api/authorize/bulk?org_id={org_id}", json=items, headers=headers
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+
+    assert [r["allowed"] for r in results] == [True, False, False, True]
+
+
+@pytest.mark.asyncio
+async def test_authorize_decision_cache(client: AsyncClient, org_with_auth: dict, monkeypatch):
+    """Test that repeated decisions are cached until a policy or role changes."""
+    # Off unless a TTL is configured
+    assert not decision_cache.enabled
+    monkeypatch.setattr(decision_cache, "ttl_seconds", 5.0)
+    org_id = org_with_auth["org_id"]
+    headers = org_with_auth["headers"]
+    user_id = await _current_user_id(client, headers)
+    role_response = await client.post(f"/api/orgs/{org_id}/roles", json={"name": "editor"}, headers=headers)
+    role_id = role_response.json()["id"]
+    await client.post(
+        f"/api/orgs/{org_id}/users/{user_id}/roles", json={"role_id": role_id}, headers=headers
+    )
+    await client.post(
+        f"/api/orgs/{org_id}/policies",
+        json={
+            "name": "editors-write",
+            "effect": "allow",
+            "principals": {"roles": ["editor"]},
+            "actions": ["write"],
+            "resources": ["*"],
+        },
+        headers=headers,
+    )
+
+    first = await _authorize(client, org_with_auth, user_id, "write", "doc:1", {"a": 1, "b": 2})
+    second = await _authorize(client, org_with_auth, user_id, "write", "doc:1", {"b": 2, "a": 1})
+    assert first["allowed"] is True and first["cached"] is False
+    assert second["allowed"] is True and second["cached"] is True
+
+    other = await _authorize(client, org_with_auth, user_id, "write", "doc:1", {"a": 2})
+    assert other["cached"] is False
+
+    await client.put(f"/api/orgs/{org_id}/roles/{role_id}", json={"name": "viewer"}, headers=headers)
+    data = await _authorize(client, org_with_auth, user_id, "write", "doc:1", {"a": 1, "b": 2})
+    assert data["allowed"] is False
+    assert data["cached"] is False
+
+    response = await client.post(
+        f"/api/authorize/bulk?org_id={org_id}",
+        json=[
+            {"principal_id": user_id, "action": "write", "resource": "doc:1", "context": {"a": 1, "b": 2}},
+            {"principal_id": user_id, "action": "write", "resource": "doc:2"},
+        ],
+        headers=headers,
+    )
+    assert [r["cached"] for r in response.json()["results"]] == [True, False]
@@ -0,0 +1,32 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.harness import summarize
+from benchmarks.synthetic import OrgSpec, generate_org
+from src.db.models import Policy, UserRole
+from src.services.policy_service import PolicyService
+
+
+@pytest.mark.asyncio
+async def test_synthetic_org_matches_spec(test_db: AsyncSession):
+    """Test that the benchmark generator builds an org the services can evaluate."""
+    spec = OrgSpec(users=20, roles=4, permissions=10, policies=30, condition_complexity=2)
+    org = await generate_org(test_db, spec)
+
+    policies = await test_db.scalar(select(func.count()).select_from(Policy).where(Policy.org_id == org.org_id))
+    user_roles = await test_db.scalar(select(func.count()).select_from(UserRole).where(UserRole.org_id == org.org_id))
+    assert policies == 30
+    assert user_roles == 20 * spec.roles_per_user
+
+    results = await PolicyService(test_db).evaluate_bulk(org.org_id, org.queries(50))
+    assert len(results) == 50
+
+
+def test_summarize_percentiles():
+    """Test throughput and nearest-rank percentiles."""
+    summary = summarize("op", [i / 1000 for i in range(1, 101)])
+    assert summary["p50_ms"] == pytest.approx(50)
+    assert summary["p99_ms"] == pytest.approx(99)
+    assert summary["max_ms"] == pytest.approx(100)
+    assert summary["throughput_ops_s"] == pytest.approx(100 / 5.05)
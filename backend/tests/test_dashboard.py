@@ -0,0 +1,127 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event, update
+
+from src.db.models.org_stats import OrgStats
+from src.services.dashboard_service import dashboard_cache
+from src.services.org_stats_service import OrgStatsService
+
+
+@pytest.mark.asyncio
+async def test_dashboard_stats_are_cached_and_invalidated_on_writes(
+    client: AsyncClient, org_with_auth: dict, test_engine
+):
+    """Test that stats come from one query, are served from cache and refresh after writes."""
+    org_id = org_with_auth["org_id"]
+    headers = org_with_auth["headers"]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", record)
+    try:
+        response = await client.get(f"/api/orgs/{org_id}/dashboard", headers=headers)
+        stats_queries = [s for s in statements if "FILTER (WHERE" in s]
+        assert len(stats_queries) == 1
+
+        statements.clear()
+        response = await client.get(f"/api/orgs/{org_id}/dashboard", headers=headers)
+        assert not any("count(*)" in s for s in statements)
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", record)
+
+    stats = response.json()["stats"]
+    assert stats["total_members"] == 1
+    assert stats["total_roles"] == 0
+    assert dashboard_cache.stats()["hits"] >= 1
+
+    await client.post(f"/api/orgs/{org_id}/roles", json={"name": "editor"}, headers=headers)
+    await client.post(
+        f"/api/orgs/{org_id}/policies",
+        json={"name": "allow-read", "effect": "allow", "actions": ["read"], "resources": ["*"]},
+        headers=headers,
+    )
+
+    stats = (await client.get(f"/api/orgs/{org_id}/dashboard", headers=headers)).json()["stats"]
+    assert stats["total_roles"] == 1
+    assert stats["total_policies"] == 1
+    assert stats["active_policies"] == 1
+
+
+@pytest.mark.asyncio
+async def test_org_stats_follow_writes_and_reconcile_repairs_drift(
+    client: AsyncClient, org_with_auth: dict, test_db
+):
+    """Test that counters change with the writes and the reconciliation job fixes drift."""
+    org_id = org_with_auth["org_id"]
+    headers = org_with_auth["headers"]
+    role = (await client.post(f"/api/orgs/{org_id}/roles", json={"name": "viewer"}, headers=headers)).json()
+    policy = (
+        await client.post(
+            f"/api/orgs/{org_id}/policies",
+            json={"name": "allow-read", "effect": "allow", "actions": ["read"], "resources": ["*"]},
+            headers=headers,
+        )
+    ).json()
+    await client.put(
+        f"/api/orgs/{org_id}/policies/{policy['id']}", json={"is_active": False}, headers=headers
+    )
+    for _ in range(2):
+        request = (
+            await client.post(
+                f"/api/orgs/{org_id}/requests",
+                json={"requested_role_id": role["id"], "justification": "Needed for the audit"},
+                headers=headers,
+            )
+        ).json()
+    await client.post(f"/api/orgs/{org_id}/requests/{request['id']}/deny", json={}, headers=headers)
+
+    service = OrgStatsService(test_db)
+    expected = {
+        "members": 1,
+        "roles": 1,
+        "permissions": 0,
+        "policies": 1,
+        "active_policies": 0,
+        "pending_requests": 1,
+    }
+    assert await service.get(uuid.UUID(org_id)) == expected
+
+    await test_db.execute(
+        update(OrgStats).where(OrgStats.org_id == uuid.UUID(org_id)).values(roles=7, members=0)
+    )
+    await test_db.commit()
+    assert await service.reconcile() == 1
+    assert await service.reconcile() == 0
+    assert await service.get(uuid.UUID(org_id)) == expected
+
+
+
+@pytest.mark.asyncio
+async def test_dashboard_refreshes_when_pending_count_is_unchanged(client: AsyncClient, org_with_auth: dict):
+    """Test that a transition leaving the pending count alone still invalidates the dashboard."""
+    org_id = org_with_auth["org_id"]
+    headers = org_with_auth["headers"]
+    role = (await client.post(f"/api/orgs/{org_id}/roles", json={"name": "viewer"}, headers=headers)).json()
+    request = (
+        await client.post(
+            f"/api/orgs/{org_id}/requests",
+            json={"requested_role_id": role["id"], "justification": "Needed for the audit"},
+            headers=headers,
+        )
+    ).json()
+    await client.post(
+        f"/api/orgs/{org_id}/requests/{request['id']}/request-info",
+        json={"comment": "Which audit?"},
+        headers=headers,
+    )
+    await client.get(f"/api/orgs/{org_id}/dashboard", headers=headers)
+    epoch = dashboard_cache.epoch
+
+    # INFO_REQUESTED -> CANCELLED: neither state counts as pending
+    response = await client.post(f"/api/orgs/{org_id}/requests/{request['id']}/cancel", headers=headers)
+    assert response.status_code == 200
+    assert dashboard_cache.epoch > epoch
@@ -0,0 +1,96 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.pubsub import PubSub
+from src.db.models import Organization
+from src.services.authz_version import (
+    AUTHZ_CHANNEL,
+    SCOPE_POLICY,
+    SCOPE_RBAC,
+    AuthzVersionRegistry,
+    bump_authz_version,
+    load_authz_version,
+)
+
+
+def _worker(bus: PubSub) -> tuple[AuthzVersionRegistry, list]:
+    """Simulate a worker process: a registry subscribed to the shared bus."""
+    registry = AuthzVersionRegistry()
+    evicted = []
+    registry.on_change(SCOPE_POLICY, lambda org_id: evicted.append(("policy", org_id)))
+    registry.on_change(SCOPE_RBAC, lambda org_id: evicted.append(("rbac", org_id)))
+    bus.subscribe(AUTHZ_CHANNEL, registry.handle_message)
+    return registry, evicted
+
+
+async def _create_org(test_db: AsyncSession) -> Organization:
+    org = Organization(name="Cache Org", slug="cache-org")
+    test_db.add(org)
+    await test_db.commit()
+    return org
+
+
+@pytest.mark.asyncio
+async def test_version_bump_is_broadcast_on_commit(test_db: AsyncSession):
+    """Test that every worker evicts the org only after the write commits."""
+    bus = PubSub()
+    worker_a, evicted_a = _worker(bus)
+    worker_b, evicted_b = _worker(bus)
+    org = await _create_org(test_db)
+
+    version = await bump_authz_version(test_db, org.id, SCOPE_POLICY, bus=bus)
+    assert version == 1
+    assert evicted_b == []
+
+    await test_db.commit()
+    assert evicted_a == [("policy", org.id)]
+    assert evicted_b == [("policy", org.id)]
+    assert worker_b.current(org.id) == 1
+
+    await bump_authz_version(test_db, org.id, SCOPE_RBAC, bus=bus)
+    await test_db.commit()
+    assert evicted_b[-1] == ("rbac", org.id)
+    assert worker_b.current(org.id) == 2
+    assert await load_authz_version(test_db, org.id) == 2
+
+
+@pytest.mark.asyncio
+async def test_version_bump_discarded_on_rollback(test_db: AsyncSession):
+    """Test that a rolled back write neither bumps nor broadcasts."""
+    bus = PubSub()
+    worker, evicted = _worker(bus)
+    org_id = (await _create_org(test_db)).id
+
+    await bump_authz_version(test_db, org_id, SCOPE_POLICY, bus=bus)
+    await test_db.rollback()
+    await test_db.commit()
+
+    assert evicted == []
+    assert worker.current(org_id) is None
+    assert await load_authz_version(test_db, org_id) == 0
+
+
+@pytest.mark.asyncio
+async def test_stale_versions_are_ignored(test_db: AsyncSession):
+    """Test that redelivered or out-of-order versions do not evict again."""
+    registry = AuthzVersionRegistry()
+    evicted = []
+    registry.on_change(SCOPE_POLICY, evicted.append)
+    org = await _create_org(test_db)
+
+    assert registry.observe(org.id, 3, SCOPE_POLICY) is True
+    assert registry.observe(org.id, 3, SCOPE_POLICY) is False
+    assert registry.observe(org.id, 2, SCOPE_POLICY) is False
+    assert evicted == [org.id]
+
+    # Another worker's earlier RBAC bump arriving after a newer policy bump
+    rbac_evicted = []
+    registry.on_change(SCOPE_RBAC, rbac_evicted.append, remote_only=True)
+    assert registry.observe(org.id, 4, SCOPE_POLICY, local=True) is True
+    assert registry.observe(org.id, 3, SCOPE_RBAC) is True
+    assert rbac_evicted == [org.id]
+    assert registry.current(org.id) == 4
+
+    registry.reset()
+    assert evicted == [org.id, org.id, None]
+    assert registry.current(org.id) is None
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import zlib
+
+import pytest
+
+from src.core.pubsub import PubSub
+from src.services.notification_service import (
+    NOTIFICATION_CHANNEL,
+    SLOW_CONSUMER_CLOSE_CODE,
+    ConnectionManager,
+    Frame,
+    NotificationBus,
+)
+
+
+class FakeWebSocket:
+    """Records what the server sends; a stalled socket never finishes a send."""
+
+    def __init__(self, stalled: bool = False):
+        self.sent: list = []
+        self.closed_with: int | None = None
+        self.subprotocol: str | None = None
+        self._stalled = stalled
+
+    async def accept(self, subprotocol: str | None = None):
+        self.subprotocol = subprotocol
+
+    async def send(self, message: dict):
+        if self._stalled:
+            await asyncio.Event().wait()
+        self.sent.append(message.get("text", message.get("bytes")))
+
+    def received(self) -> list:
+        return [json.loads(m) for m in self.sent]
+
+    async def close(self, code: int = 1000, reason: str | None = None):
+        self.closed_with = code
+
+
+@pytest.mark.asyncio
+async def test_fanout_is_indexed_by_org_and_user():
+    """Test that broadcasts reach only the targeted org and users."""
+    manager = ConnectionManager(max_queue=8)
+    admin, member, outsider = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(admin, "org-1", "admin")
+    await manager.connect(member, "org-1", "member")
+    await manager.connect(outsider, "org-2", "admin")
+
+    await manager.broadcast_to_admins("org-1", ["admin", "admin"], {"type": "a"})
+    await manager.broadcast_to_user("org-1", "member", {"type": "u"})
+    await manager.broadcast_to_org("org-1", {"type": "o"})
+    await asyncio.sleep(0)
+
+    assert admin.received() == [{"type": "a"}, {"type": "o"}]
+    assert member.received() == [{"type": "u"}, {"type": "o"}]
+    assert outsider.sent == []
+    assert manager.get_connection_count("org-1") == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_consumer_is_disconnected_without_blocking_others():
+    """Test that an overflowing queue closes that socket and the others keep receiving."""
+    manager = ConnectionManager(max_queue=4)
+    slow, fast = FakeWebSocket(stalled=True), FakeWebSocket()
+    await manager.connect(slow, "org-1", "slow")
+    await manager.connect(fast, "org-1", "fast")
+
+    for i in range(10):
+        await manager.broadcast_to_org("org-1", {"seq": i})
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert [m["seq"] for m in fast.received()] == list(range(10))
+    assert slow.closed_with == SLOW_CONSUMER_CLOSE_CODE
+    assert manager.get_connection_count("org-1") == 1
+    assert manager.stats()["slow_consumers"] == 1
+    # The close task is held until it finishes
+    assert manager.stats()["closing"] == 0
+
+
+@pytest.mark.asyncio
+async def test_event_is_encoded_once_for_all_recipients():
+    """Test that every recipient gets the same encoded frame, deflated when negotiated."""
+    manager = ConnectionManager(max_queue=8)
+    plain = [FakeWebSocket() for _ in range(3)]
+    compressed = [FakeWebSocket() for _ in range(2)]
+    for i, websocket in enumerate(plain):
+        await manager.connect(websocket, "org-1", f"plain-{i}")
+    for i, websocket in enumerate(compressed):
+        await manager.connect(websocket, "org-1", f"deflate-{i}", deflate=True)
+
+    frame = Frame({"type": "role.assigned", "data": {"role_name": "viewer"}})
+    await manager.broadcast_to_org("org-1", frame)
+    await asyncio.sleep(0)
+
+    assert all(ws.sent[0] is frame.text for ws in plain)
+    assert all(ws.sent[0] is frame.deflated["bytes"] for ws in compressed)
+    assert compressed[0].subprotocol == "authz.deflate"
+    payload = zlib.decompress(compressed[0].sent[0], wbits=-zlib.MAX_WBITS)
+    assert json.loads(payload) == {"type": "role.assigned", "data": {"role_name": "viewer"}}
+
+
+@pytest.mark.asyncio
+async def test_bus_delivers_across_workers_batched_and_deduplicated():
+    """Test that an event published on one worker reaches sockets on another exactly once."""
+    shared = PubSub()
+    worker_a = NotificationBus(shared, ConnectionManager(max_queue=8), batch_seconds=60)
+    worker_b = NotificationBus(shared, ConnectionManager(max_queue=8), batch_seconds=60)
+    on_a, on_b = FakeWebSocket(), FakeWebSocket()
+    await worker_a.manager.connect(on_a, "org-1", "admin")
+    await worker_b.manager.connect(on_b, "org-1", "admin")
+
+    published = []
+    shared.subscribe(NOTIFICATION_CHANNEL, published.append)
+    for i in range(3):
+        await worker_a.publish("org-1", {"seq": i}, ["admin"])
+    await worker_a.publish("org-1", {"seq": 3}, ["someone-else"])
+    assert published == []
+    await worker_a.flush()
+    assert len(published) == 1
+
+    # A redelivered batch (e.g. the publisher hearing its own NOTIFY) is dropped
+    worker_b.handle_message(published[0])
+    await asyncio.sleep(0)
+
+    assert [m["seq"] for m in on_a.received()] == [0, 1, 2]
+    assert [m["seq"] for m in on_b.received()] == [0, 1, 2]
+    assert worker_b.stats()["duplicates"] == 4
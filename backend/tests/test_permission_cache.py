@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from src.services.permission_cache import PermissionCache
+
+
+async def _permissions(client: AsyncClient, org_id: str, user_id: str, headers: dict) -> list[str]:
+    response = await client.get(f"/api/orgs/{org_id}/users/{user_id}/permissions", headers=headers)
+    assert response.status_code == 200
+    return response.json()["permissions"]
+
+
+@pytest.mark.asyncio
+async def test_permissions_follow_rbac_writes(client: AsyncClient, org_with_auth: dict):
+    """Test that cached permission sets are updated by every RBAC write."""
+    org_id = org_with_auth["org_id"]
+    headers = org_with_auth["headers"]
+    user_id = (await client.get("/api/auth/me", headers=headers)).json()["id"]
+
+    role_id = (
+        await client.post(f"/api/orgs/{org_id}/roles", json={"name": "editor"}, headers=headers)
+    ).json()["id"]
+    read_id = (
+        await client.post(f"/api/orgs/{org_id}/permissions", json={"name": "doc:read"}, headers=headers)
+    ).json()["id"]
+    write_id = (
+        await client.post(f"/api/orgs/{org_id}/permissions", json={"name": "doc:write"}, headers=headers)
+    ).json()["id"]
+
+    assert await _permissions(client, org_id, user_id, headers) == []
+
+    await client.post(
+        f"/api/orgs/{org_id}/users/{user_id}/roles", json={"role_id": role_id}, headers=headers
+    )
+    await client.post(
+        f"/api/orgs/{org_id}/roles/{role_id}/permissions",
+        json={"permission_ids": [read_id, write_id]},
+        headers=headers,
+    )
+    assert await _permissions(client, org_id, user_id, headers) == ["doc:read", "doc:write"]
+
+    await client.delete(f"/api/orgs/{org_id}/roles/{role_id}/permissions/{write_id}", headers=headers)
+    assert await _permissions(client, org_id, user_id, headers) == ["doc:read"]
+
+    await client.delete(f"/api/orgs/{org_id}/permissions/{read_id}", headers=headers)
+    assert await _permissions(client, org_id, user_id, headers) == []
+
+    await client.post(
+        f"/api/orgs/{org_id}/roles/{role_id}/permissions",
+        json={"permission_ids": [write_id]},
+        headers=headers,
+    )
+    assert await _permissions(client, org_id, user_id, headers) == ["doc:write"]
+
+    await client.delete(f"/api/orgs/{org_id}/users/{user_id}/roles/{role_id}", headers=headers)
+    assert await _permissions(client, org_id, user_id, headers) == []
+
+
+def test_permission_cache_is_bounded():
+    """Test LRU eviction and that stale loads are not stored."""
+    cache = PermissionCache(max_entries=2)
+    org_id, role_id = uuid.uuid4(), uuid.uuid4()
+    users = [uuid.uuid4() for _ in range(3)]
+
+    for user_id in users:
+        cache.put(org_id, user_id, {role_id: frozenset({"a"})}, cache.generation(org_id))
+
+    assert cache.get(org_id, users[0]) is None
+    assert cache.get(org_id, users[2]).permissions == {"a"}
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+
+    generation = cache.generation(org_id)
+    cache.role_permissions_added(org_id, role_id, {"b"})
+    assert cache.get(org_id, users[1]).permissions == {"a", "b"}
+    cache.put(org_id, users[0], {role_id: frozenset({"a"})}, generation)
+    assert cache.get(org_id, users[0]) is None
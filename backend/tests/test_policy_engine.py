@@ -0,0 +1,104 @@
+import fnmatch
+import random
+import time
+import uuid
+
+from src.db.models import Policy
+from src.services.decision_cache import DecisionCache, decision_key
+from src.services.policy_engine import CompiledPolicySet, PatternIndex
+
+
+PATTERNS = [
+    "*",
+    "documents:read",
+    "documents:*",
+    "documents:1*",
+    "*:read",
+    "doc?ments:read",
+    "documents:[0-9]",
+    "folders:*:read",
+    "reports",
+]
+VALUES = [
+    "documents:read",
+    "documents:1",
+    "documents:12",
+    "documents:",
+    "folders:a:read",
+    "folders:read",
+    "reports",
+    "reports:1",
+    "",
+]
+
+
+def _policy(priority: int, effect: str, actions: list[str], resources: list[str]) -> Policy:
+    return Policy(
+        id=uuid.uuid4(),
+        name=f"p{priority}",
+        effect=effect,
+        principals={},
+        actions=actions,
+        resources=resources,
+        conditions=None,
+        priority=priority,
+    )
+
+
+def test_pattern_index_matches_fnmatch():
+    """Test that indexed candidates are exactly the policies fnmatch would match."""
+    rng = random.Random(42)
+    pattern_lists = [rng.sample(PATTERNS, rng.randrange(0, 3)) for _ in range(200)]
+
+    index = PatternIndex()
+    for position, patterns in enumerate(pattern_lists):
+        index.add(position, patterns)
+    index.freeze()
+
+    for value in VALUES:
+        expected = {
+            position
+            for position, patterns in enumerate(pattern_lists)
+            if not patterns or any(fnmatch.fnmatch(value, p) for p in patterns)
+        }
+        assert set(index.candidates(value)) == expected, value
+
+
+def test_candidates_preserve_priority_order():
+    """Test that the first matching deny and allow follow priority order."""
+    compiled = CompiledPolicySet.compile(
+        [
+            _policy(30, "allow", ["documents:*"], ["*"]),
+            _policy(20, "deny", ["*:read"], ["documents:secret*"]),
+            _policy(10, "allow", ["documents:read"], ["documents:1"]),
+            _policy(5, "deny", ["documents:read"], ["documents:secret"]),
+        ]
+    )
+
+    assert compiled.candidates("documents:read", "documents:1") == [0, 2]
+    assert compiled.candidates("folders:read", "documents:1") == []
+
+    result = compiled.evaluate(frozenset(), "u1", "documents:read", "documents:secret", {})
+    assert result["allowed"] is False
+    assert result["reason"] == "Denied by policy: p20"
+
+    result = compiled.evaluate(frozenset(), "u1", "documents:write", "documents:1", {})
+    assert result["reason"] == "Allowed by policy: p30"
+
+
+def test_decision_cache_versions_and_ttl(monkeypatch):
+    """Test that entries expire with their TTL or when the org version moves on."""
+    cache = DecisionCache(ttl_seconds=5, max_entries=10)
+    key = decision_key(uuid.uuid4(), uuid.uuid4(), "read", "doc:1", {"x": 1})
+    cache.put(key, 3, {"allowed": True})
+
+    assert cache.get(key, 3) == {"allowed": True}
+    assert cache.get(key, 4) is None
+    assert cache.get(key, 3) is None
+
+    now = time.monotonic()
+    cache.put(key, 3, {"allowed": True})
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+    assert cache.get(key, 3) is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 3
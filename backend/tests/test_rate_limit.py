@@ -0,0 +1,195 @@
+import dataclasses
+import uuid
+
+import pytest
+from httpx import AsyncClient
+
+from src.api.rate_limit import SlidingWindowLimiter, rate_limiter, route_limits
+from src.core.identity_cache import identity_cache
+from src.core.rate_limit_store import (
+    LocalRespClient,
+    RedisRateLimitStore,
+    SharedMemoryRateLimitStore,
+)
+from src.services.org_service import OrgService
+
+
+def test_sliding_window_weights_previous_window():
+    """Test that the previous window's count decays across the current one."""
+    limiter = SlidingWindowLimiter(limit=10, window_seconds=60)
+
+    for _ in range(10):
+        assert limiter.hit("k", now=30.0).allowed
+    blocked = limiter.hit("k", now=59.0)
+    assert not blocked.allowed
+    assert blocked.retry_after == 1
+
+    # Halfway through the next window half of the previous count still applies
+    assert limiter.hit("k", now=90.0, cost=5).allowed
+    assert not limiter.hit("k", now=90.0).allowed
+    # Two windows later nothing carries over
+    assert limiter.hit("k", now=185.0, cost=10).remaining == 0
+
+
+def test_sweep_evicts_idle_keys():
+    """Test that the periodic sweep drops keys that no longer affect decisions."""
+    limiter = SlidingWindowLimiter(limit=10, window_seconds=60, sweep_interval=60)
+    limiter._next_sweep = 120.0
+    for i in range(100):
+        limiter.hit(f"idle-{i}", now=1.0)
+    limiter.hit("active", now=70.0)
+    assert limiter.stats()["keys"] == 101
+
+    limiter.hit("active", now=125.0)
+    assert limiter.stats()["keys"] == 1
+    assert limiter.stats()["evicted"] == 100
+
+
+@pytest.mark.asyncio
+async def test_rate_limit_headers_and_429(client: AsyncClient, auth_headers: dict):
+    """Test that responses carry limit headers and the limiter returns 429 when exhausted."""
+    response = await client.get("/api/orgs", headers=auth_headers)
+    assert response.headers["X-RateLimit-Limit"] == str(rate_limiter.limit)
+    remaining = int(response.headers["X-RateLimit-Remaining"])
+
+    for _ in range(remaining):
+        await client.get("/api/orgs", headers=auth_headers)
+    response = await client.get("/api/orgs", headers=auth_headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    response = await client.get("/metrics")
+    assert response.json()["rate_limiter"]["keys"] >= 1
+
+    # Tokens share their JWT header, so only a digest of the whole token tells users apart
+    response = await client.post(
+        "/api/auth/register",
+        json={"email": "other@example.com", "name": "Other", "password": "testpassword123"},
+    )
+    other = {"Authorization": f"Bearer {response.json()['tokens']['access_token']}"}
+    response = await client.get("/api/orgs", headers=other)
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_shared_memory_store_counts_across_workers(tmp_path):
+    """Test that workers sharing the counter table enforce one combined limit."""
+    path = str(tmp_path / "rate-limit")
+    workers = [
+        SlidingWindowLimiter(10, 60, store=SharedMemoryRateLimitStore(path, 64, flush_interval=1))
+        for _ in range(2)
+    ]
+
+    for _ in range(6):
+        assert workers[0].hit("k", now=5.0).allowed
+    await workers[0].store.flush()
+    for _ in range(4):
+        assert workers[1].hit("k", now=6.0).allowed
+    assert not workers[1].hit("k", now=6.0).allowed
+
+    await workers[1].store.flush()
+    assert not workers[0].hit("k", now=7.0).allowed
+    assert workers[0].store.count("k", 0) == 10
+
+
+@pytest.mark.asyncio
+async def test_redis_store_batches_increments():
+    """Test that increments are pushed in one pipeline and totals flow back."""
+    server = LocalRespClient()
+    first = SlidingWindowLimiter(10, 60, store=RedisRateLimitStore(server, 60, flush_interval=1))
+    second = SlidingWindowLimiter(10, 60, store=RedisRateLimitStore(server, 60, flush_interval=1))
+
+    for _ in range(7):
+        assert first.hit("k", now=5.0).allowed
+    assert server.data == {}
+    await first.store.flush()
+    assert server.data["ratelimit:k:0"][0] == 7
+
+    second.hit("k", now=6.0)
+    await second.store.flush()
+    assert second.hit("k", now=6.0, cost=2).allowed
+    assert not second.hit("k", now=6.0).allowed
+    await second.store.flush()
+
+    # Slots read since the last flush are refreshed by the next one
+    assert first.store.count("k", 0) == 7
+    await first.store.flush()
+    assert first.store.count("k", 0) == 10
+
+
+@pytest.mark.asyncio
+async def test_route_budgets_are_cost_weighted_per_org(client: AsyncClient, org_with_auth: dict):
+    """Test that bulk items count against the org's bulk budget, not the authorize path."""
+    org_id = org_with_auth["org_id"]
+    headers = org_with_auth["headers"]
+    route_limits.org_limits[org_id] = {"authorize_bulk": 5}
+    item = {"principal_id": str(uuid.uuid4()), "action": "read", "resource": "doc:1"}
+    try:
+        response = await client.post(
+            f"/api/authorize/bulk?org_id={org_id}", json=[item] * 3, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.headers["X-RateLimit-Limit"] == "5"
+        assert response.headers["X-RateLimit-Remaining"] == "2"
+
+        response = await client.post(
+            f"/api/authorize/bulk?org_id={org_id}", json=[item] * 3, headers=headers
+        )
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+        # More items than the whole budget are refused outright
+        response = await client.post(
+            f"/api/authorize/bulk?org_id={org_id}", json=[item] * 6, headers=headers
+        )
+        assert response.status_code == 413
+
+        # Single checks have their own budget
+        response = await client.post(
+            "/api/authorize", json={**item, "org_id": org_id}, headers=headers
+        )
+        assert response.status_code == 200
+        assert response.headers["X-RateLimit-Limit"] == str(route_limits.limit_for("authorize", org_id))
+    finally:
+        del route_limits.org_limits[org_id]
+
+
+@pytest.mark.asyncio
+async def test_route_budgets_need_membership(
+    client: AsyncClient, org_with_auth: dict, test_session_factory, monkeypatch
+):
+    """Test that outsiders cannot spend an org's budget and floods are cut off per caller."""
+    org_id = org_with_auth["org_id"]
+    item = {"principal_id": str(uuid.uuid4()), "action": "read", "resource": "doc:1", "org_id": org_id}
+    response = await client.post(
+        "/api/auth/register",
+        json={"email": "outsider@example.com", "name": "Outsider", "password": "testpassword123"},
+    )
+    outsider_id = uuid.UUID(response.json()["user"]["id"])
+    outsider = {"Authorization": f"Bearer {response.json()['tokens']['access_token']}"}
+
+    response = await client.post("/api/authorize", json=item, headers=outsider)
+    assert response.status_code == 403
+    hits = identity_cache.member_hits
+    response = await client.post("/api/authorize", json=item, headers=outsider)
+    assert response.status_code == 403
+    assert identity_cache.member_hits == hits + 1
+
+    # Membership changes drop the cached answer
+    async with test_session_factory() as db:
+        await OrgService(db).add_member(uuid.UUID(org_id), outsider_id)
+    response = await client.post("/api/authorize", json=item, headers=outsider)
+    assert response.status_code == 200
+    async with test_session_factory() as db:
+        await OrgService(db).remove_member(uuid.UUID(org_id), outsider_id)
+    response = await client.post("/api/authorize", json=item, headers=outsider)
+    assert response.status_code == 403
+    response = await client.post("/api/authorize", json=item, headers=org_with_auth["headers"])
+    # Only the call made while the outsider was a member was charged before this one
+    assert response.headers["X-RateLimit-Remaining"] == str(route_limits.limit_for("authorize", org_id) - 2)
+
+    monkeypatch.setitem(
+        route_limits.policies, "authorize", dataclasses.replace(route_limits.policies["authorize"], caller_limit=3)
+    )
+    statuses = [(await client.post("/api/authorize", json=item)).status_code for _ in range(4)]
+    assert statuses == [401, 401, 401, 429]
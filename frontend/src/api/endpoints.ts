@@ -227,7 +227,15 @@ export const auditApi = {
     end_date?: string;
     limit?: number;
     offset?: number;
-  }): Promise<{ logs: AuditLog[]; total: number; limit: number; offset: number }> => {
+    cursor?: string;
+  }): Promise<{
+    logs: AuditLog[];
+    total: number | null;
+    total_estimated: boolean;
+    limit: number;
+    offset: number;
+    next_cursor: string | null;
+  }> => {
     const searchParams = new URLSearchParams();
     if (params?.action) searchParams.set("action", params.action);
     if (params?.resource_type) searchParams.set("resource_type", params.resource_type);
@@ -236,12 +244,13 @@ export const auditApi = {
     if (params?.end_date) searchParams.set("end_date", params.end_date);
     if (params?.limit) searchParams.set("limit", params.limit.toString());
     if (params?.offset) searchParams.set("offset", params.offset.toString());
+    if (params?.cursor) searchParams.set("cursor", params.cursor);
 
     const query = searchParams.toString();
     return apiGet(orgPath(`/audit${query ? `?${query}` : ""}`));
   },
 
-  export: async (format: "json" | "csv" = "json"): Promise<string> => {
+  export: async (format: "json" | "ndjson" | "csv" = "json"): Promise<string> => {
     const orgId = getCurrentOrgId();
     if (!orgId) throw { message: "No organization selected", status: 400 };
 
@@ -20,6 +20,7 @@ export function useAuditPaginated(params?: {
   resource_type?: string;
   limit?: number;
   offset?: number;
+  cursor?: string;
 }) {
   return useQuery({
     queryKey: ["audit", "paginated", params],